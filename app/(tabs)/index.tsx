@@ -4,7 +4,7 @@ import { View, Text, StyleSheet, ScrollView, TouchableOpacity, Image, TextInput,
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { Search, Settings, Menu, MessageCircle, Car, Plus, Navigation } from 'lucide-react-native';
 import { router, useFocusEffect } from 'expo-router';
-import { ridesAPI, usersAPI } from '../../services/api';
+import { batchAPI, ridesAPI, usersAPI } from '../../services/api';
 
 interface Ride {
   id: number;
@@ -171,7 +171,7 @@ useFocusEffect(
       
       try {
         setLoading(true);
-        const riderRequests = await ridesAPI.getMyRideRequests();
+        const riderRequests = await ridesAPI.getMyRideRequests('card');
             setAllRiderRequests(riderRequests); // Store all requests
         const rideHistory = await ridesAPI.getRideHistory();
         const ridesNeedingReview = rideHistory.filter(
@@ -181,19 +181,17 @@ useFocusEffect(
          const now = new Date();
     const sixHoursBefore = new Date(now.getTime() - 6 * 60 * 60 * 1000);
     const sixHoursAfter = new Date(now.getTime() + 6 * 60 * 60 * 1000);
-        // Fetch details for each requested ride
-        const ridesWithDetails = await Promise.all(
-          riderRequests.map(async (request: any) => {
-            const rideDetails = await ridesAPI.getRideDetails(request.ride_id);
-            const rideTime = new Date(rideDetails.start_time);
-            return {
-              ...rideDetails,
-              requestStatus: request.status,
-              requestId: request.id,
-              rideTime: rideTime,
-            };
-          })
-        );
+        // Fetch details for each requested ride in one round trip
+        const details = await batchAPI.get(riderRequests.map((request: any) => `/rides/${request.ride_id}`));
+        const ridesWithDetails = riderRequests
+          .map((request: any, i: number) => ({ request, rideDetails: details[i] }))
+          .filter(({ rideDetails }: any) => rideDetails.status === 200)
+          .map(({ request, rideDetails }: any) => ({
+            ...rideDetails.body,
+            requestStatus: request.status,
+            requestId: request.id,
+            rideTime: new Date(rideDetails.body.start_time),
+          }));
         const filteredRides = ridesWithDetails.filter(ride => {
       return ride.rideTime >= sixHoursBefore && ride.rideTime <= sixHoursAfter;
     });
@@ -227,17 +225,16 @@ const handleRefresh = async () => {
       const driverRides = await ridesAPI.getMyRides();
       setUpcomingDriverRides(driverRides);
     } else {
-      const riderRequests = await ridesAPI.getMyRideRequests();
-      const ridesWithDetails = await Promise.all(
-        riderRequests.map(async (request: any) => {
-          const rideDetails = await ridesAPI.getRideDetails(request.ride_id);
-          return {
-            ...rideDetails,
-            requestStatus: request.status,
-            requestId: request.id
-          };
-        })
-      );
+      const riderRequests = await ridesAPI.getMyRideRequests('card');
+      const details = await batchAPI.get(riderRequests.map((request: any) => `/rides/${request.ride_id}`));
+      const ridesWithDetails = riderRequests
+        .map((request: any, i: number) => ({ request, rideDetails: details[i] }))
+        .filter(({ rideDetails }: any) => rideDetails.status === 200)
+        .map(({ request, rideDetails }: any) => ({
+          ...rideDetails.body,
+          requestStatus: request.status,
+          requestId: request.id
+        }));
       setUpcomingRiderRides(ridesWithDetails);
     }
   } catch (error) {
@@ -34,6 +34,10 @@ export default function MessagesChatScreen() {
   const [loading, setLoading] = useState(true);
   const [sending, setSending] = useState(false);
   const [currentUserId, setCurrentUserId] = useState<number | null>(null);
+  // Cursor for the next older page; null once the start of the conversation is loaded
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const prependingRef = useRef(false);
   const scrollViewRef = useRef<ScrollView>(null);
 
   useEffect(() => {
@@ -65,7 +69,11 @@ export default function MessagesChatScreen() {
   }, [userId]);
 
   useEffect(() => {
-    // Auto-scroll to bottom when new messages arrive
+    // Auto-scroll to bottom when new messages arrive (not when older ones are prepended)
+    if (prependingRef.current) {
+      prependingRef.current = false;
+      return;
+    }
     if (messages.length > 0) {
       setTimeout(() => {
         scrollViewRef.current?.scrollToEnd({ animated: true });
@@ -87,8 +95,13 @@ export default function MessagesChatScreen() {
   const loadMessages = async () => {
     try {
       setLoading(true);
-      const data = await messagesAPI.getConversationWithUser(Number(userId));
-      setMessages(data);
+      // Pages come newest first; the chat renders oldest first
+      const page = await messagesAPI.getConversationHistory(Number(userId));
+      setMessages([...page.messages].reverse());
+      setOlderCursor(page.has_more ? page.before : null);
+      messagesAPI.markConversationRead(Number(userId)).catch((error) =>
+        console.error('Error marking messages read:', error)
+      );
     } catch (error) {
       console.error('Error loading messages:', error);
       Alert.alert('Error', 'Failed to load messages. Please try again.');
@@ -97,6 +110,21 @@ export default function MessagesChatScreen() {
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!olderCursor || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const page = await messagesAPI.getConversationHistory(Number(userId), { before: olderCursor });
+      prependingRef.current = true;
+      setMessages(prev => [...[...page.messages].reverse(), ...prev]);
+      setOlderCursor(page.has_more ? page.before : null);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const handleSend = async () => {
     const trimmedInput = input.trim();
     if (!trimmedInput || !currentUserId) return;
@@ -195,7 +223,12 @@ export default function MessagesChatScreen() {
             contentContainerStyle={{ paddingVertical: 16 }}
             keyboardShouldPersistTaps="handled"
             showsVerticalScrollIndicator={false}
+            onScroll={({ nativeEvent }) => {
+              if (nativeEvent.contentOffset.y <= 0) loadOlderMessages();
+            }}
+            scrollEventThrottle={200}
           >
+            {loadingOlder && <ActivityIndicator size="small" color="#14B8A6" />}
             {messages.length === 0 ? (
               <View style={styles.emptyState}>
                 <Text style={styles.emptyStateText}>
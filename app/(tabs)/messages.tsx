@@ -15,6 +15,7 @@ type Conversation = {
   last_message_time: string;
   last_message_id: number;
   ride_id?: number;
+  unread_count?: number;
 };
 
 export default function MessagesScreen() {
@@ -106,9 +107,16 @@ export default function MessagesScreen() {
           <Text style={styles.name}>{conversation.user_name || 'Unknown User'}</Text>
           <Text style={styles.timestamp}>{formatTime(conversation.last_message_time)}</Text>
         </View>
-        <Text style={styles.lastMessage} numberOfLines={2}>
-          {conversation.last_message || 'No messages yet'}
-        </Text>
+        <View style={styles.conversationHeader}>
+          <Text style={[styles.lastMessage, !!conversation.unread_count && styles.unreadMessage]} numberOfLines={2}>
+            {conversation.last_message || 'No messages yet'}
+          </Text>
+          {!!conversation.unread_count && (
+            <View style={styles.unreadBadge}>
+              <Text style={styles.unreadBadgeText}>{conversation.unread_count}</Text>
+            </View>
+          )}
+        </View>
       </View>
     </TouchableOpacity>
   );
@@ -233,11 +241,31 @@ const styles = StyleSheet.create({
     color: '#9CA3AF',
   },
   lastMessage: {
+    flex: 1,
     fontSize: 16,
     fontFamily: 'Inter-Regular',
     color: '#9CA3AF',
     lineHeight: 20,
   },
+  unreadMessage: {
+    color: '#2d3748',
+    fontFamily: 'Inter-SemiBold',
+  },
+  unreadBadge: {
+    minWidth: 22,
+    height: 22,
+    borderRadius: 11,
+    paddingHorizontal: 6,
+    backgroundColor: '#4ECDC4',
+    alignItems: 'center',
+    justifyContent: 'center',
+    marginLeft: 8,
+  },
+  unreadBadgeText: {
+    fontSize: 12,
+    fontFamily: 'Inter-SemiBold',
+    color: '#fff',
+  },
   loadingText: {
     textAlign: 'center',
     padding: 20,
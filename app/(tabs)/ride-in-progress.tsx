@@ -3,7 +3,7 @@ import { View, Text, StyleSheet, TouchableOpacity, Image, ScrollView, ActivityIn
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { ArrowLeft, Star } from 'lucide-react-native';
 import { router, useLocalSearchParams, useFocusEffect } from 'expo-router';
-import {ridesAPI,usersAPI} from '../../services/api'
+import {ridesAPI,usersAPI,trackingAPI} from '../../services/api'
 import MapView, { Marker, Polyline } from 'react-native-maps';
 import * as Location from 'expo-location';
 
@@ -114,6 +114,11 @@ const fetchData = async () => {
   };
 
   useEffect(() => {
+    if (!rideDetails) return;
+    let socket: WebSocket | null = null;
+    let subscription: Location.LocationSubscription | null = null;
+    let cancelled = false;
+
     (async () => {
       let { status } = await Location.requestForegroundPermissionsAsync();
       if (status !== 'granted') {
@@ -121,38 +126,38 @@ const fetchData = async () => {
         return;
       }
 
-      // For demo purposes, we'll simulate the driver moving from start to end location
-      // In a real app, you would use Location.watchPositionAsync or get the location from your backend
-      if (rideDetails) {
-        // Start at the pickup location
-        setDriverLocation({
-          latitude: rideDetails.start_latitude,
-          longitude: rideDetails.start_longitude
-        });
-
-        // Simulate movement towards destination
-        const interval = setInterval(() => {
-          setDriverLocation(prev => {
-            if (!prev || !rideDetails) return null;
-            
-            const progress = 0.005; // Adjust this value to change speed
-            const newLat = prev.latitude + (rideDetails.end_latitude - rideDetails.start_latitude) * progress;
-            const newLng = prev.longitude + (rideDetails.end_longitude - rideDetails.start_longitude) * progress;
-            
-            // Stop when close to destination
-            if (Math.abs(newLat - rideDetails.end_latitude) < 0.0001 && 
-                Math.abs(newLng - rideDetails.end_longitude) < 0.0001) {
-              clearInterval(interval);
-              return { latitude: rideDetails.end_latitude, longitude: rideDetails.end_longitude };
-            }
-            
-            return { latitude: newLat, longitude: newLng };
-          });
-        }, 1000);
-
-        return () => clearInterval(interval);
+      // Stream GPS fixes to the backend, which fans them out to the accepted riders
+      socket = await trackingAPI.openRideSocket(Number(rideId));
+      subscription = await Location.watchPositionAsync(
+        { accuracy: Location.Accuracy.High, timeInterval: 3000, distanceInterval: 10 },
+        (position) => {
+          const ping = {
+            latitude: position.coords.latitude,
+            longitude: position.coords.longitude,
+            speed: position.coords.speed,
+            heading: position.coords.heading,
+            accuracy: position.coords.accuracy,
+            recorded_at: new Date(position.timestamp).toISOString(),
+          };
+          setDriverLocation({ latitude: ping.latitude, longitude: ping.longitude });
+          if (socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify(ping));
+          } else {
+            trackingAPI.sendPings(Number(rideId), [ping]).catch(() => {});
+          }
+        }
+      );
+      if (cancelled) {
+        subscription.remove();
+        socket.close();
       }
     })();
+
+    return () => {
+      cancelled = true;
+      subscription?.remove();
+      socket?.close();
+    };
   }, [rideDetails]);
 
 
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { View, Text, StyleSheet, Linking, TouchableOpacity, Image } from 'react-native';
 import MapView, { Marker, Polyline } from 'react-native-maps';
 import { router, useLocalSearchParams } from 'expo-router';
-import { ridesAPI } from '../../services/api';
+import { ridesAPI, trackingAPI } from '../../services/api';
 import { MaterialIcons, FontAwesome, Ionicons } from '@expo/vector-icons';
 import * as Location from 'expo-location';
 
@@ -43,6 +43,8 @@ export default function RiderRideInProgress() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [driverLocation, setDriverLocation] = useState<{latitude: number, longitude: number} | null>(null);
+  // Remaining stops with the driver's estimated arrival, pushed when they change noticeably
+  const [stopEtas, setStopEtas] = useState<Array<{ stop: string; eta_minutes: number }>>([]);
   const [region, setRegion] = useState({
     latitude: 37.78825,
     longitude: -122.4324,
@@ -77,38 +79,42 @@ export default function RiderRideInProgress() {
     fetchRideDetails();
   }, [rideId]);
 
-  // Simulate driver location updates (in a real app, this would come from WebSocket or API polling)
+  // Live driver location pushed by the backend
   useEffect(() => {
     if (!ride) return;
+    let socket: WebSocket | null = null;
+    let cancelled = false;
 
-    // Initial driver location (start point)
+    // Start point until the first live position arrives
     setDriverLocation({
       latitude: ride.start_latitude,
       longitude: ride.start_longitude
     });
 
-    // Simulate driver moving towards destination
-    const interval = setInterval(() => {
-      setDriverLocation(prev => {
-        if (!prev) return null;
-        
-        // Simple linear interpolation between start and end points
-        const progress = 0.01; // Adjust this value to change speed
-        const newLat = prev.latitude + (ride.end_latitude - ride.start_latitude) * progress;
-        const newLng = prev.longitude + (ride.end_longitude - ride.start_longitude) * progress;
-        
-        // Stop when close to destination
-        if (Math.abs(newLat - ride.end_latitude) < 0.0001 && 
-            Math.abs(newLng - ride.end_longitude) < 0.0001) {
-          clearInterval(interval);
-          return { latitude: ride.end_latitude, longitude: ride.end_longitude };
+    (async () => {
+      const rideIdNumber = Array.isArray(rideId) ? Number(rideId[0]) : Number(rideId);
+      socket = await trackingAPI.openRideSocket(rideIdNumber);
+      if (cancelled) {
+        socket.close();
+        return;
+      }
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'eta' || message.type === 'snapshot') {
+          setStopEtas(message.type === 'eta' ? message.stops : message.etas);
+          if (message.type === 'eta') return;
         }
-        
-        return { latitude: newLat, longitude: newLng };
-      });
-    }, 1000);
+        const latest = message.type === 'snapshot' ? message.points[message.points.length - 1] : message;
+        if (latest && latest.latitude !== undefined) {
+          setDriverLocation({ latitude: latest.latitude, longitude: latest.longitude });
+        }
+      };
+    })();
 
-    return () => clearInterval(interval);
+    return () => {
+      cancelled = true;
+      socket?.close();
+    };
   }, [ride]);
 
   const handleCallDriver = () => {
@@ -199,7 +205,9 @@ export default function RiderRideInProgress() {
             <Marker
               coordinate={driverLocation}
               title="Driver"
-              description={`En route to pickup`}
+              description={stopEtas.length > 0
+                ? `${stopEtas[0].stop} in ${Math.round(stopEtas[0].eta_minutes)} min`
+                : `En route to pickup`}
               anchor={{ x: 0.5, y: 0.5 }}
             >
               <View style={styles.driverMarker}>
@@ -247,6 +255,15 @@ export default function RiderRideInProgress() {
           </Text>
         </View>
 
+        {stopEtas.length > 0 && (
+          <View style={styles.carInfo}>
+            <MaterialIcons name="schedule" size={24} color="#6B7280" />
+            <Text style={styles.carText}>
+              {stopEtas.map(eta => `${eta.stop}: ${Math.round(eta.eta_minutes)} min`).join(' • ')}
+            </Text>
+          </View>
+        )}
+
         <View style={styles.locationInfo}>
           <View style={styles.locationRow}>
             <View style={styles.locationDot} />
@@ -20,6 +20,12 @@ from app.db.models.ride_history import RideHistory
 from app.db.models.schedule import Schedule
 from app.db.models.location import PreferredLocation
 from app.db.models.ride_request import RideRequest
+from app.db.models.commute_match import CommuteMatch
+from app.db.models.ride_template import RideTemplate
+from app.db.models.ride_track import RideTrack
+from app.db.models.ride_archive import RideArchive, RideRequestArchive
+from app.db.models.conversation_unread import ConversationUnread
+from app.db.models.ride_chat_member import RideChatMember
 print("Tables in metadata:", list(Base.metadata.tables.keys()))
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
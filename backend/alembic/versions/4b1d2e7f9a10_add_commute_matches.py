@@ -0,0 +1,50 @@
+"""add commute matches
+
+Revision ID: 4b1d2e7f9a10
+Revises: c65c8e682ecb
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1d2e7f9a10'
+down_revision = 'c65c8e682ecb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'commute_matches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=False),
+        sa.Column('day_of_week', sa.Integer(), nullable=False),
+        sa.Column('leg', sa.String(), nullable=False),
+        sa.Column('match_type', sa.String(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=True),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('driver_schedule_id', sa.Integer(), nullable=True),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('pickup_distance_km', sa.Float(), nullable=False),
+        sa.Column('dropoff_distance_km', sa.Float(), nullable=False),
+        sa.Column('time_offset_minutes', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['rider_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id']),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['driver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['driver_schedule_id'], ['schedules.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_commute_matches_id'), 'commute_matches', ['id'], unique=False)
+    op.create_index(op.f('ix_commute_matches_rider_id'), 'commute_matches', ['rider_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_commute_matches_rider_id'), table_name='commute_matches')
+    op.drop_index(op.f('ix_commute_matches_id'), table_name='commute_matches')
+    op.drop_table('commute_matches')
@@ -0,0 +1,58 @@
+"""add ride templates
+
+Revision ID: 7c3e9a1b5d22
+Revises: 4b1d2e7f9a10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e9a1b5d22'
+down_revision = '4b1d2e7f9a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ride_templates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=False),
+        sa.Column('start_location', sa.String(), nullable=False),
+        sa.Column('end_location', sa.String(), nullable=False),
+        sa.Column('start_latitude', sa.Float(), nullable=True),
+        sa.Column('start_longitude', sa.Float(), nullable=True),
+        sa.Column('end_latitude', sa.Float(), nullable=True),
+        sa.Column('end_longitude', sa.Float(), nullable=True),
+        sa.Column('distance_km', sa.Float(), nullable=True),
+        sa.Column('estimated_duration', sa.Integer(), nullable=True),
+        sa.Column('seats_available', sa.Integer(), nullable=False),
+        sa.Column('total_fare', sa.Float(), nullable=True),
+        sa.Column('main_stops', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['driver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.id']),
+        sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ride_templates_id'), 'ride_templates', ['id'], unique=False)
+    op.create_index(op.f('ix_ride_templates_driver_id'), 'ride_templates', ['driver_id'], unique=False)
+    op.add_column('rides', sa.Column('template_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_rides_template_id', 'rides', 'ride_templates', ['template_id'], ['id'])
+    op.create_index(op.f('ix_rides_template_id'), 'rides', ['template_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rides_template_id'), table_name='rides')
+    op.drop_constraint('fk_rides_template_id', 'rides', type_='foreignkey')
+    op.drop_column('rides', 'template_id')
+    op.drop_index(op.f('ix_ride_templates_driver_id'), table_name='ride_templates')
+    op.drop_index(op.f('ix_ride_templates_id'), table_name='ride_templates')
+    op.drop_table('ride_templates')
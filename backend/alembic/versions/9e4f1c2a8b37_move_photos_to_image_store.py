@@ -0,0 +1,96 @@
+"""move base64 photos to image store
+
+Revision ID: 9e4f1c2a8b37
+Revises: 7c3e9a1b5d22
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import base64
+import binascii
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4f1c2a8b37'
+down_revision = '7c3e9a1b5d22'
+branch_labels = None
+depends_on = None
+
+# Kept in step with app/services/image_storage.py as of this revision; a migration must not
+# change behaviour when the app code does. Files are written under MEDIA_ROOT in the layout the
+# local image store serves. With IMAGE_STORE_BACKEND=s3, upload that directory to the bucket.
+BATCH_SIZE = 100
+THUMBNAIL_SIZES = (96, 320)
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+def _write(root: str, key: str, data: bytes):
+    path = os.path.join(root, key)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+def _store(root: str, data_url: str) -> str:
+    """Write the image and its thumbnails, return the key to keep in photo_url"""
+    data = base64.b64decode(data_url.split(",", 1)[1], validate=False)
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    extension = FORMAT_EXTENSIONS.get(image.format)
+    if not extension:
+        raise ValueError(f"unsupported image format {image.format}")
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest}.{extension}"
+    if not os.path.exists(os.path.join(root, key)):
+        for size in THUMBNAIL_SIZES:
+            thumbnail = image.convert("RGB")
+            thumbnail.thumbnail((size, size))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format="JPEG", quality=85, optimize=True)
+            _write(root, f"{digest}_{size}.jpg", buffer.getvalue())
+        # Original last: its presence marks the whole set as complete
+        _write(root, key, data)
+    return key
+
+
+def upgrade() -> None:
+    root = os.environ.get("MEDIA_ROOT", "media")
+    os.makedirs(root, exist_ok=True)
+    bind = op.get_bind()
+    for table in ('users', 'cars'):
+        moved = skipped = 0
+        last_id = 0
+        while True:
+            # Keyset batches: only BATCH_SIZE inline images are held in memory at a time
+            rows = bind.execute(sa.text(
+                f"SELECT id, photo_url FROM {table} WHERE photo_url LIKE 'data:image%' AND id > :last_id "
+                f"ORDER BY id LIMIT {BATCH_SIZE}"
+            ), {"last_id": last_id}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for row in rows:
+                try:
+                    key = _store(root, row.photo_url)
+                except (ValueError, IndexError, binascii.Error, OSError) as e:
+                    print(f"Skipping {table}.id={row.id}: {e}")
+                    skipped += 1
+                    continue
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET photo_url = :key WHERE id = :id"),
+                    {"key": key, "id": row.id}
+                )
+                moved += 1
+        print(f"Moved {moved} {table} photos to {root}, skipped {skipped}")
+
+
+def downgrade() -> None:
+    # Stored images are kept and the keys stay valid; nothing to undo
+    pass
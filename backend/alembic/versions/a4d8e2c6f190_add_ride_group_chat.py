@@ -0,0 +1,52 @@
+"""add ride group chat
+
+Revision ID: a4d8e2c6f190
+Revises: f1c6a9e3b5d7
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d8e2c6f190'
+down_revision = 'f1c6a9e3b5d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Group messages have a ride_id and no receiver
+    op.alter_column('messages', 'receiver_id', existing_type=sa.Integer(), nullable=True)
+    op.execute('DROP INDEX IF EXISTS ix_messages_ride_id')
+    op.create_index('ix_messages_ride_id_sent_at', 'messages', ['ride_id', 'sent_at'], unique=False)
+    op.create_table(
+        'ride_chat_members',
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False),
+        sa.Column('last_read_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('joined_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('ride_id', 'user_id')
+    )
+    op.create_index(op.f('ix_ride_chat_members_user_id'), 'ride_chat_members', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    group_messages = op.get_bind().execute(
+        sa.text('SELECT count(*) FROM messages WHERE receiver_id IS NULL')
+    ).scalar()
+    if group_messages:
+        raise RuntimeError(
+            f'Refusing to downgrade: {group_messages} ride group messages have no receiver '
+            f'and would be lost; export or remove them first'
+        )
+    op.drop_index(op.f('ix_ride_chat_members_user_id'), table_name='ride_chat_members')
+    op.drop_table('ride_chat_members')
+    op.drop_index('ix_messages_ride_id_sent_at', table_name='messages')
+    op.create_index('ix_messages_ride_id', 'messages', ['ride_id'], unique=False)
+    op.alter_column('messages', 'receiver_id', existing_type=sa.Integer(), nullable=False)
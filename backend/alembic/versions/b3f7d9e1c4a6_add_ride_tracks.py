@@ -0,0 +1,41 @@
+"""add ride tracks
+
+Revision ID: b3f7d9e1c4a6
+Revises: 9e4f1c2a8b37
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7d9e1c4a6'
+down_revision = '9e4f1c2a8b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ride_tracks',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=False),
+        sa.Column('longitude', sa.Float(), nullable=False),
+        sa.Column('speed', sa.Float(), nullable=True),
+        sa.Column('heading', sa.Float(), nullable=True),
+        sa.Column('accuracy', sa.Float(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['ride_id'], ['rides.id']),
+        sa.ForeignKeyConstraint(['driver_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ride_tracks_ride_id_recorded_at', 'ride_tracks', ['ride_id', 'recorded_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ride_tracks_ride_id_recorded_at', table_name='ride_tracks')
+    op.drop_table('ride_tracks')
@@ -0,0 +1,31 @@
+"""add message cursor indexes
+
+Revision ID: b9e3f7a2c481
+Revises: a4d8e2c6f190
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e3f7a2c481'
+down_revision = 'a4d8e2c6f190'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_messages_sender_receiver_sent_at')
+    op.create_index('ix_messages_sender_receiver_sent_at_id', 'messages',
+                    ['sender_id', 'receiver_id', 'sent_at', 'id'], unique=False)
+    op.drop_index('ix_messages_ride_id_sent_at', table_name='messages')
+    op.create_index('ix_messages_ride_id_sent_at_id', 'messages', ['ride_id', 'sent_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_ride_id_sent_at_id', table_name='messages')
+    op.create_index('ix_messages_ride_id_sent_at', 'messages', ['ride_id', 'sent_at'], unique=False)
+    op.drop_index('ix_messages_sender_receiver_sent_at_id', table_name='messages')
+    op.create_index('ix_messages_sender_receiver_sent_at', 'messages',
+                    ['sender_id', 'receiver_id', 'sent_at'], unique=False)
@@ -0,0 +1,31 @@
+"""add message search index
+
+Revision ID: c2e8f4a6d913
+Revises: b9e3f7a2c481
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8f4a6d913'
+down_revision = 'b9e3f7a2c481'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Full-text search is PostgreSQL only; other databases search an in-process index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # On the partitioned table this also builds the index on every partition
+    op.create_index('ix_messages_content_search', 'messages',
+                    [sa.text("to_tsvector('simple', content)")], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_messages_content_search', table_name='messages')
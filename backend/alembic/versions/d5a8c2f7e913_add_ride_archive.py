@@ -0,0 +1,68 @@
+"""add ride archive
+
+Revision ID: d5a8c2f7e913
+Revises: b3f7d9e1c4a6
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c2f7e913'
+down_revision = 'b3f7d9e1c4a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rides_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('start_location', sa.String(), nullable=False),
+        sa.Column('end_location', sa.String(), nullable=False),
+        sa.Column('start_latitude', sa.Float(), nullable=True),
+        sa.Column('start_longitude', sa.Float(), nullable=True),
+        sa.Column('end_latitude', sa.Float(), nullable=True),
+        sa.Column('end_longitude', sa.Float(), nullable=True),
+        sa.Column('distance_km', sa.Float(), nullable=True),
+        sa.Column('estimated_duration', sa.Integer(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('seats_available', sa.Integer(), nullable=False),
+        sa.Column('total_fare', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('main_stops', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('template_id', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_rides_archive_driver_id'), 'rides_archive', ['driver_id'], unique=False)
+    op.create_table(
+        'ride_requests_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rider_id', sa.Integer(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('requested_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('joining_stop', sa.String(length=255), nullable=False),
+        sa.Column('ending_stop', sa.String(length=255), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ride_requests_archive_rider_id'), 'ride_requests_archive', ['rider_id'], unique=False)
+    op.create_index(op.f('ix_ride_requests_archive_ride_id'), 'ride_requests_archive', ['ride_id'], unique=False)
+    op.create_index('ix_rides_status_start_time', 'rides', ['status', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rides_status_start_time', table_name='rides')
+    op.drop_index(op.f('ix_ride_requests_archive_ride_id'), table_name='ride_requests_archive')
+    op.drop_index(op.f('ix_ride_requests_archive_rider_id'), table_name='ride_requests_archive')
+    op.drop_table('ride_requests_archive')
+    op.drop_index(op.f('ix_rides_archive_driver_id'), table_name='rides_archive')
+    op.drop_table('rides_archive')
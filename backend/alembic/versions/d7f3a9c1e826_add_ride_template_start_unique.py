@@ -0,0 +1,38 @@
+"""add unique template occurrence constraint on rides
+
+Revision ID: d7f3a9c1e826
+Revises: c2e8f4a6d913
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f3a9c1e826'
+down_revision = 'c2e8f4a6d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Overlapping generation runs may already have created the same occurrence twice. Keep the
+    # oldest ride attached to its template and detach the others, which may have bookings.
+    op.execute(sa.text("""
+        UPDATE rides SET template_id = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY template_id, start_time ORDER BY id) AS n
+                FROM rides WHERE template_id IS NOT NULL
+            ) numbered
+            WHERE n > 1
+        )
+    """))
+    with op.batch_alter_table('rides') as batch_op:
+        batch_op.create_unique_constraint('uq_rides_template_start_time', ['template_id', 'start_time'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rides') as batch_op:
+        batch_op.drop_constraint('uq_rides_template_start_time', type_='unique')
@@ -0,0 +1,32 @@
+"""store ride_tracks.recorded_at without time zone
+
+Revision ID: e4a1c7b9d352
+Revises: d7f3a9c1e826
+Create Date: 2026-10-19 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a1c7b9d352'
+down_revision = 'd7f3a9c1e826'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The app writes naive Pakistan times, which PostgreSQL read in the session time zone on the
+    # way in; converting back in that same zone restores the values that were sent
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column('ride_tracks', 'recorded_at', type_=sa.DateTime(), existing_nullable=False,
+                    postgresql_using="recorded_at AT TIME ZONE current_setting('TimeZone')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column('ride_tracks', 'recorded_at', type_=sa.DateTime(timezone=True), existing_nullable=False,
+                    postgresql_using="recorded_at AT TIME ZONE current_setting('TimeZone')")
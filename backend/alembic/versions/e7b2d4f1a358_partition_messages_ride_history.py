@@ -0,0 +1,139 @@
+"""partition messages and ride history by month
+
+Revision ID: e7b2d4f1a358
+Revises: d5a8c2f7e913
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2d4f1a358'
+down_revision = 'd5a8c2f7e913'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+# table -> (partition key, column definitions, secondary indexes)
+TABLES = {
+    'messages': ('sent_at', """
+        id integer NOT NULL DEFAULT nextval('messages_id_seq'::regclass),
+        sender_id integer NOT NULL REFERENCES users (id),
+        receiver_id integer NOT NULL REFERENCES users (id),
+        ride_id integer REFERENCES rides (id),
+        content text NOT NULL,
+        sent_at timestamp with time zone NOT NULL DEFAULT now()
+    """, {
+        'ix_messages_id': 'id',
+        'ix_messages_sender_receiver_sent_at': 'sender_id, receiver_id, sent_at',
+        'ix_messages_receiver_sent_at': 'receiver_id, sent_at',
+        'ix_messages_ride_id': 'ride_id',
+    }),
+    'ride_history': ('joined_at', """
+        id integer NOT NULL DEFAULT nextval('ride_history_id_seq'::regclass),
+        user_id integer NOT NULL REFERENCES users (id),
+        ride_id integer NOT NULL REFERENCES rides (id),
+        role varchar NOT NULL,
+        joined_at timestamp with time zone NOT NULL DEFAULT now(),
+        completed_at timestamp without time zone,
+        rating_given integer,
+        rating_received integer,
+        review_given text,
+        review_received text
+    """, {
+        'ix_ride_history_id': 'id',
+        'ix_ride_history_user_id_joined_at': 'user_id, joined_at',
+        'ix_ride_history_ride_id': 'ride_id',
+    }),
+}
+
+
+# Copies of app/db/partitioning.py as of this revision, so later changes there cannot alter it
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(bind, table: str, column: str, first: date, last: date):
+    """Monthly partitions of `table` from `first` through `last`; the table is new, so none exist yet"""
+    month = month_start(first)
+    while month <= month_start(last):
+        lower = f'{month.isoformat()} 00:00:00+00'
+        upper = f'{add_months(month, 1).isoformat()} 00:00:00+00'
+        bind.execute(sa.text(
+            f'CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table} '
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        ))
+        month = add_months(month, 1)
+
+
+def _column_names(columns: str) -> str:
+    return ', '.join(line.split()[0] for line in columns.strip().splitlines())
+
+
+def _rename_existing(table: str, indexes) -> str:
+    old = f'{table}_unpartitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER INDEX IF EXISTS {table}_pkey RENAME TO {old}_pkey')
+    for index in indexes:
+        op.execute(f'ALTER INDEX IF EXISTS {index} RENAME TO {index}_unpartitioned')
+    # The id sequence must outlive the old table
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    return old
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return  # partitioning is PostgreSQL only; other databases keep the plain tables
+
+    this_month = month_start(datetime.now(timezone.utc))
+    for table, (column, columns, indexes) in TABLES.items():
+        old = _rename_existing(table, indexes)
+        op.execute(f'UPDATE {old} SET {column} = now() WHERE {column} IS NULL')
+        op.execute(f'CREATE TABLE {table} ({columns}, PRIMARY KEY (id, {column})) PARTITION BY RANGE ({column})')
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        for index, index_columns in indexes.items():
+            op.execute(f'CREATE INDEX {index} ON {table} ({index_columns})')
+
+        oldest = bind.execute(sa.text(f'SELECT min({column}) FROM {old}')).scalar()
+        first = month_start(oldest.astimezone(timezone.utc)) if oldest else this_month
+        ensure_partitions(bind, table, column, min(first, this_month), add_months(this_month, MONTHS_AHEAD))
+
+        names = _column_names(columns)
+        op.execute(f'INSERT INTO {table} ({names}) SELECT {names} FROM {old}')
+        op.execute(f'DROP TABLE {old}')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table, (column, columns, indexes) in TABLES.items():
+        partitioned = f'{table}_partitioned'
+        op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+        op.execute(f'ALTER INDEX IF EXISTS {table}_pkey RENAME TO {partitioned}_pkey')
+        for index in indexes:
+            op.execute(f'ALTER INDEX IF EXISTS {index} RENAME TO {index}_partitioned')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+        op.execute(f'CREATE TABLE {table} ({columns}, PRIMARY KEY (id))')
+        for index, index_columns in indexes.items():
+            op.execute(f'CREATE INDEX {index} ON {table} ({index_columns})')
+        names = _column_names(columns)
+        op.execute(f'INSERT INTO {table} ({names}) SELECT {names} FROM {partitioned}')
+        # Drops the partitions with it; detached months are separate tables and stay
+        op.execute(f'DROP TABLE {partitioned}')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
@@ -0,0 +1,42 @@
+"""add message read state and unread counters
+
+Revision ID: f1c6a9e3b5d7
+Revises: e7b2d4f1a358
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6a9e3b5d7'
+down_revision = 'e7b2d4f1a358'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('read_at', sa.DateTime(timezone=True), nullable=True))
+    # Messages sent before read receipts existed count as read, so nobody starts with a full badge
+    op.execute('UPDATE messages SET read_at = sent_at')
+    op.create_index(
+        'ix_messages_receiver_sender_unread', 'messages', ['receiver_id', 'sender_id'],
+        unique=False, postgresql_where=sa.text('read_at IS NULL')
+    )
+    op.create_table(
+        'conversation_unreads',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('other_user_id', sa.Integer(), nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['other_user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'other_user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('conversation_unreads')
+    op.drop_index('ix_messages_receiver_sender_unread', table_name='messages')
+    op.drop_column('messages', 'read_at')
@@ -0,0 +1,70 @@
+"""archive rides together with their history, messages and tracks
+
+Revision ID: f8c3a5e1d724
+Revises: e4a1c7b9d352
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8c3a5e1d724'
+down_revision = 'e4a1c7b9d352'
+branch_labels = None
+depends_on = None
+
+# Rows that stay put when their ride moves to rides_archive
+KEPT_TABLES = ('messages', 'ride_history', 'ride_chat_members')
+
+
+def _ride_foreign_keys(table: str):
+    inspector = sa.inspect(op.get_bind())
+    return [fk['name'] for fk in inspector.get_foreign_keys(table)
+            if fk['referred_table'] == 'rides' and fk['constrained_columns'] == ['ride_id']]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ride_tracks_archive',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('ride_id', sa.Integer(), nullable=False),
+        sa.Column('driver_id', sa.Integer(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=False),
+        sa.Column('longitude', sa.Float(), nullable=False),
+        sa.Column('speed', sa.Float(), nullable=True),
+        sa.Column('heading', sa.Float(), nullable=True),
+        sa.Column('accuracy', sa.Float(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ride_tracks_archive_ride_id_recorded_at', 'ride_tracks_archive',
+                    ['ride_id', 'recorded_at'], unique=False)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in KEPT_TABLES:
+        for name in _ride_foreign_keys(table):
+            op.drop_constraint(name, table, type_='foreignkey')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    archived = bind.execute(sa.text('SELECT count(*) FROM ride_tracks_archive')).scalar()
+    orphaned = {table: bind.execute(sa.text(
+        f'SELECT count(*) FROM {table} t WHERE t.ride_id IS NOT NULL '
+        f'AND NOT EXISTS (SELECT 1 FROM rides r WHERE r.id = t.ride_id)'
+    )).scalar() for table in KEPT_TABLES}
+    if archived or any(orphaned.values()):
+        raise RuntimeError(
+            f'Refusing to downgrade: {archived} archived track rows and rows of archived rides '
+            f'({", ".join(f"{table}: {count}" for table, count in orphaned.items())}) would be lost '
+            f'or break the restored foreign keys; move those rides back out of rides_archive first'
+        )
+    if bind.dialect.name == 'postgresql':
+        for table in KEPT_TABLES:
+            op.create_foreign_key(f'{table}_ride_id_fkey', table, 'rides', ['ride_id'], ['id'])
+    op.drop_index('ix_ride_tracks_archive_ride_id_recorded_at', table_name='ride_tracks_archive')
+    op.drop_table('ride_tracks_archive')
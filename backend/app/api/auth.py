@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
@@ -9,6 +9,7 @@ from app.core.security import (
     verify_password, 
     get_password_hash, 
     create_access_token, 
+    run_crypto,
     verify_token,
     generate_otp,
     store_otp,
@@ -25,10 +26,20 @@ security = HTTPBearer()
 
 
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
-    token_data = verify_token(credentials.credentials)
+    batch = request.scope.get("batch")
+    if batch is not None:
+        # Sub-request of POST /api/batch, which already authenticated this token
+        return batch.user
+    return user_for_token(db, credentials.credentials)
+
+
+def user_for_token(db: Session, token: str):
+    """User a bearer token belongs to; raises 401 like get_current_user"""
+    token_data = verify_token(token)
     if isinstance(token_data, str):
         # Old format - just email as string
         user = get_user_by_email(db, email=token_data)
@@ -69,7 +80,8 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
+    access_token = await run_crypto(
+        create_access_token,
         data={"sub": user.email}, 
         expires_delta=access_token_expires
     )
@@ -94,7 +106,8 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     # In production, add password field to User model and verify here
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
+    access_token = await run_crypto(
+        create_access_token,
         data={"sub": user.email}, 
         expires_delta=access_token_expires
     )
@@ -147,7 +160,8 @@ async def verify_otp_endpoint(request: OTPVerify, db: Session = Depends(get_db))
         user = create_user(db, user_data)
         is_new_user = True
     
-    access_token = create_access_token(
+    access_token = await run_crypto(
+        create_access_token,
         data={"sub": user.email, "auth_method": AuthMethod.EMAIL},
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
@@ -204,7 +218,8 @@ async def verify__mobile_otp_endpoint(request: OTPMobileVerify, db: Session = De
         user = create_user(db, user_data)
         is_new_user = True
     
-    access_token = create_access_token(
+    access_token = await run_crypto(
+        create_access_token,
         data={"sub": user.phone, "auth_method": AuthMethod.PHONE},
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
@@ -0,0 +1,147 @@
+"""
+POST /api/batch: several GETs in one round trip (app start-up, tab switches).
+
+The token is verified and the user loaded once for the whole batch. Each
+sub-request then goes through the normal routing (parameter validation,
+response_model, response cache) but takes that user instead of checking the
+Authorization header again, and uses database sessions the batch opens and
+closes. Up to BATCH_CONCURRENCY sub-requests run at once. Each of those lanes
+has its own sessions, because a Session must not serve two requests at the same
+time. Every item reports its own status, so one failing sub-request does not
+fail the others.
+"""
+import asyncio
+import json
+import logging
+import math
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from sqlalchemy.orm import Session
+from starlette.middleware.exceptions import ExceptionMiddleware
+
+from app.api.auth import get_current_user
+from app.core.config import settings
+from app.core.database import ReadRouter, SessionLocal, read_router
+from app.db.models.user import User
+from app.middleware.rate_limit import retry_after
+from app.schema.batch import BatchItem, BatchItemResponse, BatchRequest, BatchResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+BATCH_PATH = "/api/batch"
+
+
+@dataclass
+class BatchLane:
+    """What one chain of sub-requests shares: the batch's user and a primary / read session"""
+    user: User
+    db: Session
+    read_db: Session
+
+    def close(self):
+        self.db.close()
+        self.read_db.close()
+
+
+def _dispatcher(app):
+    """The app's routes and exception handlers, without the HTTP middleware the batch already passed"""
+    dispatcher = getattr(app.state, "batch_dispatcher", None)
+    if dispatcher is None:
+        handlers = {key: handler for key, handler in app.exception_handlers.items() if key not in (500, Exception)}
+        dispatcher = ExceptionMiddleware(AsyncExitStackMiddleware(app.router), handlers=handlers, debug=app.debug)
+        app.state.batch_dispatcher = dispatcher
+    return dispatcher
+
+
+async def _run(request: Request, lane: BatchLane, item: BatchItem) -> BatchItemResponse:
+    url = urlsplit(item.path)
+    if url.scheme or url.netloc or not url.path.startswith("/api/") or url.path.rstrip("/") == BATCH_PATH:
+        return BatchItemResponse(id=item.id, status=400,
+                                 body={"detail": "path must be an /api/ route other than /api/batch"})
+
+    authorization = request.headers.get("authorization", "")
+    if settings.RATE_LIMIT_ENABLED:
+        ip = request.client.host if request.client else None
+        seconds = await retry_after("GET", url.path, ip, authorization)
+        if seconds > 0:
+            return BatchItemResponse(id=item.id, status=429, body={
+                "detail": "Too many requests, please try again later",
+                "retry_after": max(1, math.ceil(seconds)),
+            })
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": item.method,
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": [(b"authorization", authorization.encode("latin-1")), (b"accept", b"application/json")],
+        "app": request.app,
+        "batch": lane,
+    }
+    response = {"status": 500, "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await _dispatcher(request.app)(scope, receive, send)
+    except Exception:
+        logger.exception("Batch sub-request %s failed", url.path)
+        # Leave the lane's sessions usable for the next sub-request
+        lane.db.rollback()
+        lane.read_db.rollback()
+        return BatchItemResponse(id=item.id, status=500, body={"detail": "Internal server error"})
+
+    try:
+        body = json.loads(response["body"]) if response["body"] else None
+    except ValueError:
+        body = response["body"].decode("utf-8", errors="replace")
+    return BatchItemResponse(id=item.id, status=response["status"], body=body)
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(payload: BatchRequest, request: Request, current_user = Depends(get_current_user)):
+    """
+    Run GET sub-requests, e.g. {"requests": [{"id": "profile", "path": "/api/users/profile"},
+    {"id": "rides", "path": "/api/rides/my-rides?view=card"}]}; responses come back in the same order.
+    """
+    if len(payload.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch")
+
+    results = [None] * len(payload.requests)
+    pending = iter(enumerate(payload.requests))
+    read_sessions = await run_in_threadpool(read_router.session_factory, ReadRouter.client_key(request))
+    lanes = [
+        BatchLane(user=current_user, db=SessionLocal(), read_db=read_sessions())
+        for _ in range(min(settings.BATCH_CONCURRENCY, len(payload.requests)))
+    ]
+
+    async def work(lane: BatchLane):
+        for index, item in pending:
+            results[index] = await _run(request, lane, item)
+
+    try:
+        await asyncio.gather(*(work(lane) for lane in lanes))
+    finally:
+        for lane in lanes:
+            lane.close()
+    return {"responses": results}
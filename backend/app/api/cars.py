@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from app.db.models.car import Car
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.cache import cached_response
 from app.api.auth import get_current_user
 from app.db.crud.car import get_user_cars, create_car, update_car, delete_car
 from app.schema.car import CarCreate, CarUpdate, CarResponse
+from app.services.image_storage import image_key
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CarResponse])
 async def get_cars(
+    request: Request,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db)  # cached bodies must not come from a lagging replica
 ):
-    return get_user_cars(db, current_user.id)
+    return await cached_response(
+        request, ("cars", current_user.id), List[CarResponse],
+        lambda: (get_user_cars(db, current_user.id), [])
+    )
 
 
 @router.post("/", response_model=CarResponse)
@@ -36,7 +43,9 @@ async def create_user_car(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User already has a registered car"
         )
-    return create_car(db, car, current_user.id)
+    # Stores base64 uploads (Pillow decode and resize) off the event loop
+    car.photo_url = await run_in_threadpool(image_key, car.photo_url)
+    return await run_in_threadpool(create_car, db, car, current_user.id)
 
 
 @router.put("/{car_id}", response_model=CarResponse)
@@ -46,7 +55,9 @@ async def update_user_car(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    updated_car = update_car(db, car_id, car_update, current_user.id)
+    if car_update.photo_url is not None:
+        car_update.photo_url = await run_in_threadpool(image_key, car_update.photo_url)
+    updated_car = await run_in_threadpool(update_car, db, car_id, car_update, current_user.id)
     if not updated_car:
         raise HTTPException(status_code=404, detail="Car not found")
     return updated_car
@@ -58,14 +69,14 @@ async def delete_user_car(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    if not delete_car(db, car_id, current_user.id):
+    if not await run_in_threadpool(delete_car, db, car_id, current_user.id):
         raise HTTPException(status_code=404, detail="Car not found")
     return {"message": "Car deleted successfully"}
 
 @router.get("/my", response_model=List[CarResponse])
 async def get_my_cars(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get cars belonging to the current user"""
     return get_user_cars(db, current_user.id)
\ No newline at end of file
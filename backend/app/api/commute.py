@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.core.database import get_read_db
+from app.api.auth import get_current_user
+from app.db.crud.commute_match import get_user_commute_matches
+from app.schema.commute_match import CommuteMatchResponse
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[CommuteMatchResponse])
+async def get_commute_matches(
+    day_of_week: Optional[int] = Query(None, ge=0, le=6),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Precomputed ride and recurring-driver suggestions for the user's schedule"""
+    return get_user_commute_matches(db, current_user.id, day_of_week)
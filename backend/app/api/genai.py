@@ -13,7 +13,16 @@ from app.db.models.ride_request import RideRequest
 from app.db.crud.ride_request import create_ride_request
 from datetime import datetime, timezone
 import json
+import logging
 import re
+from typing import Iterator, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from app.core.config import settings
+from app.services.intent_parser import intent_metrics, parse_ride_intent
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -30,13 +39,73 @@ class GenAIChatRequest(BaseModel):
 class GenAIChatResponse(BaseModel):
     reply: str
 
-@router.post("/api/genai-chat", response_model=GenAIChatResponse)
-async def genai_chat(request: GenAIChatRequest, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    user_id = current_user.id
-    user_message = request.message.strip()
-    now = datetime.now(timezone.utc)
+def _llm_prompt(user_message: str) -> str:
+    return f"""
+Extract the following from the user's message as JSON:
+- start_location
+- end_location
+- time (if present)
+User message: \"{user_message}\"
+Return only valid JSON.
+"""
 
-    # Step 1: Check if user is replying with a number to select a ride
+
+def _groq_payload(user_message: str, stream: bool = False) -> dict:
+    return {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": _llm_prompt(user_message)}],
+        "max_tokens": 200,
+        "temperature": 0.2,
+        "stream": stream,
+    }
+
+
+def _groq_headers() -> dict:
+    return {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+
+
+def _parse_llm_json(ai_content: str) -> Tuple[Optional[dict], Optional[str]]:
+    json_match = re.search(r'\{.*\}', ai_content, re.DOTALL)
+    if not json_match:
+        return None, f"Failed to extract JSON from: {ai_content}"
+    try:
+        return json.loads(json_match.group()), None
+    except Exception as e:
+        return None, f"JSON parse error: {str(e)}. Raw: {json_match.group()}"
+
+
+def _llm_extract(user_message: str) -> Tuple[Optional[dict], Optional[str]]:
+    """start_location / end_location / time from the LLM, or an error reply"""
+    groq_response = requests.post(GROQ_URL, headers=_groq_headers(), json=_groq_payload(user_message))
+    print("Groq raw response:", groq_response.status_code, groq_response.text)
+
+    try:
+        ai_content = groq_response.json()["choices"][0]["message"]["content"]
+    except Exception as e:
+        print("Groq extraction error:", e)
+        return None, f"Groq error: {str(e)}. Response: {groq_response.text}"
+    return _parse_llm_json(ai_content)
+
+
+def _llm_stream(user_message: str) -> Iterator[str]:
+    """Content deltas of a streamed Groq completion (OpenAI-style SSE lines)"""
+    with requests.post(GROQ_URL, headers=_groq_headers(), json=_groq_payload(user_message, stream=True),
+                       stream=True, timeout=30) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"Groq error {response.status_code}: {response.text}")
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def _handle_selection(db: Session, user_id: int, user_message: str) -> Optional[str]:
+    """Reply when the user picks one of the offered rides by number; None for a new prompt"""
     if user_id in conversation_state and isinstance(conversation_state[user_id], list):
         ride_options = conversation_state[user_id]
 
@@ -58,93 +127,180 @@ async def genai_chat(request: GenAIChatRequest, db: Session = Depends(get_db), c
                 del conversation_state[user_id]
             else:
                 reply = "Invalid ride selection number."
-            return {"reply": reply}
+            return reply
         else:
             # Non-numeric input — treat it as a new prompt, so reset state
             del conversation_state[user_id]
+    return None
 
-    # Step 2: Treat as a new ride booking prompt
-    prompt = f"""
-Extract the following from the user's message as JSON:
-- start_location
-- end_location
-- time (if present)
-User message: \"{user_message}\"
-Return only valid JSON.
-"""
-    groq_payload = {
-        "model": MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 200,
-        "temperature": 0.2,
-    }
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
-    groq_response = requests.post(GROQ_URL, headers=headers, json=groq_payload)
-    print("Groq raw response:", groq_response.status_code, groq_response.text)
 
-    try:
-        ai_content = groq_response.json()["choices"][0]["message"]["content"]
-        json_match = re.search(r'\{.*\}', ai_content, re.DOTALL)
-        if not json_match:
-            return {"reply": f"Failed to extract JSON from: {ai_content}"}
-        try:
-            extracted = json.loads(json_match.group())
-        except Exception as e:
-            return {"reply": f"JSON parse error: {str(e)}. Raw: {json_match.group()}"}
-    except Exception as e:
-        print("Groq extraction error:", e)
-        return {"reply": f"Groq error: {str(e)}. Response: {groq_response.text}"}
+def _parse_locally(user_message: str) -> Optional[dict]:
+    """Fields from the rule-based parser when it is confident enough, else None (ask the LLM)"""
+    intent = parse_ride_intent(user_message)
+    fast_path = intent is not None and intent.confidence >= settings.GENAI_FAST_PATH_MIN_CONFIDENCE
+    intent_metrics.record(fast_path=fast_path)
+    return intent.as_dict() if fast_path else None
 
-    # Validation
+
+def _missing_fields_reply(user_id: int, extracted: dict) -> Optional[str]:
     start_location = extracted.get("start_location", "").strip()
     end_location = extracted.get("end_location", "").strip()
+    if start_location and end_location:
+        return None
 
-    if not start_location or not end_location:
-        conversation_state[user_id] = {
-            "start_location": start_location,
-            "end_location": end_location,
-            "time": extracted.get("time", "")
-        }
+    conversation_state[user_id] = {
+        "start_location": start_location,
+        "end_location": end_location,
+        "time": extracted.get("time", "")
+    }
 
-        missing = []
-        if not start_location:
-            missing.append("starting location")
-        if not end_location:
-            missing.append("ending location")
+    missing = []
+    if not start_location:
+        missing.append("starting location")
+    if not end_location:
+        missing.append("ending location")
 
-        return {"reply": f"Please enter your {', and '.join(missing)} to continue booking your ride."}
+    return f"Please enter your {', and '.join(missing)} to continue booking your ride."
 
-    # Search for rides
-    query = db.query(Ride).filter(
+
+def _find_rides(db: Session, start_location: str, end_location: str) -> List[Tuple[Ride, Optional[User], Optional[Car]]]:
+    """Up to five upcoming rides with seats, with their drivers and cars in one query"""
+    now = datetime.now(timezone.utc)
+    return db.query(Ride, User, Car).outerjoin(User, User.id == Ride.driver_id).outerjoin(
+        Car, Car.id == Ride.car_id
+    ).filter(
         Ride.start_location.ilike(f"%{start_location}%"),
         Ride.end_location.ilike(f"%{end_location}%"),
         Ride.seats_available > 0,
         Ride.start_time > now
-    )
+    ).limit(5).all()
 
-    rides = query.limit(5).all()
-    if not rides:
-        return {"reply": "Sorry, no rides found for your criteria."}
 
-    # Format ride options
-    options = []
-    for idx, ride in enumerate(rides, 1):
-        driver = db.query(User).filter(User.id == ride.driver_id).first()
-        car = db.query(Car).filter(Car.id == ride.car_id).first()
-        ride_time_str = ride.start_time.strftime("%I:%M %p").lstrip("0")
-        options.append(
-            f"{idx}. Driver: {driver.name if driver else 'Unknown'}, Contact: {driver.phone}, "
-            f"Car: {car.model.upper() + car.make}, Plate: {car.license_plate}, "
-            f"Time: {ride_time_str}, Fare: {ride.total_fare}"
-        )
+def _format_option(idx: int, ride: Ride, driver: Optional[User], car: Optional[Car]) -> str:
+    ride_time_str = ride.start_time.strftime("%I:%M %p").lstrip("0")
+    return (
+        f"{idx}. Driver: {driver.name if driver else 'Unknown'}, Contact: {driver.phone}, "
+        f"Car: {car.model.upper() + car.make}, Plate: {car.license_plate}, "
+        f"Time: {ride_time_str}, Fare: {ride.total_fare}"
+    )
 
-    # Save state for ride selection
-    conversation_state[user_id] = [ride.id for ride in rides]
 
-    reply = (
+def _options_reply(start_location: str, end_location: str, options: List[str]) -> str:
+    return (
         f"I found these rides from {start_location} to {end_location}:\n"
         + "\n".join(options)
         + "\nPlease click on the block of the ride you want to book."
     )
 
-    return {"reply": reply}
+
+NO_RIDES_REPLY = "Sorry, no rides found for your criteria."
+
+
+@router.post("/api/genai-chat", response_model=GenAIChatResponse)
+async def genai_chat(request: GenAIChatRequest, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    user_id = current_user.id
+    user_message = request.message.strip()
+
+    # Step 1: Check if user is replying with a number to select a ride
+    reply = _handle_selection(db, user_id, user_message)
+    if reply is not None:
+        return {"reply": reply}
+
+    # Step 2: Treat as a new ride booking prompt; clear phrasings are parsed locally
+    extracted = _parse_locally(user_message)
+    if extracted is None:
+        extracted, error_reply = _llm_extract(user_message)
+        if error_reply:
+            return {"reply": error_reply}
+
+    # Validation
+    reply = _missing_fields_reply(user_id, extracted)
+    if reply is not None:
+        return {"reply": reply}
+    start_location = extracted["start_location"].strip()
+    end_location = extracted["end_location"].strip()
+
+    # Search for rides
+    rides = _find_rides(db, start_location, end_location)
+    if not rides:
+        return {"reply": NO_RIDES_REPLY}
+
+    # Format ride options
+    options = [_format_option(idx, *row) for idx, row in enumerate(rides, 1)]
+
+    # Save state for ride selection
+    conversation_state[user_id] = [ride.id for ride, _, _ in rides]
+
+    return {"reply": _options_reply(start_location, end_location, options)}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def genai_chat_stream(request: GenAIChatRequest, db: Session = Depends(get_db),
+                            current_user = Depends(get_current_user)):
+    """
+    Same conversation as POST /api/genai-chat, as Server-Sent Events:
+
+    - `intent`: the parsed start_location / end_location / time and whether the parser or the LLM produced it
+    - `llm`: completion text as it streams in (only when the parser was not confident)
+    - `ride`: each ride option as soon as it is formatted
+    - `reply`: the full reply, the same text the non-streaming endpoint returns; always last
+    """
+    user_id = current_user.id
+    user_message = request.message.strip()
+
+    async def events():
+        reply = await run_in_threadpool(_handle_selection, db, user_id, user_message)
+        if reply is not None:
+            yield _sse("reply", {"reply": reply})
+            return
+
+        extracted = _parse_locally(user_message)
+        source = "parser"
+        if extracted is None:
+            source = "llm"
+            content = ""
+            try:
+                async for delta in iterate_in_threadpool(_llm_stream(user_message)):
+                    content += delta
+                    yield _sse("llm", {"delta": delta})
+            except Exception as e:
+                logger.exception("Groq streaming request failed")
+                yield _sse("reply", {"reply": f"Groq error: {str(e)}"})
+                return
+            extracted, error_reply = _parse_llm_json(content)
+            if error_reply:
+                yield _sse("reply", {"reply": error_reply})
+                return
+        yield _sse("intent", {**extracted, "source": source})
+
+        reply = _missing_fields_reply(user_id, extracted)
+        if reply is not None:
+            yield _sse("reply", {"reply": reply})
+            return
+        start_location = extracted["start_location"].strip()
+        end_location = extracted["end_location"].strip()
+
+        rides = await run_in_threadpool(_find_rides, db, start_location, end_location)
+        if not rides:
+            yield _sse("reply", {"reply": NO_RIDES_REPLY})
+            return
+        options = []
+        for idx, (ride, driver, car) in enumerate(rides, 1):
+            options.append(_format_option(idx, ride, driver, car))
+            yield _sse("ride", {"index": idx, "ride_id": ride.id, "text": options[-1]})
+
+        conversation_state[user_id] = [ride.id for ride, _, _ in rides]
+        yield _sse("reply", {"reply": _options_reply(start_location, end_location, options)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/metrics")
+async def genai_metrics(current_user = Depends(get_current_user)):
+    """How many chat messages were parsed locally vs sent to the LLM since the worker started"""
+    return intent_metrics.snapshot()
@@ -0,0 +1,38 @@
+import hashlib
+import tempfile
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.api.auth import get_current_user
+from app.services.image_storage import CHUNK_SIZE, store_image
+from app.schema.image import ImageUploadResponse
+
+router = APIRouter()
+
+
+@router.post("/", response_model=ImageUploadResponse)
+async def upload_image(
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_user)
+):
+    """
+    Upload a profile or car photo.
+
+    The file is read in chunks and hashed on the way in; identical images resolve
+    to the same stored object. Send the returned key (or url) as `photo_url`.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as buffer:
+        while chunk := await file.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.MAX_IMAGE_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="Image is too large")
+            digest.update(chunk)
+            buffer.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty upload")
+        buffer.seek(0)
+        return await run_in_threadpool(store_image, buffer, digest.hexdigest())
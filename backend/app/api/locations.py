@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.models.location import PreferredLocation
 
 from app.core.database import get_db
+from app.core.cache import cached_response
 from app.api.auth import get_current_user
 from app.db.crud.location import get_user_locations, create_location
 from app.schema.location import LocationCreate, LocationResponse
@@ -13,10 +15,14 @@ router = APIRouter()
 
 @router.get("/", response_model=List[LocationResponse])
 async def get_locations(
+    request: Request,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db)  # cached bodies must not come from a lagging replica
 ):
-    return get_user_locations(db, current_user.id)
+    return await cached_response(
+        request, ("locations", current_user.id), List[LocationResponse],
+        lambda: (get_user_locations(db, current_user.id), [])
+    )
 
 
 @router.post("/", response_model=LocationResponse)
@@ -35,4 +41,4 @@ async def create_user_location(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Location with this name or address already exists"
         )
-    return create_location(db, location.dict(), current_user.id)
\ No newline at end of file
+    return await run_in_threadpool(create_location, db, location.dict(), current_user.id)
\ No newline at end of file
@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.models.user import User
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.cache import etag_response
 from app.api.auth import get_current_user
-from app.db.crud.messages import create_message, get_conversation, get_user_conversations
-from app.schema.message import MessageCreate, MessageResponse, ConversationResponse
+from app.db.crud.messages import (
+    create_message,
+    create_ride_message,
+    get_conversation_page,
+    get_ride_chat_members,
+    get_ride_messages_page,
+    get_user_conversations,
+    get_unread_counts,
+    mark_conversation_read,
+    mark_ride_chat_read,
+    search_messages,
+)
+from app.services.live_tracking import tracking_hub
+from app.schema.message import (
+    MessageCreate,
+    RideMessageCreate,
+    MessageResponse,
+    MessagePage,
+    ConversationResponse,
+    UnreadCountResponse,
+    MarkReadResponse,
+)
 
 router = APIRouter()
 
@@ -23,28 +43,114 @@ async def send_message(
 @router.get("/conversations", response_model=List[ConversationResponse])
 async def get_conversations(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return get_user_conversations(db, current_user.id)
 
 
-@router.get("/{user_id}", response_model=List[MessageResponse])
-async def get_conversation_with_user(
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(
+    request: Request,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Inbox badge totals, read from the counter tables on every poll (cheap) so no worker
+    can serve a stale copy; unchanged totals still come back as 304 via the ETag
+    """
+    return etag_response(request, UnreadCountResponse, get_unread_counts(db, current_user.id))
+
+
+@router.get("/search", response_model=MessagePage)
+async def search_my_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(30, ge=1, le=100),
+    before: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Messages containing every word of `q`, from the caller's conversations and ride threads, newest first"""
+    try:
+        return search_messages(db, current_user.id, q, limit, before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _ride_chat_members(db: Session, ride_id: int, user_id: int):
+    members = get_ride_chat_members(db, ride_id)
+    if members is None or user_id not in members:
+        raise HTTPException(status_code=404, detail="Ride not found or unauthorized")
+    return members
+
+
+@router.post("/rides/{ride_id}", response_model=MessageResponse)
+async def send_ride_message(
+    ride_id: int,
+    message: RideMessageCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Group message to the driver and every accepted rider: stored once, counted and pushed to all"""
+    members = _ride_chat_members(db, ride_id, current_user.id)
+    db_message = create_ride_message(db, ride_id, message.content, current_user.id, members)
+    response = MessageResponse.model_validate(db_message)
+    tracking_hub.broadcast(ride_id, {"type": "chat", "message": response.model_dump()})
+    return response
+
+
+@router.get("/rides/{ride_id}/history", response_model=MessagePage)
+async def get_ride_thread_page(
+    ride_id: int,
+    limit: int = Query(30, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Newest `limit` group messages; pass `before` to scroll back or `after` to fetch newer ones"""
+    _ride_chat_members(db, ride_id, current_user.id)
+    try:
+        return get_ride_messages_page(db, ride_id, limit, before, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/rides/{ride_id}/read", response_model=MarkReadResponse)
+async def mark_ride_thread_read(
+    ride_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _ride_chat_members(db, ride_id, current_user.id)
+    return {"ride_id": ride_id, "marked_read": mark_ride_chat_read(db, ride_id, current_user.id)}
+
+
+@router.post("/{user_id}/read", response_model=MarkReadResponse)
+async def mark_read(
     user_id: int,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    target_user = db.query(User).filter(User.id == user_id).first()
-    if not target_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Optionally, you might want to prevent users from checking their own messages
+    """Read receipt: everything `user_id` sent to the current user is now read"""
+    return {"user_id": user_id, "marked_read": mark_conversation_read(db, current_user.id, user_id)}
+
+
+@router.get("/{user_id}/history", response_model=MessagePage)
+async def get_conversation_history(
+    user_id: int,
+    limit: int = Query(30, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Newest `limit` messages with a user; pass `before` to scroll back or `after` to fetch newer ones"""
     if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot get conversation with yourself"
         )
-    return get_conversation(db, current_user.id, user_id)
\ No newline at end of file
+    try:
+        return get_conversation_page(db, current_user.id, user_id, limit, before, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
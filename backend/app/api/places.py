@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+
+from app.api.auth import get_current_user
+from app.services.places import place_service
+from app.schema.place import PlaceResponse
+
+router = APIRouter()
+
+
+@router.get("/autocomplete", response_model=List[PlaceResponse])
+async def autocomplete_places(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    current_user = Depends(get_current_user)
+):
+    """Places whose name has a word starting with each typed word, most popular first"""
+    return place_service.autocomplete(q, limit)
+
+
+@router.get("/geocode", response_model=PlaceResponse)
+async def geocode_place(
+    q: str = Query(..., min_length=1, max_length=200),
+    current_user = Depends(get_current_user)
+):
+    """Best single match for a place name"""
+    place = place_service.geocode(q)
+    if not place:
+        raise HTTPException(status_code=404, detail="Place not found")
+    return place
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.api.auth import get_current_user
+from app.db.models.car import Car
+from app.db.models.schedule import Schedule
+from app.db.crud.ride_template import (
+    create_ride_template,
+    get_driver_templates,
+    update_ride_templates,
+    cancel_ride_templates,
+    generate_ride_instances,
+)
+from app.schema.ride_template import (
+    RideTemplateCreate,
+    RideTemplateUpdate,
+    RideTemplateBulkUpdate,
+    RideTemplateBulkCancel,
+    RideTemplateResponse,
+    RideTemplateBulkResult,
+    RideGenerationResult,
+)
+
+router = APIRouter()
+
+
+@router.post("/", response_model=RideTemplateResponse)
+async def create_template(
+    template: RideTemplateCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not current_user.is_driver:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only drivers can create ride templates"
+        )
+    schedule = db.query(Schedule).filter(
+        Schedule.id == template.schedule_id,
+        Schedule.user_id == current_user.id
+    ).first()
+    if not schedule or schedule.start_time is None:
+        raise HTTPException(status_code=404, detail="Schedule not found or has no start time")
+    car = db.query(Car).filter(Car.id == template.car_id, Car.user_id == current_user.id).first()
+    if not car:
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    db_template = create_ride_template(db, template, current_user.id)
+    await run_in_threadpool(
+        generate_ride_instances, db, settings.RIDE_TEMPLATE_DAYS_AHEAD, driver_id=current_user.id)
+    return db_template
+
+
+@router.get("/", response_model=List[RideTemplateResponse])
+async def get_templates(
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    return get_driver_templates(db, current_user.id)
+
+
+@router.put("/bulk", response_model=RideTemplateBulkResult)
+async def bulk_update_templates(
+    update: RideTemplateBulkUpdate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Edit several templates at once; upcoming active rides pick up the change"""
+    try:
+        templates_updated, rides_updated = await run_in_threadpool(
+            update_ride_templates, db, update.template_ids, update, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"templates_updated": templates_updated, "rides_updated": rides_updated}
+
+
+@router.post("/cancel", response_model=RideTemplateBulkResult)
+async def bulk_cancel_templates(
+    request: RideTemplateBulkCancel,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel templates together with the upcoming rides generated from them"""
+    templates_cancelled, rides_cancelled = await run_in_threadpool(
+        cancel_ride_templates, db, request.template_ids, current_user.id)
+    return {"templates_updated": templates_cancelled, "rides_updated": rides_cancelled}
+
+
+@router.post("/generate", response_model=RideGenerationResult)
+async def generate_rides(
+    days_ahead: int = Query(settings.RIDE_TEMPLATE_DAYS_AHEAD, ge=1, le=30),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return {"rides_created": await run_in_threadpool(
+        generate_ride_instances, db, days_ahead, driver_id=current_user.id)}
+
+
+@router.put("/{template_id}", response_model=RideTemplateBulkResult)
+async def update_template(
+    template_id: int,
+    update: RideTemplateUpdate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        templates_updated, rides_updated = await run_in_threadpool(
+            update_ride_templates, db, [template_id], update, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not templates_updated:
+        raise HTTPException(status_code=404, detail="Template not found or unauthorized")
+    return {"templates_updated": templates_updated, "rides_updated": rides_updated}
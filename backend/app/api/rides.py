@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.cache import cached_response, response_cache
+from app.core.serialization import list_response, projected_response
 from app.api.auth import get_current_user
 from app.db.crud.ride import (
     get_available_rides, 
@@ -34,22 +37,37 @@ from app.schema.ride import (
     RideHistoryUpdateRequest,
     RideHistoryCreate,
     RiderHistoryUpdateRequest,
-    CheckRequestResponse
+    CheckRequestResponse,
+    PickupPlanResponse,
+    RideCard,
+    RideHistoryCard,
+    RideRequestCard,
+    RideView,
 )
+from app.services.pickup_optimizer import plan_pickups
 from app.db.crud.ride_history import create_ride_history_entry, get_user_ride_history_by_id, get_rider_ride_history, get_ride_history_by_id, complete_ride_history, update_received_rating, get_ride_history_by_ride_id
 
 router = APIRouter()
 
 
+def _list_view(view: RideView, full_model, card_model, items):
+    # ?view=card rows only have the card's columns loaded, so they skip response_model validation
+    if view == RideView.CARD:
+        return projected_response(card_model, items)
+    return list_response(full_model, items)
+
+
 @router.get("/", response_model=List[RideResponse])
 async def search_rides(
     limit: int = Query(50, le=100),
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    """`view=card` returns RideCard items: no driver stats, stops or coordinates"""
     try:
-        rides = get_available_rides(db, current_user.id, limit)
-        return rides or []  # Return empty list if no rides found
+        rides = get_available_rides(db, current_user.id, limit, view)
+        return _list_view(view, RideResponse, RideCard, rides or [])  # Return empty list if no rides found
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,63 +81,76 @@ async def create_new_ride(
     db: Session = Depends(get_db)
 ):
     print(ride)
-    return create_ride(db, ride, current_user.id)
+    return await run_in_threadpool(create_ride, db, ride, current_user.id)
 
 
 @router.get("/my-rides", response_model=List[DriverRideResponse])
 async def get_my_rides(
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return get_user_rides(db, current_user.id)
+    return _list_view(view, DriverRideResponse, RideCard, get_user_rides(db, current_user.id, view))
 
 @router.get("/my-started-rides", response_model=List[DriverRideResponse])
 async def get_my_started_rides(
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return get_user_started_rides(db, current_user.id)
+    return _list_view(view, DriverRideResponse, RideCard, get_user_started_rides(db, current_user.id, view))
 
 @router.get("/my-completed-rides", response_model=List[DriverRideResponse])
 async def get_my_rides(
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return get_user_completed_rides(db, current_user.id)
+    return _list_view(view, DriverRideResponse, RideCard, get_user_completed_rides(db, current_user.id, view))
 
 @router.get("/my-requests", response_model=List[RideRequestResponse])
 async def get_my_ride_requests(
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return get_user_ride_requests(db, current_user.id)
+    return _list_view(view, RideRequestResponse, RideRequestCard, get_user_ride_requests(db, current_user.id, view))
 
 @router.get("/history", response_model=List[RideHistoryResponse])
 async def get_ride_history(
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's ride history (both as driver and rider)"""
-    return get_user_ride_history_by_id(db, current_user.id)
+    return _list_view(view, RideHistoryResponse, RideHistoryCard,
+                      get_user_ride_history_by_id(db, current_user.id, view))
 
 @router.get("/driver-requests", response_model=List[RideRequestResponse])
 async def get_driver_ride_requests_endpoint(
+    view: RideView = RideView.FULL,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all ride requests for the driver's rides"""
-    return get_driver_ride_requests(db, current_user.id)
+    return _list_view(view, RideRequestResponse, RideRequestCard,
+                      get_driver_ride_requests(db, current_user.id, view))
 
 
 @router.get("/{ride_id}", response_model=RideResponse)
 async def get_ride_details(
     ride_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_db)  # cached bodies must not come from a lagging replica
 ):
-    ride = get_ride(db, ride_id)
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
-    return ride
+    def build():
+        ride = get_ride(db, ride_id)
+        if not ride:
+            raise HTTPException(status_code=404, detail="Ride not found")
+        # Driver profile, rating and car are embedded in the response
+        return ride, [("user", ride.driver_id), ("cars", ride.driver_id)]
+
+    return await cached_response(request, ("ride", ride_id), RideResponse, build)
 
 
 @router.put("/{ride_id}", response_model=DriverRideResponse)
@@ -129,7 +160,7 @@ async def update_ride_details(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    updated_ride = update_ride(db, ride_id, ride_update, current_user.id)
+    updated_ride = await run_in_threadpool(update_ride, db, ride_id, ride_update, current_user.id)
     if not updated_ride:
         raise HTTPException(status_code=404, detail="Ride not found or unauthorized")
     return updated_ride
@@ -223,7 +254,7 @@ async def request_ride(
 async def check_existing_request(
     ride_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         exists = user_already_requested(db, ride_id, current_user.id)
@@ -247,27 +278,49 @@ async def check_existing_request(
 async def get_ride_join_requests(
     ride_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Verify user is the driver
     ride = get_ride(db, ride_id)
     if not ride or ride.driver_id != current_user.id:
         raise HTTPException(status_code=404, detail="Ride not found or unauthorized")
     
-    return get_ride_requests(db, ride_id)
+    return list_response(RideRequestResponse, get_ride_requests(db, ride_id))
 
 @router.get("/{ride_id}/acceptedrequests", response_model=List[RideRequestResponse])
 async def get_ride_accept_requests(
     ride_id: int,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Verify user is the driver
     ride = get_ride(db, ride_id)
     if not ride or ride.driver_id != current_user.id:
         raise HTTPException(status_code=404, detail="Ride not found or unauthorized")
     
-    return get_ride_accepted_requests(db, ride_id)
+    return list_response(RideRequestResponse, get_ride_accepted_requests(db, ride_id))
+
+
+@router.get("/{ride_id}/pickup-plan", response_model=PickupPlanResponse)
+async def get_pickup_plan(
+    ride_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Order in which the driver should pick up and drop off accepted riders.
+
+    Pickups always come before the same rider's drop-off; `added_detour_km` is the
+    extra distance over driving straight from start to end.
+    """
+    ride = get_ride(db, ride_id)
+    if not ride or ride.driver_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Ride not found or unauthorized")
+
+    plan = plan_pickups(ride, get_ride_accepted_requests(db, ride_id))
+    if plan is None:
+        raise HTTPException(status_code=400, detail="Ride has no coordinates to plan pickups with")
+    return plan
 
 
 @router.put("/requests/{request_id}", response_model=RideRequestResponse)
@@ -286,15 +339,15 @@ async def update_ride_request(
 @router.get("/my-requests", response_model=List[RideRequestResponse])
 async def get_my_ride_requests(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return get_user_ride_requests(db, current_user.id)
+    return list_response(RideRequestResponse, get_user_ride_requests(db, current_user.id))
 
 @router.get("/history/{user_id}/{ride_id}", response_model=RideHistoryResponse)
 async def get_user_ride_history(
     user_id: int,
     ride_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's ride history (both as driver and rider)"""
     return get_rider_ride_history(db, user_id, ride_id)
@@ -302,10 +355,10 @@ async def get_user_ride_history(
 @router.get("/history-ride/{ride_id}", response_model=List[RideHistoryResponse])
 async def get_user_ride_history(
     ride_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's ride history (both as driver and rider)"""
-    return get_ride_history_by_ride_id(db, ride_id)
+    return list_response(RideHistoryResponse, get_ride_history_by_ride_id(db, ride_id))
 
 
 @router.post("/history", response_model=RideHistoryResponse)
@@ -314,7 +367,8 @@ async def create_ride_history(
     db: Session = Depends(get_db)
 ):
     """Create a ride history entry when a ride is completed"""
-    return create_ride_history_entry(db, history_data.user_id, history_data.ride_id, history_data.role)
+    return await run_in_threadpool(
+        create_ride_history_entry, db, history_data.user_id, history_data.ride_id, history_data.role)
 
 @router.put("/history/{history_id}", response_model=RideHistoryResponse)
 async def update_ride_history(
@@ -327,7 +381,8 @@ async def update_ride_history(
     # If rating_received is provided, update it
     updated_history = None
     if update_data.rating_received is not None and update_data.review_received is not None:
-        updated_history = update_received_rating(db, history_id, update_data.rating_received, update_data.review_received)
+        updated_history = await run_in_threadpool(
+            update_received_rating, db, history_id, update_data.rating_received, update_data.review_received)
         if not updated_history:
             raise HTTPException(status_code=404, detail="Ride history not found when updating received rating")
 
@@ -360,4 +415,5 @@ async def update_rider_ride_history(
 
     db.commit()
     db.refresh(db_history)
+    await run_in_threadpool(response_cache.invalidate, "user", db_history.ride.driver_id)  # driver_rating changed
     return db_history
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+
+from app.core.database import SessionLocal
+from app.api.auth import get_current_user, user_for_token
+from app.services.live_tracking import tracking_hub
+from app.services.ride_eta import eta_tracker
+from app.schema.tracking import (
+    MAX_PINGS_PER_BATCH,
+    LocationPingBatch,
+    LocationIngestResult,
+    LiveLocationResponse,
+    RideEtaResponse,
+)
+
+router = APIRouter()
+
+
+async def _member_channel(ride_id: int, user_id: int):
+    channel = await tracking_hub.channel(ride_id)
+    if not channel or not channel.is_member(user_id):
+        raise HTTPException(status_code=404, detail="Ride not found or unauthorized")
+    return channel
+
+
+async def _driver_channel(ride_id: int, user_id: int):
+    channel = await _member_channel(ride_id, user_id)
+    if channel.driver_id != user_id:
+        raise HTTPException(status_code=403, detail="Only the driver can send locations")
+    if not channel.accepts_pings:
+        raise HTTPException(status_code=409, detail="Ride is not in progress")
+    return channel
+
+
+@router.post("/rides/{ride_id}/pings", response_model=LocationIngestResult)
+async def post_location_pings(
+    ride_id: int,
+    batch: LocationPingBatch,
+    current_user = Depends(get_current_user)
+):
+    """Batched driver GPS pings (e.g. sent every few seconds, or queued while offline)"""
+    channel = await _driver_channel(ride_id, current_user.id)
+    accepted = tracking_hub.ingest(channel, [ping.model_dump() for ping in batch.pings])
+    return {"accepted": len(accepted)}
+
+
+@router.get("/rides/{ride_id}/live", response_model=LiveLocationResponse)
+async def get_live_locations(
+    ride_id: int,
+    current_user = Depends(get_current_user)
+):
+    """Latest buffered driver positions, for clients that poll instead of keeping a socket"""
+    channel = await _member_channel(ride_id, current_user.id)
+    return {"ride_id": ride_id, "points": tracking_hub.snapshot(channel)}
+
+
+@router.get("/rides/{ride_id}/eta", response_model=RideEtaResponse)
+async def get_stop_etas(
+    ride_id: int,
+    current_user = Depends(get_current_user)
+):
+    """Estimated arrival at each remaining stop, from the driver's live track"""
+    await _member_channel(ride_id, current_user.id)
+    return {"ride_id": ride_id, "stops": eta_tracker.current(ride_id)}
+
+
+def _socket_user(token: str):
+    """User for a socket's token, or None; blocking (token check and user query)"""
+    db = SessionLocal()
+    try:
+        return user_for_token(db, token)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+
+@router.websocket("/rides/{ride_id}/ws")
+async def ride_location_socket(websocket: WebSocket, ride_id: int, token: str = Query(...)):
+    """
+    Live location socket for a ride.
+
+    Everyone connected (driver and accepted riders) receives a `snapshot` message and then
+    `location` messages, plus `eta` messages when a stop's estimate changes noticeably and
+    `chat` messages for the ride's group thread. The driver sends pings as JSON, either one
+    ping object or `{"pings": [...]}` with at most MAX_PINGS_PER_BATCH pings.
+    """
+    user = await run_in_threadpool(_socket_user, token)
+    channel = await tracking_hub.channel(ride_id) if user else None
+    if not channel or not channel.is_member(user.id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    queue = tracking_hub.subscribe(channel)
+    await websocket.send_json(jsonable_encoder(
+        {"type": "snapshot", "ride_id": ride_id, "points": tracking_hub.snapshot(channel),
+         "etas": eta_tracker.current(ride_id)}
+    ))
+
+    async def forward_updates():
+        while True:
+            await websocket.send_text(await queue.get())
+
+    sender = asyncio.create_task(forward_updates())
+    try:
+        while True:
+            message = await websocket.receive_text()
+            live = await tracking_hub.channel(ride_id) or channel
+            if user.id != live.driver_id or not live.accepts_pings:
+                continue
+            try:
+                data = orjson.loads(message)
+                pings = data.get("pings", [data]) if isinstance(data, dict) else data
+                # Same 1..MAX_PINGS_PER_BATCH limit as the HTTP endpoint
+                pings = [ping.model_dump() for ping in LocationPingBatch(pings=pings).pings]
+            except (orjson.JSONDecodeError, TypeError, ValidationError):
+                await websocket.send_json({"type": "error", "detail":
+                                           f"Invalid location pings (send 1 to {MAX_PINGS_PER_BATCH})"})
+                continue
+            tracking_hub.ingest(live, pings)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        tracking_hub.unsubscribe(channel, queue)
@@ -1,54 +1,52 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.cache import cached_response
 from app.api.auth import get_current_user
 from app.db.crud.user import update_user
 from app.db.crud.schedule import get_user_schedule, create_schedule
+from app.db.crud.ride_history import count_rides_offered, get_driver_rating
 from app.schema.user import UserUpdate, UserResponse, UserPreferences, PublicUserProfile, ProfileResponse, GenderPreference, MusicPreference, ConversationPreference, SmokingPreference
 from app.schema.schedule import ScheduleCreate, ScheduleResponse
-from app.db.models.ride import Ride
 from app.db.models.ride_history import RideHistory
 from app.db.models.user import User
+from app.services.image_storage import image_key
 
 router = APIRouter()
 
 
 @router.get("/preferences/options")
-async def get_preference_options():
+async def get_preference_options(request: Request):
     """
     Get all available preference options for user selection
     """
-    return {
-        "gender_preferences": [option.value for option in GenderPreference],
-        "music_preferences": [option.value for option in MusicPreference],
-        "conversation_preferences": [option.value for option in ConversationPreference],
-        "smoking_preferences": [option.value for option in SmokingPreference]
-    }
+    def build():
+        return {
+            "gender_preferences": [option.value for option in GenderPreference],
+            "music_preferences": [option.value for option in MusicPreference],
+            "conversation_preferences": [option.value for option in ConversationPreference],
+            "smoking_preferences": [option.value for option in SmokingPreference]
+        }, []
+
+    return await cached_response(request, ("preference_options", "all"), dict, build)
 
 
 @router.get("/profile", response_model=ProfileResponse)
-async def get_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_read_db)):
     # Count rides taken (where user is passenger)
     rides_taken = db.query(RideHistory).filter(
         RideHistory.user_id == current_user.id
     ).count()
     
-    # Count rides offered (where user is driver)
-    rides_offered = db.query(Ride).filter(
-        Ride.driver_id == current_user.id
-    ).count()
+    # Count rides offered (where user is driver), archived ones included
+    rides_offered = count_rides_offered(db, current_user.id)
 
-    driver_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_given, 5))
-    ).join(
-        Ride, RideHistory.ride_id == Ride.id
-    ).filter(
-        Ride.driver_id == current_user.id
-    ).scalar() or 0, 1) if rides_offered > 0 else 0
+    driver_rating = get_driver_rating(db, current_user.id) if rides_offered > 0 else 0
 
     rider_rating = round(db.query(
         func.avg(func.coalesce(RideHistory.rating_received, 5))
@@ -87,8 +85,11 @@ async def update_profile(
     if 'preferences' in update_data:
         if isinstance(update_data['preferences'], dict):
             update_data['preferences'] = json.dumps(update_data['preferences'])
+    if 'photo_url' in update_data:
+        # Stores base64 uploads (Pillow decode and resize) off the event loop
+        update_data['photo_url'] = await run_in_threadpool(image_key, update_data['photo_url'])
     
-    updated_user = update_user(db, current_user.id, update_data)
+    updated_user = await run_in_threadpool(update_user, db, current_user.id, update_data)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     return updated_user
@@ -97,7 +98,7 @@ async def update_profile(
 @router.get("/schedule", response_model=List[ScheduleResponse])
 async def get_schedule(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return get_user_schedule(db, current_user.id)
 
@@ -111,7 +112,15 @@ async def create_user_schedule(
     return create_schedule(db, schedule.dict(), current_user.id)
 
 @router.get("/profile/{user_id}", response_model=PublicUserProfile)
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_user_profile(user_id: int, request: Request, db: Session = Depends(get_db)):
+    # Built from the primary: the cached body outlives any replica lag
+    return await cached_response(
+        request, ("profile", user_id), PublicUserProfile,
+        lambda: (_build_public_profile(db, user_id), [("user", user_id)])
+    )
+
+
+def _build_public_profile(db: Session, user_id: int) -> dict:
     user = db.query(User).filter(User.id == user_id).first()
     
     if not user:
@@ -121,9 +130,7 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         RideHistory.user_id == user_id
     ).count()
 
-    rides_offered = db.query(Ride).filter(
-        Ride.driver_id == user_id
-    ).count()
+    rides_offered = count_rides_offered(db, user_id)
 
     rider_rating = round(db.query(
         func.avg(func.coalesce(RideHistory.rating_received, 5))
@@ -131,13 +138,7 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         RideHistory.user_id == user_id
     ).scalar() or 0, 1) if rides_taken > 0 else 0
 
-    driver_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_given, 5))
-    ).join(
-        Ride, RideHistory.ride_id == Ride.id
-    ).filter(
-        Ride.driver_id == user_id
-    ).scalar() or 0, 1) if rides_offered > 0 else 0
+    driver_rating = get_driver_rating(db, user_id) if rides_offered > 0 else 0
 
     return {
         "id": user.id,
@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import redis
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, redis_connection
+
+CacheKey = Tuple[str, Hashable]  # (namespace, id), e.g. ("ride", 12) or ("cars", user_id)
+
+
+class ResponseCache:
+    """
+    Bounded in-process cache of serialized JSON responses.
+
+    Every cached body records the versions of the keys it was built from. CRUD
+    functions call `invalidate()` when they change a row, which bumps that key's
+    version, so stale entries are detected without touching the database.
+
+    Versions are counters in Redis, so a write handled by one worker invalidates
+    the bodies every worker cached, and all workers hand out the same ETag for the
+    same versions. The Redis calls block, so async code reaches them through
+    `run_in_threadpool` (`cached_response` does). While Redis is unreachable they are counted in process memory;
+    entries record which store their versions came from and never match the
+    other, so a worker drops what it cached during an outage once Redis is back.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._boot_id = uuid.uuid4().hex  # ETags from another process's local versions never match
+        self._versions = {}
+        self._namespace_versions = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _redis_keys(key: CacheKey) -> Tuple[str, str]:
+        return f"cache:version:{key[0]}", f"cache:version:{key[0]}:{key[1]}"
+
+    def _versions_of(self, deps: List[CacheKey]) -> Tuple:
+        """("redis" | boot id, ((dep, (namespace version, key version)), ...))"""
+        client = get_redis()
+        if client is not None and not deps:
+            return "redis", ()
+        if client is not None:
+            try:
+                stored = client.mget([name for dep in deps for name in self._redis_keys(dep)])
+                counts = [int(value or 0) for value in stored]
+                return "redis", tuple((dep, (counts[2 * i], counts[2 * i + 1])) for i, dep in enumerate(deps))
+            except redis.RedisError as e:
+                redis_connection.mark_down(e)
+        with self._lock:
+            return self._boot_id, tuple(
+                (dep, (self._namespace_versions.get(dep[0], 0), self._versions.get(dep, 0))) for dep in deps
+            )
+
+    def snapshot(self, deps: List[CacheKey]) -> Tuple:
+        return self._versions_of(deps)
+
+    def _etag(self, versions: Tuple) -> str:
+        digest = hashlib.sha1(repr(versions).encode()).hexdigest()[:20]
+        return f'W/"{digest}"'
+
+    def get(self, key: CacheKey) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) while every dependency is still at its recorded version"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        versions, etag, body, expires_at = entry
+        if expires_at < time.monotonic() or self._versions_of([dep for dep, _ in versions[1]]) != versions:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return etag, body
+
+    def set(self, key: CacheKey, versions: Tuple, body: bytes) -> str:
+        etag = self._etag(versions)
+        with self._lock:
+            self._entries[key] = (versions, etag, body, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, namespace: str, key_id: Hashable = None):
+        """Bump one key, or a whole namespace when key_id is None"""
+        namespace_key, item_key = self._redis_keys((namespace, key_id))
+        client = get_redis()
+        if client is not None:
+            try:
+                client.incr(namespace_key if key_id is None else item_key)
+            except redis.RedisError as e:
+                redis_connection.mark_down(e)
+        # Local counters are bumped too, for the entries this worker built during an outage
+        with self._lock:
+            if key_id is None:
+                self._namespace_versions[namespace] = self._namespace_versions.get(namespace, 0) + 1
+            else:
+                key = (namespace, key_id)
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+_adapters = {}
+
+
+def _adapter(response_type) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in header.split(",")]
+
+
+def _cached_json(body: bytes, etag: str) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+
+async def cached_response(
+    request: Request,
+    key: CacheKey,
+    response_type,
+    build: Callable[[], Tuple[object, List[CacheKey]]],
+) -> Response:
+    """
+    Serve `key` from the response cache, answering If-None-Match with 304.
+
+    `build` runs only on a miss and returns (data, dependency keys). The data is
+    validated against `response_type` once, serialized, and kept for later hits.
+    The version lookups and `build` run in the threadpool, off the event loop.
+    """
+    return await run_in_threadpool(_cached_response, request, key, response_type, build)
+
+
+def _cached_response(request: Request, key: CacheKey, response_type, build) -> Response:
+    cached = response_cache.get(key)
+    if cached is not None:
+        etag, body = cached
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return _cached_json(body, etag)
+
+    # Versions are read before the query so a concurrent write is never hidden. `build` must
+    # read the primary: a lagging replica could return rows older than these versions.
+    source, key_versions = response_cache.snapshot([key])
+    data, deps = build()
+    dep_source, dep_versions = response_cache.snapshot(deps)
+    # Redis failed in between: the two halves are not comparable, so store it as never valid
+    versions = (source if source == dep_source else None, key_versions + dep_versions)
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    etag = response_cache.set(key, versions, body)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return _cached_json(body, etag)
+
+
+def etag_response(request: Request, response_type, data) -> Response:
+    """
+    Serialize `data` without caching it and tag it with a hash of the body, so a
+    poller whose copy is unchanged still gets a 304
+    """
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return _cached_json(body, etag)
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict, Field, PostgresDsn, RedisDsn
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -12,14 +12,27 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # Read replicas, e.g. READ_REPLICA_URLS='["postgresql://...@replica1/commute_io"]'
+    READ_REPLICA_URLS: List[str] = []
+    REPLICA_POOL_SIZE: int = 5
+    REPLICA_MAX_OVERFLOW: int = 10
+    READ_ROUTING_POLICY: str = "round_robin"  # round_robin, random
+    READ_YOUR_WRITES_SECONDS: int = 5  # pin a client to the primary after its own write
     
     # Security
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 300
+    CRYPTO_POOL_SIZE: int = 4  # threads for password hashing and token signing
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # verified tokens remembered per worker; 0 disables
     
     # Redis
     REDIS_URL: str
+    REDIS_TIMEOUT_SECONDS: float = 0.5
+    REDIS_RETRY_SECONDS: float = 30.0  # after a failure, use local fallbacks this long before retrying
     
   # --------------------------
     # Email Configuration
@@ -44,5 +57,84 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
 
+    # Commute matching (precomputed suggestions for rider schedules)
+    COMMUTE_MATCH_INTERVAL_MINUTES: int = 15  # 0 disables the background job
+    COMMUTE_MATCH_TOP_K: int = 5
+    COMMUTE_MATCH_MAX_DISTANCE_KM: float = 3.0
+    COMMUTE_MATCH_TIME_WINDOW_MINUTES: int = 45
+
+    # Recurring ride templates
+    RIDE_TEMPLATE_INTERVAL_MINUTES: int = 60  # 0 disables the background job
+    RIDE_TEMPLATE_DAYS_AHEAD: int = 7
+
+    # In-process response cache (ETag / If-None-Match)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+
+    # Serialize large list responses with orjson and prebuilt serializers, skipping re-validation
+    FAST_SERIALIZATION: bool = False
+
+    # Image storage (profile and car photos)
+    IMAGE_STORE_BACKEND: str = "local"  # local, s3
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media"
+    MEDIA_BASE_URL: str = "http://localhost:8000"
+    MAX_IMAGE_UPLOAD_BYTES: int = 5 * 1024 * 1024
+    S3_BUCKET: Optional[str] = None
+    S3_PUBLIC_URL: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # set for MinIO / R2 / other S3-compatible stores
+    S3_ACCESS_KEY: Optional[str] = None
+    S3_SECRET_KEY: Optional[str] = None
+
+    # Offline road routing (graph compiled with build_road_graph.py); LLM stops are used when missing
+    ROAD_GRAPH_PATH: Optional[str] = "data/karachi_road_graph.npz"
+    ROAD_CIRCUITY_FACTOR: float = 1.35  # road distance / straight-line distance
+    AVERAGE_SPEED_KMH: float = 25.0
+
+    # Place autocomplete / geocoding
+    PLACES_INDEX_REFRESH_MINUTES: int = 30  # 0 disables refreshing saved addresses into the index
+    PLACES_CACHE_MAX_ENTRIES: int = 1024
+    PLACES_MIN_SHARED_SAVES: int = 2  # users who must save an address before others see it
+
+    # Live driver locations for rides in progress
+    TRACKING_BUFFER_SIZE: int = 120  # latest positions kept in memory per ride
+    TRACKING_FLUSH_INTERVAL_SECONDS: float = 2.0  # ride_tracks bulk-write period; 0 disables persistence
+    TRACKING_FLUSH_BATCH_SIZE: int = 1000  # rows per INSERT
+    TRACKING_ACCESS_TTL_SECONDS: int = 30  # how long a ride's driver / riders / status are trusted
+    TRACKING_FANOUT: bool = True  # relay live updates between workers over Redis pub/sub
+    ETA_PUSH_THRESHOLD_MINUTES: float = 1.0  # push stop ETAs only when one moves by at least this much
+
+    # Ride lifecycle: expire / auto-end overdue rides and archive old ones
+    RIDE_LIFECYCLE_INTERVAL_MINUTES: int = 10  # 0 disables the lifecycle job
+    RIDE_EXPIRE_GRACE_MINUTES: int = 30  # active rides this long past their start time expire
+    RIDE_AUTO_END_HOURS: int = 6  # started rides this long past their start time are ended
+    RIDE_ARCHIVE_AFTER_DAYS: int = 30  # finished rides older than this move to rides_archive
+    RIDE_LIFECYCLE_BATCH_SIZE: int = 1000  # rides per UPDATE / archive transaction
+
+    # Monthly partitions of messages / ride_history (PostgreSQL only)
+    PARTITION_MAINTENANCE_INTERVAL_MINUTES: int = 720  # 0 disables creating / detaching partitions
+    PARTITION_MONTHS_AHEAD: int = 3  # future months that always have a partition ready
+    MESSAGES_RETENTION_MONTHS: int = 24  # older message partitions are detached; 0 keeps all
+    RIDE_HISTORY_RETENTION_MONTHS: int = 0  # ratings are computed from history, keep it by default
+    MESSAGE_HISTORY_DAYS: int = 365  # message reads try this recent window first; 0 scans every month at once
+
+    # Token-bucket rate limits (rules in app/middleware/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "redis"  # redis (shared by all workers), memory
+    RATE_LIMIT_OVERRIDES: Dict[str, str] = {}  # e.g. '{"genai:user": "10/60"}' = 10 per 60 seconds
+
+    # GenAI chat: messages the rule-based intent parser scores at least this high skip the LLM
+    GENAI_FAST_PATH_MIN_CONFIDENCE: float = 0.8
+
+    # Idempotency-Key replay for ride requests and message sends
+    IDEMPOTENCY_BACKEND: str = "redis"  # redis (shared by all workers), memory
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600  # how long a stored response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: int = 30  # a key claimed by a request that never finished frees up after this
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # how long a concurrent duplicate waits for the first response
+
+    # Batched GETs (POST /api/batch)
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_CONCURRENCY: int = 4  # sub-requests in flight at once, each with its own sessions
+
 
 settings = Settings()
\ No newline at end of file
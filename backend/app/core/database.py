@@ -1,24 +1,142 @@
+import hashlib
+import itertools
+import random
+import threading
+import time
+from typing import Optional
+
+import redis
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.redis_client import get_redis, redis_connection
+
+
+def _create_engine(url: str, pool_size: int, max_overflow: int):
+    options = dict(
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=settings.ENVIRONMENT == "development"
+    )
+    if not url.startswith("sqlite"):
+        options.update(pool_size=pool_size, max_overflow=max_overflow)
+    return create_engine(url, **options)
+
 
 # Create engine with PostgreSQL-specific configuration
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.ENVIRONMENT == "development"
-)
+engine = _create_engine(settings.DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas (optional); without any, reads go to the primary
+replica_engines = [
+    _create_engine(url, settings.REPLICA_POOL_SIZE, settings.REPLICA_MAX_OVERFLOW)
+    for url in settings.READ_REPLICA_URLS
+]
+ReplicaSessions = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+
 Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request):
+    batch = request.scope.get("batch")
+    if batch is not None:
+        # Sub-request of POST /api/batch: the batch owns (and closes) the session
+        yield batch.db
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class ReadRouter:
+    """
+    Picks the session factory for read-only requests.
+
+    A client that wrote recently (identified by its Authorization header) is pinned
+    to the primary for READ_YOUR_WRITES_SECONDS so it never reads a lagging replica.
+    The marker is a Redis key with that TTL, so a write handled by one worker pins
+    the client's reads on every worker; while Redis is down it is kept per process.
+    Both calls may hit Redis, so async code runs them in a worker thread.
+    """
+
+    def __init__(self, replicas, policy: str, sticky_seconds: int):
+        self.replicas = replicas
+        self.policy = policy
+        self.sticky_seconds = sticky_seconds
+        self._next = itertools.cycle(range(len(replicas))) if replicas else None
+        self._last_write = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def client_key(request: Request) -> Optional[str]:
+        authorization = request.headers.get("authorization")
+        if not authorization:
+            return None
+        return hashlib.sha1(authorization.encode()).hexdigest()
+
+    def mark_write(self, key: Optional[str]):
+        if key is None or not self.replicas:
+            return
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(f"read_your_writes:{key}", 1, px=int(self.sticky_seconds * 1000))
+                return
+            except redis.RedisError as e:
+                redis_connection.mark_down(e)
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[key] = now
+            if len(self._last_write) > 10000:
+                cutoff = now - self.sticky_seconds
+                self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+
+    def _wrote_recently(self, key: str) -> bool:
+        client = get_redis()
+        if client is not None:
+            try:
+                if client.exists(f"read_your_writes:{key}"):
+                    return True
+            except redis.RedisError as e:
+                redis_connection.mark_down(e)
+        # Also covers writes marked locally during a Redis outage
+        written_at = self._last_write.get(key)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def session_factory(self, key: Optional[str]):
+        if not self.replicas:
+            return SessionLocal
+        if key is not None and self._wrote_recently(key):
+            return SessionLocal
+        if self.policy == "random":
+            return random.choice(self.replicas)
+        with self._lock:
+            return self.replicas[next(self._next)]
+
+
+read_router = ReadRouter(
+    ReplicaSessions,
+    policy=settings.READ_ROUTING_POLICY,
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS
+)
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints, routed to a replica when one is configured"""
+    batch = request.scope.get("batch")
+    if batch is not None:
+        yield batch.read_db
+        return
+    db = read_router.session_factory(ReadRouter.client_key(request))()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,62 @@
+"""
+Shared Redis connection (settings.REDIS_URL).
+
+State that has to agree across worker processes (rate limit buckets, cache
+versions, ...) lives in Redis. Callers get the client from `get_redis()`
+and fall back to their in-process behaviour when it returns None: after a
+failed command Redis is skipped for REDIS_RETRY_SECONDS instead of making
+every request wait on a dead server.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisConnection:
+    def __init__(self, url: str, timeout_seconds: float, retry_seconds: float):
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.retry_seconds = retry_seconds
+        self._client: Optional[redis.Redis] = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Optional[redis.Redis]:
+        if time.monotonic() < self._down_until:
+            return None
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = redis.Redis.from_url(
+                        self.url,
+                        socket_connect_timeout=self.timeout_seconds,
+                        socket_timeout=self.timeout_seconds,
+                        decode_responses=True,
+                    )
+        return self._client
+
+    def mark_down(self, error: Exception):
+        """Skip Redis for a while after `error`; callers use their local fallback meanwhile"""
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"Redis unavailable, using local fallbacks for {self.retry_seconds}s: {error}")
+        self._down_until = time.monotonic() + self.retry_seconds
+
+
+redis_connection = RedisConnection(
+    settings.REDIS_URL,
+    timeout_seconds=settings.REDIS_TIMEOUT_SECONDS,
+    retry_seconds=settings.REDIS_RETRY_SECONDS,
+)
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """The shared client, or None while Redis is marked down"""
+    return redis_connection.client
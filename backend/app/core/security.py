@@ -1,14 +1,79 @@
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
+import asyncio
+import functools
+import hashlib
 import random
 import string
+import threading
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt and HMAC release the GIL, so a few threads keep hashing and signing off the event loop
+crypto_pool = ThreadPoolExecutor(max_workers=settings.CRYPTO_POOL_SIZE, thread_name_prefix="crypto")
+
+
+async def run_crypto(func, *args, **kwargs):
+    """Run a hashing / signing call on `crypto_pool` instead of the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(crypto_pool, functools.partial(func, *args, **kwargs))
+
+
+class TokenCache:
+    """
+    Payloads of tokens that already passed signature and expiry checks, keyed by
+    the token's SHA-256. Entries leave at the token's `exp` or when the cache is full
+    (least recently used first).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._payloads: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_entries <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is None:
+                return None
+            if payload["exp"] <= time.time():
+                del self._payloads[key]
+                return None
+            self._payloads.move_to_end(key)
+            return payload
+
+    def put(self, token: str, payload: dict):
+        # Tokens without an expiry would stay valid in here forever
+        if self.max_entries <= 0 or not isinstance(payload.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -29,11 +94,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def _decode(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.put(token, payload)
+    return payload
+
+
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         # Return the entire payload, not just email
-        return payload
+        return _decode(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,6 +114,17 @@ def verify_token(token: str):
         )
 
 
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """`sub` of a valid bearer token in an Authorization header, else None (never raises)"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return _decode(token).get("sub")
+    except JWTError:
+        return None
+
+
 def generate_otp() -> str:
     return ''.join(random.choices(string.digits, k=6))
 
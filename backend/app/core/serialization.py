@@ -0,0 +1,132 @@
+import typing
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Type
+
+import orjson
+from fastapi import Response
+from pydantic import AfterValidator, BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+
+class ORJSONListResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # UTC as "Z", the way pydantic writes it on the response_model path
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def _default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)  # PostgreSQL averages and Numeric columns; the schemas declare float
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError
+
+
+def _nested_model(annotation):
+    """Return (model, is_list) when the annotation is a (list of / optional) pydantic model"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _nested_model(args[0]) if len(args) == 1 else (None, False)
+    if origin in (list, List):
+        model, _ = _nested_model(typing.get_args(annotation)[0])
+        return model, model is not None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+_serializers: Dict[Type[BaseModel], Callable[[Any], dict]] = {}
+_model_defaults: Dict[Type[BaseModel], dict] = {}
+
+
+def fast_serializer(model: Type[BaseModel]) -> Callable[[Any], dict]:
+    """
+    Build (once per model) a function that copies ORM attributes straight into a
+    JSON-ready dict following the model's fields, without running validation.
+
+    Only meant for trusted rows read from our own database.
+    """
+    serializer = _serializers.get(model)
+    if serializer is not None:
+        return serializer
+
+    plan = []
+    for name, field in model.model_fields.items():
+        nested, is_list = _nested_model(field.annotation)
+        # Output conversions declared on the field (e.g. PhotoUrl: stored key -> URL) still apply
+        converters = [meta.func for meta in field.metadata if isinstance(meta, AfterValidator)]
+        plan.append((name, nested, is_list, converters))
+    # JSON columns hold plain dicts, so nested models only need their defaults filled in
+    defaults = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items() if not field.is_required()
+    }
+    computed = [
+        (name, decorator.info.wrapped_property.fget)
+        for name, decorator in model.__pydantic_decorators__.computed_fields.items()
+    ]
+
+    def serialize(obj) -> dict:
+        data = {}
+        for name, nested, is_list, converters in plan:
+            value = getattr(obj, name, None)
+            for convert in converters:
+                value = convert(value)
+            if nested is not None and value is not None:
+                if isinstance(value, str):
+                    value = orjson.loads(value)
+                if isinstance(value, dict):
+                    value = {**_defaults(nested), **value}
+                else:
+                    sub = fast_serializer(nested)
+                    value = [sub(item) for item in value] if is_list else sub(value)
+            data[name] = value
+        for name, getter in computed:
+            data[name] = getter(obj)
+        return data
+
+    _serializers[model] = serialize
+    _model_defaults[model] = defaults
+    return serialize
+
+
+def _defaults(model: Type[BaseModel]) -> dict:
+    if model not in _model_defaults:
+        fast_serializer(model)
+    return _model_defaults[model]
+
+
+def list_response(model: Type[BaseModel], items: List[Any]):
+    """
+    Return `items` for FastAPI's normal response_model path, or, with
+    FAST_SERIALIZATION enabled, an orjson response built by the prebuilt serializer.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return items
+    serialize = fast_serializer(model)
+    return ORJSONListResponse(content=[serialize(item) for item in items])
+
+
+_list_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def projected_response(model: Type[BaseModel], items: List[Any]) -> Response:
+    """
+    Serialize `items` as a list of `model` whatever the route's response_model is,
+    for the compact `?view=` projections (rows with only the model's columns loaded).
+    """
+    if settings.FAST_SERIALIZATION:
+        serialize = fast_serializer(model)
+        return ORJSONListResponse(content=[serialize(item) for item in items])
+    adapter = _list_adapters.get(model)
+    if adapter is None:
+        adapter = _list_adapters[model] = TypeAdapter(List[model])
+    return Response(adapter.dump_json(adapter.validate_python(items, from_attributes=True)),
+                    media_type="application/json")
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.models.car import Car
 from app.schema.car import CarCreate, CarUpdate
+from app.core.cache import response_cache
 
 def get_user_cars(db: Session, user_id: int) -> List[Car]:
     return db.query(Car).filter(Car.user_id == user_id).all()
@@ -11,6 +12,7 @@ def create_car(db: Session, car: CarCreate, user_id: int) -> Car:
     db.add(db_car)
     db.commit()
     db.refresh(db_car)
+    response_cache.invalidate("cars", user_id)
     return db_car
 
 def update_car(db: Session, car_id: int, car_update: CarUpdate, user_id: int) -> Optional[Car]:
@@ -21,6 +23,7 @@ def update_car(db: Session, car_id: int, car_update: CarUpdate, user_id: int) ->
         setattr(db_car, field, value)
     db.commit()
     db.refresh(db_car)
+    response_cache.invalidate("cars", user_id)
     return db_car
 
 def delete_car(db: Session, car_id: int, user_id: int) -> bool:
@@ -29,4 +32,5 @@ def delete_car(db: Session, car_id: int, user_id: int) -> bool:
         return False
     db.delete(db_car)
     db.commit()
+    response_cache.invalidate("cars", user_id)
     return True
\ No newline at end of file
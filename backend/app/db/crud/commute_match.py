@@ -0,0 +1,41 @@
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import insert, text
+from typing import List, Optional
+from app.db.models.commute_match import CommuteMatch
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+COMMUTE_MATCH_LOCK_KEY = 7_201_026
+
+
+def lock_commute_matches(db: Session) -> bool:
+    """
+    Lock the match set until this transaction ends; False if another rebuild holds it.
+    Only PostgreSQL needs this, SQLite already serialises the writes.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"),
+                           {"key": COMMUTE_MATCH_LOCK_KEY}).scalar())
+
+
+def replace_commute_matches(db: Session, rows: List[dict]) -> int:
+    """Swap the whole precomputed match set in one transaction"""
+    db.query(CommuteMatch).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(CommuteMatch), rows)
+    db.commit()
+    return len(rows)
+
+
+def get_user_commute_matches(db: Session, user_id: int, day_of_week: Optional[int] = None) -> List[CommuteMatch]:
+    query = db.query(CommuteMatch).options(
+        joinedload(CommuteMatch.driver),
+        joinedload(CommuteMatch.ride)
+    ).filter(CommuteMatch.rider_id == user_id)
+    if day_of_week is not None:
+        query = query.filter(CommuteMatch.day_of_week == day_of_week)
+    return query.order_by(
+        CommuteMatch.day_of_week,
+        CommuteMatch.leg,
+        CommuteMatch.score.desc()
+    ).all()
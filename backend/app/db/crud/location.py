@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.db.models.location import PreferredLocation
 from sqlalchemy.exc import SQLAlchemyError
+from app.core.cache import response_cache
 
 def get_user_locations(db: Session, user_id: int) -> List[PreferredLocation]:
     return db.query(PreferredLocation).filter(PreferredLocation.user_id == user_id).all()
@@ -13,6 +14,7 @@ def create_location(db: Session, location_data: dict, user_id: int) -> Preferred
         db.add(db_location)
         db.commit()
         db.refresh(db_location)
+        response_cache.invalidate("locations", user_id)
         return db_location
     except SQLAlchemyError as e:
         db.rollback()
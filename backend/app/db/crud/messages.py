@@ -1,38 +1,195 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, distinct
-from typing import List, Dict
-from app.db.models.message import Message
+from sqlalchemy import and_, or_, case, func, distinct, literal_column, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List, Dict, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+import base64
+from app.db.models.message import Message, SEARCH_CONFIG
+from app.db.models.conversation_unread import ConversationUnread
+from app.db.models.ride_chat_member import RideChatMember
+from app.db.models.ride import Ride
+from app.db.models.ride_archive import RideArchive, RideRequestArchive
+from app.db.models.ride_request import RideRequest
 from app.db.models.user import User
 from app.schema.message import MessageCreate
+from app.core.config import settings
+from app.services.message_search import message_search_index, tokenize
+
+
+def _window_start() -> Optional[datetime]:
+    """
+    Start of the MESSAGE_HISTORY_DAYS window that reads try first, so PostgreSQL
+    only scans the recent monthly partitions when those rows are enough; None
+    when the window is off. Older messages are still read when they are needed.
+    """
+    if settings.MESSAGE_HISTORY_DAYS <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=settings.MESSAGE_HISTORY_DAYS)
+
+
+def _dialect(db: Session):
+    return postgresql if db.bind.dialect.name == "postgresql" else sqlite
+
+
+def _increment_unread(db: Session, user_id: int, other_user_id: int, count: int = 1):
+    # One upsert, so two first messages sent at once cannot both try to insert the row
+    stmt = _dialect(db).insert(ConversationUnread).values(
+        user_id=user_id, other_user_id=other_user_id, unread_count=count
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "other_user_id"],
+        set_={"unread_count": ConversationUnread.unread_count + stmt.excluded.unread_count, "updated_at": func.now()}
+    ))
+
 
 def create_message(db: Session, message: MessageCreate, sender_id: int) -> Message:
     db_message = Message(**message.dict(), sender_id=sender_id)
     db.add(db_message)
+    # Counter row is updated in the same transaction as the message
+    _increment_unread(db, message.receiver_id, sender_id)
     db.commit()
     db.refresh(db_message)
+    message_search_index.add(db_message.id, db_message.content)
     return db_message
 
-def get_conversation(db: Session, user1_id: int, user2_id: int) -> List[Message]:
-    return db.query(Message).options(
-        joinedload(Message.sender),
-        joinedload(Message.receiver)
-    ).filter(
-        or_(
-            and_(Message.sender_id == user1_id, Message.receiver_id == user2_id),
-            and_(Message.sender_id == user2_id, Message.receiver_id == user1_id)
-        )
-    ).order_by(Message.sent_at).all()
+
+def mark_conversation_read(db: Session, user_id: int, other_user_id: int) -> int:
+    """Mark everything `other_user_id` sent to `user_id` as read and reset the counter"""
+    now = datetime.now(timezone.utc)
+    marked = db.query(Message).filter(
+        Message.receiver_id == user_id,
+        Message.sender_id == other_user_id,
+        Message.read_at.is_(None)
+    ).update({"read_at": now}, synchronize_session=False)
+    db.query(ConversationUnread).filter(
+        ConversationUnread.user_id == user_id,
+        ConversationUnread.other_user_id == other_user_id
+    ).update({"unread_count": 0}, synchronize_session=False)
+    db.commit()
+    return marked
+
+
+def get_unread_counts(db: Session, user_id: int) -> Dict:
+    """Unread totals from the counter tables; never touches `messages`"""
+    rows = db.query(ConversationUnread.other_user_id, ConversationUnread.unread_count).filter(
+        ConversationUnread.user_id == user_id,
+        ConversationUnread.unread_count > 0
+    ).all()
+    ride_rows = db.query(RideChatMember.ride_id, RideChatMember.unread_count).filter(
+        RideChatMember.user_id == user_id,
+        RideChatMember.unread_count > 0
+    ).all()
+    return {
+        "total": sum(row.unread_count for row in rows) + sum(row.unread_count for row in ride_rows),
+        "conversations": [{"user_id": row.other_user_id, "unread_count": row.unread_count} for row in rows],
+        "rides": [{"ride_id": row.ride_id, "unread_count": row.unread_count} for row in ride_rows],
+    }
+
+
+def get_ride_chat_members(db: Session, ride_id: int) -> Optional[Dict[int, str]]:
+    """
+    user_id -> role for a ride's group thread (driver + accepted riders), also for rides
+    moved to the archive; None if the ride does not exist
+    """
+    request_model = RideRequest
+    ride = db.query(Ride.driver_id).filter(Ride.id == ride_id).first()
+    if ride is None:
+        request_model = RideRequestArchive
+        ride = db.query(RideArchive.driver_id).filter(RideArchive.id == ride_id).first()
+    if ride is None:
+        return None
+    members = {row.rider_id: "rider" for row in db.query(request_model.rider_id).filter(
+        request_model.ride_id == ride_id,
+        request_model.status == "accepted"
+    ).all()}
+    members[ride.driver_id] = "driver"
+    return members
+
+
+def _sync_ride_chat_members(db: Session, ride_id: int, members: Dict[int, str]):
+    """Add members who joined and drop riders no longer accepted; no writes when nothing changed"""
+    existing: Set[int] = {row.user_id for row in db.query(RideChatMember.user_id).filter(
+        RideChatMember.ride_id == ride_id).all()}
+    if existing == members.keys():
+        return
+    joined = members.keys() - existing
+    if joined:
+        # Acceptance and a group message may add the same member at once
+        stmt = _dialect(db).insert(RideChatMember).values([
+            {"ride_id": ride_id, "user_id": user_id, "role": members[user_id], "unread_count": 0}
+            for user_id in joined
+        ])
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["ride_id", "user_id"]))
+    removed = existing - members.keys()
+    if removed:
+        db.query(RideChatMember).filter(
+            RideChatMember.ride_id == ride_id,
+            RideChatMember.user_id.in_(removed)
+        ).delete(synchronize_session=False)
+
+
+def sync_ride_chat_members(db: Session, ride_id: int):
+    """Bring a ride's group thread members in line with its accepted requests (caller commits)"""
+    members = get_ride_chat_members(db, ride_id)
+    if members is not None:
+        _sync_ride_chat_members(db, ride_id, members)
+
+
+def create_ride_message(db: Session, ride_id: int, content: str, sender_id: int,
+                        members: Dict[int, str]) -> Message:
+    """
+    Store a group message once and bump every other member's unread counter
+    with a single UPDATE, in the same transaction. Members are normally added on
+    acceptance; the sync only writes for threads whose membership is behind.
+    """
+    _sync_ride_chat_members(db, ride_id, members)
+    db_message = Message(sender_id=sender_id, receiver_id=None, ride_id=ride_id, content=content)
+    db.add(db_message)
+    db.query(RideChatMember).filter(
+        RideChatMember.ride_id == ride_id,
+        RideChatMember.user_id != sender_id
+    ).update({"unread_count": RideChatMember.unread_count + 1}, synchronize_session=False)
+    db.commit()
+    db.refresh(db_message)
+    message_search_index.add(db_message.id, db_message.content)
+    return db_message
+
+
+def mark_ride_chat_read(db: Session, ride_id: int, user_id: int) -> int:
+    """Reset a member's unread counter for the ride thread; returns how many were unread"""
+    member = db.query(RideChatMember).filter(
+        RideChatMember.ride_id == ride_id,
+        RideChatMember.user_id == user_id
+    ).first()
+    if member is None:
+        return 0
+    marked = member.unread_count
+    member.unread_count = 0
+    member.last_read_at = datetime.now(timezone.utc)
+    db.commit()
+    return marked
 
 def get_user_conversations(db: Session, user_id: int) -> List[Dict]:
     """Get list of conversations with last message and user details"""
     # Use a simpler approach to get conversations
-    # Get all messages involving the user
-    messages = db.query(Message).options(
+    # Get all messages involving the user, the recent window first
+    query = db.query(Message).options(
         joinedload(Message.sender),
         joinedload(Message.receiver)
     ).filter(
-        or_(Message.sender_id == user_id, Message.receiver_id == user_id)
-    ).order_by(Message.sent_at.desc()).all()
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id),
+        Message.receiver_id.isnot(None)  # ride group messages have their own threads
+    )
+    since = _window_start()
+    if since is None:
+        messages = query.order_by(Message.sent_at.desc()).all()
+    else:
+        messages = query.filter(Message.sent_at >= since).order_by(Message.sent_at.desc()).all()
+        # Older partitions only for partners with nothing in the window
+        recent = {msg.receiver_id if msg.sender_id == user_id else msg.sender_id for msg in messages}
+        partner = case((Message.sender_id == user_id, Message.receiver_id), else_=Message.sender_id)
+        messages += query.filter(Message.sent_at < since, partner.notin_(recent)) \
+            .order_by(Message.sent_at.desc()).all()
     
     # Group by conversation partner and get the latest message for each
     conversations_dict = {}
@@ -52,9 +209,169 @@ def get_user_conversations(db: Session, user_id: int) -> List[Dict]:
                 'ride_id': msg.ride_id
             }
     
+    unread = dict(db.query(ConversationUnread.other_user_id, ConversationUnread.unread_count).filter(
+        ConversationUnread.user_id == user_id
+    ).all())
+    for conversation in conversations_dict.values():
+        conversation['unread_count'] = unread.get(conversation['user_id'], 0)
+
     # Convert dictionary values to list
     result = list(conversations_dict.values())
     # Sort by last message time (most recent first)
     result.sort(key=lambda x: x['last_message_time'], reverse=True)
     
-    return result
\ No newline at end of file
+    return result
+
+# ------------------------------------------------------------ cursor pagination
+
+Cursor = Tuple[datetime, int]  # (sent_at, id) of a message
+
+
+def encode_cursor(message: Message) -> str:
+    raw = f"{message.sent_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Raises ValueError for anything that is not a cursor from encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sent_at, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(sent_at), int(message_id)
+    except (UnicodeDecodeError, TypeError, ValueError, base64.binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def _cursors(before: Optional[str], after: Optional[str]) -> Tuple[Optional[Cursor], Optional[Cursor]]:
+    if before and after:
+        raise ValueError("Pass either before or after, not both")
+    return (decode_cursor(before) if before else None,
+            decode_cursor(after) if after else None)
+
+
+def _keyset(query, before: Optional[Cursor], after: Optional[Cursor], limit: int) -> List[Message]:
+    """
+    Up to `limit` + 1 messages next to the cursor, in scan order: newest first, or
+    oldest first when paging forward with `after`. The plain sent_at bound next to
+    the row comparison lets PostgreSQL prune partitions.
+    """
+    key = tuple_(Message.sent_at, Message.id)
+    if after is not None:
+        query = query.filter(Message.sent_at >= after[0], key > after) \
+            .order_by(Message.sent_at, Message.id)
+    else:
+        if before is not None:
+            query = query.filter(Message.sent_at <= before[0], key < before)
+        query = query.order_by(Message.sent_at.desc(), Message.id.desc())
+    return query.limit(limit + 1).all()
+
+
+def _windowed(query, before: Optional[Cursor], after: Optional[Cursor], limit: int) -> List[Message]:
+    """
+    _keyset, reading the MESSAGE_HISTORY_DAYS window first and older partitions only
+    for what is left of the page. Paging forward is already bounded by its cursor.
+    """
+    since = _window_start()
+    if since is None or after is not None or (
+            before is not None and before[0].replace(tzinfo=before[0].tzinfo or timezone.utc) < since):
+        return _keyset(query, before, after, limit)
+    rows = _keyset(query.filter(Message.sent_at >= since), before, None, limit)
+    if len(rows) <= limit:
+        rows += _keyset(query.filter(Message.sent_at < since), before, None, limit - len(rows))
+    return rows
+
+
+def _page(rows: List[Message], before: Optional[Cursor], after: Optional[Cursor],
+          after_cursor: Optional[str], limit: int) -> Dict:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is not None:
+        rows.reverse()  # pages are always newest first
+    return {
+        "messages": rows,
+        "has_more": has_more,
+        # Older page, when scrolling back
+        "before": encode_cursor(rows[-1]) if rows and after is None and has_more else None,
+        # Newest message seen, for polling / catching up
+        "after": encode_cursor(rows[0]) if rows else after_cursor,
+    }
+
+
+def _page_users(db: Session, user_ids) -> List[User]:
+    return db.query(User.id, User.name, User.photo_url).filter(User.id.in_(set(user_ids))).all()
+
+
+def get_conversation_page(db: Session, user_id: int, other_user_id: int, limit: int,
+                          before: Optional[str] = None, after: Optional[str] = None) -> Dict:
+    """
+    One page of a two-user conversation, newest first, with compact rows.
+
+    Each direction is read separately so both use the (sender_id, receiver_id,
+    sent_at, id) index with a LIMIT, and the two short lists are merged here.
+    """
+    before_key, after_key = _cursors(before, after)
+    rows = []
+    for sender_id, receiver_id in ((user_id, other_user_id), (other_user_id, user_id)):
+        query = db.query(Message).filter(
+            Message.sender_id == sender_id,
+            Message.receiver_id == receiver_id
+        )
+        rows += _windowed(query, before_key, after_key, limit)
+    rows.sort(key=lambda m: (m.sent_at, m.id), reverse=after_key is None)
+    page = _page(rows[:limit + 1], before_key, after_key, after, limit)
+    page["users"] = _page_users(db, (user_id, other_user_id))
+    return page
+
+
+def get_ride_messages_page(db: Session, ride_id: int, limit: int,
+                           before: Optional[str] = None, after: Optional[str] = None) -> Dict:
+    """One page of a ride's group thread, newest first, with compact rows"""
+    before_key, after_key = _cursors(before, after)
+    query = db.query(Message).filter(
+        Message.ride_id == ride_id,
+        Message.receiver_id.is_(None)
+    )
+    page = _page(_windowed(query, before_key, after_key, limit), before_key, after_key, after, limit)
+    page["users"] = _page_users(db, [message.sender_id for message in page["messages"]])
+    return page
+
+
+def _visible_to(user_id: int):
+    """Direct messages the user sent or received, and group messages of rides they drive or joined"""
+    rides = select(Ride.id).where(Ride.driver_id == user_id).union(
+        select(RideRequest.ride_id).where(RideRequest.rider_id == user_id, RideRequest.status == "accepted"),
+        select(RideArchive.id).where(RideArchive.driver_id == user_id),
+        select(RideRequestArchive.ride_id).where(RideRequestArchive.rider_id == user_id,
+                                                 RideRequestArchive.status == "accepted")
+    )
+    return or_(
+        Message.sender_id == user_id,
+        Message.receiver_id == user_id,
+        and_(Message.receiver_id.is_(None), Message.ride_id.in_(rides))
+    )
+
+
+def search_messages(db: Session, user_id: int, q: str, limit: int, before: Optional[str] = None) -> Dict:
+    """
+    Messages visible to the user that contain every word of `q`, newest first.
+
+    PostgreSQL matches through the content GIN index; elsewhere the candidates
+    come from the in-process index and are then scoped like on PostgreSQL.
+    """
+    before_key, _ = _cursors(before, None)
+    words = tokenize(q)
+    if not words:
+        return {"messages": [], "users": [], "has_more": False, "before": None, "after": None}
+    query = db.query(Message).filter(_visible_to(user_id))
+    if db.bind.dialect.name == "postgresql":
+        config = literal_column(f"'{SEARCH_CONFIG}'")
+        query = query.filter(func.to_tsvector(config, Message.content).op("@@")(
+            func.plainto_tsquery(config, " ".join(words))))
+    else:
+        query = query.filter(Message.id.in_(message_search_index.search(db, words)))
+    page = _page(_keyset(query, before_key, None, limit), before_key, None, None, limit)
+    page["after"] = None  # results are a snapshot; new matches show up on a new search
+    page["users"] = _page_users(db, [user_id] + [
+        other for message in page["messages"] for other in (message.sender_id, message.receiver_id) if other
+    ])
+    return page
@@ -1,132 +1,159 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, load_only
 from typing import List, Optional
 from datetime import datetime, date
+from app.db.models.car import Car
 from app.db.models.ride import Ride
-from app.db.models.ride_history import RideHistory
-from app.schema.ride import RideCreate, RideUpdate
+from app.db.crud.ride_history import complete_ride_histories, count_rides_offered, get_driver_rating
+from app.db.models.user import User
+from app.db.projections import card_columns
+from app.schema.ride import CarCard, RideCard, RideCreate, RideUpdate, RideView, UserCard
+from app.core.cache import response_cache
+from app.services.road_graph import plan_route
 import pytz, requests, json, re, ast, os
-from sqlalchemy import func
 
-def get_available_rides(db: Session, user_id: int, limit: int = 50) -> List[Ride]:
+def ride_cards(query):
+    """Load only the RideCard columns of the rides, their drivers and cars"""
+    return query.options(
+        load_only(*card_columns(Ride, RideCard)),
+        joinedload(Ride.driver).load_only(*card_columns(User, UserCard)),
+        joinedload(Ride.car).load_only(*card_columns(Car, CarCard)),
+    )
+
+def get_available_rides(db: Session, user_id: int, limit: int = 50, view: RideView = RideView.FULL) -> List[Ride]:
     # Get current Pakistan time
     pakistan_tz = pytz.timezone('Asia/Karachi')
     now_pakistan = datetime.now(pakistan_tz).replace(tzinfo=None)
     
     print(f"Current Pakistan Time: {now_pakistan}")
     
-    rides = db.query(Ride).options(
-        joinedload(Ride.driver),
-        joinedload(Ride.car)
-    ).filter(
+    query = db.query(Ride).filter(
         Ride.driver_id != user_id,
         Ride.status == "active",
         Ride.seats_available > 0,
         Ride.start_time > now_pakistan
+    )
+    if view == RideView.CARD:
+        return ride_cards(query).limit(limit).all()
+
+    rides = query.options(
+        joinedload(Ride.driver),
+        joinedload(Ride.car)
     ).limit(limit).all()
 
     for ride in rides:
         driver = ride.driver
-        rides_offered = db.query(Ride).filter(Ride.driver_id == driver.id).count()
-        driver.driver_rating = round(db.query(
-            func.avg(func.coalesce(RideHistory.rating_given, 5))
-        ).join(
-            Ride, RideHistory.ride_id == Ride.id
-        ).filter(
-            Ride.driver_id == driver.id
-        ).scalar() or 0, 1) if rides_offered > 0 else 0
-
-        driver.ride_offered =  db.query(Ride).filter(
-            Ride.driver_id == driver.id
-        ).count()
+        rides_offered = count_rides_offered(db, driver.id)
+        driver.driver_rating = get_driver_rating(db, driver.id) if rides_offered > 0 else 0
+        driver.ride_offered = rides_offered
     
     return rides
 
-def get_user_rides(db: Session, user_id: int) -> List[Ride]:
+def get_user_rides(db: Session, user_id: int, view: RideView = RideView.FULL) -> List[Ride]:
     today = date.today()
-    return (
-        db.query(Ride)
-        .filter(
-            Ride.driver_id == user_id,
-            Ride.status == 'active',  # adjust to your active flag
-            Ride.start_time >= datetime.combine(today, datetime.min.time()),
-            Ride.start_time <= datetime.combine(today, datetime.max.time())
-        )
-        .all()
+    query = db.query(Ride).filter(
+        Ride.driver_id == user_id,
+        Ride.status == 'active',  # adjust to your active flag
+        Ride.start_time >= datetime.combine(today, datetime.min.time()),
+        Ride.start_time <= datetime.combine(today, datetime.max.time())
     )
+    if view == RideView.CARD:
+        query = ride_cards(query)
+    return query.all()
 
-def get_user_started_rides(db: Session, user_id: int) -> List[Ride]:
+def get_user_started_rides(db: Session, user_id: int, view: RideView = RideView.FULL) -> List[Ride]:
     today = date.today()
-    return (
-        db.query(Ride)
-        .filter(
-            Ride.driver_id == user_id,
-            Ride.status == 'start',  # adjust to your active flag
-            Ride.start_time >= datetime.combine(today, datetime.min.time()),
-            Ride.start_time <= datetime.combine(today, datetime.max.time())
-        )
-        .all()
+    query = db.query(Ride).filter(
+        Ride.driver_id == user_id,
+        Ride.status == 'start',  # adjust to your active flag
+        Ride.start_time >= datetime.combine(today, datetime.min.time()),
+        Ride.start_time <= datetime.combine(today, datetime.max.time())
     )
+    if view == RideView.CARD:
+        query = ride_cards(query)
+    return query.all()
 
-def get_user_completed_rides(db: Session, user_id: int) -> List[Ride]:
+def get_user_completed_rides(db: Session, user_id: int, view: RideView = RideView.FULL) -> List[Ride]:
     today = date.today()
-    return (
-        db.query(Ride)
-        .filter(
-            Ride.driver_id == user_id,
-            Ride.status == 'end',  # adjust to your active flag
-        )
-        .all()
+    query = db.query(Ride).filter(
+        Ride.driver_id == user_id,
+        Ride.status == 'end',  # adjust to your active flag
     )
+    if view == RideView.CARD:
+        query = ride_cards(query)
+    return query.all()
+
+def plan_ride_stops(ride) -> tuple:
+    """
+    Ordered stops (start and end included) plus route distance / duration for a new ride.
+
+    Uses the offline road graph when coordinates are known, otherwise asks the LLM for
+    stops; distance and duration are None unless a road route was found.
+    """
+    route = plan_route(ride.start_latitude, ride.start_longitude, ride.end_latitude, ride.end_longitude)
+    if route is not None:
+        main_stops = [stop for stop in route["stops"]
+                      if stop not in (ride.start_location, ride.end_location)]
+        distance_km, duration = route["distance_km"], route["duration_minutes"]
+    else:
+        main_stops = extract_main_stops(ride.start_location, ride.end_location)
+        distance_km, duration = None, None
+
+    # Complete route: start -> intermediate stops -> end
+    return [ride.start_location] + main_stops + [ride.end_location], distance_km, duration
 
 def create_ride(db: Session, ride: RideCreate, driver_id: int) -> Ride:
-    main_stops = extract_main_stops(ride.start_location, ride.end_location)
-    
-    # Add start and end locations to the stops list
-    if main_stops:
-        # Create complete route: start -> intermediate stops -> end
-        complete_stops = [ride.start_location] + main_stops + [ride.end_location]
-    else:
-        # If no intermediate stops, just start and end
-        complete_stops = [ride.start_location, ride.end_location]
-    
+    complete_stops, distance_km, duration = plan_ride_stops(ride)
     print(f"Complete route stops: {complete_stops}")
+
+    data = ride.dict(exclude={"main_stops"})
+    if distance_km is not None:
+        data["distance_km"] = distance_km
+        data["estimated_duration"] = duration
     db_ride = Ride(
-        **ride.dict(exclude={"main_stops"}),
+        **data,
         driver_id=driver_id,
         main_stops=complete_stops
     )
     db.add(db_ride)
     db.commit()
     db.refresh(db_ride)
+    response_cache.invalidate("user", driver_id)  # rides_offered changed
     return db_ride
 
 def get_ride(db: Session, ride_id: int) -> Optional[Ride]:
     ride =  db.query(Ride).filter(Ride.id == ride_id).first()
+    if not ride:
+        return None
 
     driver = ride.driver
-    rides_offered = db.query(Ride).filter(Ride.driver_id == driver.id).count()
-    driver.driver_rating = round(db.query(
-        func.avg(func.coalesce(RideHistory.rating_given, 5))
-    ).join(
-        Ride, RideHistory.ride_id == Ride.id
-    ).filter(
-        Ride.driver_id == driver.id
-    ).scalar() or 0, 1) if rides_offered > 0 else 0
-
-    driver.ride_offered =  db.query(Ride).filter(
-        Ride.driver_id == driver.id
-    ).count()
+    rides_offered = count_rides_offered(db, driver.id)
+    driver.driver_rating = get_driver_rating(db, driver.id) if rides_offered > 0 else 0
+    driver.ride_offered = rides_offered
 
     return ride
 
+def end_rides(db: Session, ride_ids: List[int]) -> int:
+    """
+    End rides and complete their open ride history, for a driver ending a ride and
+    for the lifecycle job's auto-end alike; the caller commits
+    """
+    count = db.query(Ride).filter(Ride.id.in_(ride_ids), Ride.status != "end") \
+        .update({"status": "end"}, synchronize_session=False)
+    complete_ride_histories(db, ride_ids)
+    return count
+
 def update_ride(db: Session, ride_id: int, ride_update: RideUpdate, driver_id: int) -> Optional[Ride]:
     db_ride = db.query(Ride).filter(Ride.id == ride_id, Ride.driver_id == driver_id).first()
     if not db_ride:
         return None
+    ending = ride_update.status == "end" and db_ride.status != "end"
     for field, value in ride_update.dict(exclude_unset=True).items():
         setattr(db_ride, field, value)
+    if ending:
+        end_rides(db, [ride_id])
     db.commit()
     db.refresh(db_ride)
+    response_cache.invalidate("ride", ride_id)
     return db_ride
 
     
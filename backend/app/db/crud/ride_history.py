@@ -1,24 +1,36 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import func, select
 from typing import List, Optional
 from datetime import datetime
 from app.db.models.ride_history import RideHistory
 from app.db.models.ride import Ride
+from app.db.models.ride_archive import RideArchive
 from app.db.models.user import User
 from app.db.models.car import Car
+from app.core.cache import response_cache
+from app.db.projections import card_columns
+from app.schema.ride import RideHistoryCard, RideSummaryCard, RideView
 import pytz
 
 
-def get_user_ride_history_by_id(db: Session, user_id: int) -> List[RideHistory]:
-    """Get all ride history for a user (both as driver and rider) with related data"""
-    return (db.query(RideHistory)
-            .options(
-                joinedload(RideHistory.user),
-                joinedload(RideHistory.ride).joinedload(Ride.driver),
-                joinedload(RideHistory.ride).joinedload(Ride.car)
-            )
-            .filter(RideHistory.user_id == user_id)
-            .order_by(RideHistory.completed_at.desc())
-            .all())
+def get_user_ride_history_by_id(db: Session, user_id: int, view: RideView = RideView.FULL) -> List[RideHistory]:
+    """Get a user's ride history (both as driver and rider) with related data"""
+    query = db.query(RideHistory).filter(RideHistory.user_id == user_id)
+    if view == RideView.CARD:
+        query = query.options(
+            load_only(*card_columns(RideHistory, RideHistoryCard)),
+            joinedload(RideHistory.current_ride).load_only(*card_columns(Ride, RideSummaryCard)),
+            joinedload(RideHistory.archived_ride).load_only(*card_columns(RideArchive, RideSummaryCard)),
+        )
+    else:
+        query = query.options(
+            joinedload(RideHistory.user),
+            joinedload(RideHistory.current_ride).joinedload(Ride.driver),
+            joinedload(RideHistory.current_ride).joinedload(Ride.car),
+            joinedload(RideHistory.archived_ride).joinedload(RideArchive.driver),
+            joinedload(RideHistory.archived_ride).joinedload(RideArchive.car)
+        )
+    return query.order_by(RideHistory.completed_at.desc()).all()
 
 def get_ride_history_by_id(db: Session, history_id: int) -> List[RideHistory]:
     """Get all ride history for a user (both as driver and rider)"""
@@ -45,8 +57,34 @@ def create_ride_history_entry(db: Session, user_id: int, ride_id: int, role: str
     db.add(db_history)
     db.commit()
     db.refresh(db_history)
+    response_cache.invalidate("user", user_id)  # rides_taken changed
     return db_history
 
+def complete_ride_histories(db: Session, ride_ids: List[int]) -> int:
+    """Set completed_at on the still open history of ended rides; the caller commits"""
+    pakistan_tz = pytz.timezone('Asia/Karachi')
+    now_pakistan = datetime.now(pakistan_tz).replace(tzinfo=None)
+    return db.query(RideHistory).filter(
+        RideHistory.ride_id.in_(ride_ids),
+        RideHistory.completed_at.is_(None)
+    ).update({"completed_at": now_pakistan}, synchronize_session=False)
+
+def count_rides_offered(db: Session, driver_id: int) -> int:
+    """Rides a user has driven, including those moved to rides_archive"""
+    return db.query(Ride).filter(Ride.driver_id == driver_id).count() + \
+        db.query(RideArchive).filter(RideArchive.driver_id == driver_id).count()
+
+def get_driver_rating(db: Session, driver_id: int) -> float:
+    """Average rating riders gave a driver (unrated rides count as 5), over hot and archived rides"""
+    ride_ids = select(Ride.id).where(Ride.driver_id == driver_id).union_all(
+        select(RideArchive.id).where(RideArchive.driver_id == driver_id)
+    )
+    return round(db.query(
+        func.avg(func.coalesce(RideHistory.rating_given, 5))
+    ).filter(
+        RideHistory.ride_id.in_(ride_ids)
+    ).scalar() or 0, 1)
+
 def complete_ride_history(db: Session, history_id: int) -> Optional[RideHistory]:
     """Mark a ride as completed and optionally add rating"""
     db_history = db.query(RideHistory).filter(RideHistory.id == history_id).first()
@@ -71,6 +109,7 @@ def update_received_rating(db: Session, history_id: int, rating: int, review: st
     db_history.review_received = review
     db.commit()
     db.refresh(db_history)
+    response_cache.invalidate("user", db_history.user_id)  # rider_rating changed
     return db_history
 
 def update_rating_given(db: Session, history_id: int, rating: int, review: str) -> Optional[RideHistory]:
@@ -84,4 +123,5 @@ def update_rating_given(db: Session, history_id: int, rating: int, review: str)
     db_history.review_given = review
     db.commit()
     db.refresh(db_history)
+    response_cache.invalidate("user", db_history.ride.driver_id)  # driver_rating changed
     return db_history
\ No newline at end of file
@@ -0,0 +1,104 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from typing import Callable, List, Set, Tuple
+from datetime import datetime, timedelta
+from app.db.crud.ride import end_rides
+from app.db.models.ride import Ride
+from app.db.models.ride_request import RideRequest
+from app.db.models.ride_archive import RideArchive, RideRequestArchive, RideTrackArchive
+from app.db.models.ride_track import RideTrack
+from app.db.models.commute_match import CommuteMatch
+import pytz
+
+# Statuses a ride never leaves; only these are archived
+TERMINAL_STATUSES = ("end", "expired", "cancelled")
+
+RIDE_ARCHIVE_COLUMNS = [column.name for column in Ride.__table__.columns]
+REQUEST_ARCHIVE_COLUMNS = [column.name for column in RideRequest.__table__.columns]
+TRACK_ARCHIVE_COLUMNS = [column.name for column in RideTrack.__table__.columns]
+
+
+def _now_pakistan() -> datetime:
+    pakistan_tz = pytz.timezone('Asia/Karachi')
+    return datetime.now(pakistan_tz).replace(tzinfo=None)
+
+
+def _transition(db: Session, status: str, before: datetime, batch_size: int,
+                apply: Callable[[Session, List[int]], int]) -> int:
+    """Run `apply` on rides in `status` in id batches, one short transaction each"""
+    count = 0
+    while True:
+        ride_ids = [row.id for row in db.query(Ride.id).filter(
+            Ride.status == status,
+            Ride.start_time < before
+        ).order_by(Ride.start_time).limit(batch_size).all()]
+        if not ride_ids:
+            return count
+        count += apply(db, ride_ids)
+        db.commit()
+
+
+def _expire_rides(db: Session, ride_ids: List[int]) -> int:
+    count = db.query(Ride).filter(Ride.id.in_(ride_ids), Ride.status == "active") \
+        .update({"status": "expired"}, synchronize_session=False)
+    # Nobody answered these in time; riders should not keep waiting on them
+    db.query(RideRequest).filter(
+        RideRequest.ride_id.in_(ride_ids),
+        RideRequest.status == "pending"
+    ).update({"status": "expired"}, synchronize_session=False)
+    return count
+
+
+def expire_overdue_rides(db: Session, grace_minutes: int, batch_size: int) -> int:
+    """Active rides whose start time passed more than `grace_minutes` ago become `expired`"""
+    before = _now_pakistan() - timedelta(minutes=grace_minutes)
+    return _transition(db, "active", before, batch_size, _expire_rides)
+
+
+def auto_end_started_rides(db: Session, timeout_hours: int, batch_size: int) -> int:
+    """
+    Rides left in `start` for more than `timeout_hours` after their start time are ended
+    the same way a driver ends one, so their ride history is completed too
+    """
+    before = _now_pakistan() - timedelta(hours=timeout_hours)
+    return _transition(db, "start", before, batch_size, end_rides)
+
+
+def archive_old_rides(db: Session, retention_days: int, batch_size: int) -> Tuple[int, Set[int]]:
+    """
+    Copy finished rides older than `retention_days` (with their requests and tracks)
+    into the archive tables and delete them from the hot tables, one transaction per batch.
+
+    Ride history, messages and chat members stay where they are and keep the ride id;
+    readers find the ride in rides_archive (see RideHistory.ride).
+    """
+    before = _now_pakistan() - timedelta(days=retention_days)
+    count, driver_ids = 0, set()
+    while True:
+        rows = db.query(Ride.id, Ride.driver_id).filter(
+            Ride.status.in_(TERMINAL_STATUSES),
+            Ride.start_time < before
+        ).order_by(Ride.start_time).limit(batch_size).all()
+        if not rows:
+            return count, driver_ids
+        ride_ids = [row.id for row in rows]
+        driver_ids.update(row.driver_id for row in rows)
+        db.execute(insert(RideArchive).from_select(
+            RIDE_ARCHIVE_COLUMNS,
+            select(*[Ride.__table__.c[name] for name in RIDE_ARCHIVE_COLUMNS]).where(Ride.id.in_(ride_ids))
+        ))
+        db.execute(insert(RideRequestArchive).from_select(
+            REQUEST_ARCHIVE_COLUMNS,
+            select(*[RideRequest.__table__.c[name] for name in REQUEST_ARCHIVE_COLUMNS])
+            .where(RideRequest.ride_id.in_(ride_ids))
+        ))
+        db.execute(insert(RideTrackArchive).from_select(
+            TRACK_ARCHIVE_COLUMNS,
+            select(*[RideTrack.__table__.c[name] for name in TRACK_ARCHIVE_COLUMNS])
+            .where(RideTrack.ride_id.in_(ride_ids))
+        ))
+        db.query(CommuteMatch).filter(CommuteMatch.ride_id.in_(ride_ids)).delete(synchronize_session=False)
+        db.query(RideTrack).filter(RideTrack.ride_id.in_(ride_ids)).delete(synchronize_session=False)
+        db.query(RideRequest).filter(RideRequest.ride_id.in_(ride_ids)).delete(synchronize_session=False)
+        count += db.query(Ride).filter(Ride.id.in_(ride_ids)).delete(synchronize_session=False)
+        db.commit()
@@ -1,10 +1,14 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, contains_eager, joinedload, load_only
 from typing import List, Optional
 from sqlalchemy import func
 from datetime import datetime, timedelta
+from app.db.crud.messages import sync_ride_chat_members
 from app.db.models.ride_request import RideRequest
 from app.db.models.ride import Ride
 from app.db.models.ride_history import RideHistory
+from app.db.models.user import User
+from app.db.projections import card_columns
+from app.schema.ride import RideRequestCard, RideSummaryCard, RideView, UserCard
 
 
 def create_ride_request(db: Session, ride_id: int, rider_id: int,
@@ -22,34 +26,46 @@ def get_ride_requests(db: Session, ride_id: int) -> List[RideRequest]:
 def get_ride_accepted_requests(db: Session, ride_id: int) -> List[RideRequest]:
     return db.query(RideRequest).filter(RideRequest.ride_id == ride_id, RideRequest.status == 'accepted').all()
 
-def get_user_ride_requests(db: Session, user_id: int) -> List[RideRequest]:
+def request_cards(query):
+    """Load only the RideRequestCard columns; `query` must already join Ride"""
+    return query.options(
+        load_only(*card_columns(RideRequest, RideRequestCard)),
+        contains_eager(RideRequest.ride).load_only(*card_columns(Ride, RideSummaryCard)),
+        joinedload(RideRequest.rider).load_only(*card_columns(User, UserCard)),
+    )
+
+def get_user_ride_requests(db: Session, user_id: int, view: RideView = RideView.FULL) -> List[RideRequest]:
     current_time = datetime.now()
     print(f"Current Time: {current_time}")
     six_hours_before = current_time - timedelta(hours=6)
     six_hours_after = current_time + timedelta(hours=6)
     
-    return db.query(RideRequest)\
+    query = db.query(RideRequest)\
         .join(Ride, RideRequest.ride_id == Ride.id)\
         .filter(
             RideRequest.rider_id == user_id,
             Ride.start_time >= six_hours_before,
             Ride.start_time <= six_hours_after,
             Ride.status == 'active'
-        )\
-        .all()
+        )
+    if view == RideView.CARD:
+        query = request_cards(query)
+    return query.all()
 
-def get_driver_ride_requests(db: Session, driver_id: int) -> List[RideRequest]:
+def get_driver_ride_requests(db: Session, driver_id: int, view: RideView = RideView.FULL) -> List[RideRequest]:
     """Get all ride requests for rides owned by the driver"""
-    ride_requests = (db.query(RideRequest)
+    query = (db.query(RideRequest)
             .join(Ride, RideRequest.ride_id == Ride.id)
-            .options(
+            .filter(Ride.driver_id == driver_id, Ride.status == 'active')
+            .order_by(RideRequest.requested_at.desc()))
+    if view == RideView.CARD:
+        return request_cards(query).all()
+
+    ride_requests = query.options(
                 joinedload(RideRequest.rider),
                 joinedload(RideRequest.ride).joinedload(Ride.driver),
                 joinedload(RideRequest.ride).joinedload(Ride.car)
-            )
-            .filter(Ride.driver_id == driver_id, Ride.status == 'active')
-            .order_by(RideRequest.requested_at.desc())
-            .all())
+            ).all()
     
     for request in ride_requests:
         # Count rides taken by the rider
@@ -77,7 +93,11 @@ def update_ride_request_status(db: Session, request_id: int, status: str) -> Opt
     db_request = db.query(RideRequest).filter(RideRequest.id == request_id).first()
     if not db_request:
         return None
-    db_request.status = status
+    previous, db_request.status = db_request.status, status
+    if "accepted" in (previous, status) and previous != status:
+        # Join or leave the ride's group thread with the acceptance
+        db.flush()
+        sync_ride_chat_members(db, db_request.ride_id)
     db.commit()
     db.refresh(db_request)
     return db_request
@@ -0,0 +1,204 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from app.db.models.car import Car
+from app.db.models.ride import Ride
+from app.db.models.ride_template import RideTemplate
+from app.db.models.schedule import Schedule
+from app.db.crud.ride import plan_ride_stops
+from app.schema.ride_template import RideTemplateCreate, RideTemplateUpdate
+from app.services.geo_matrix import eta_minutes, ride_stop_points, route_offsets_km
+from app.core.cache import response_cache
+import pytz
+
+# Template fields that are copied onto every generated Ride row
+RIDE_FIELDS = (
+    "driver_id", "car_id", "start_location", "end_location",
+    "start_latitude", "start_longitude", "end_latitude", "end_longitude",
+    "distance_km", "estimated_duration", "seats_available", "total_fare", "main_stops",
+)
+
+# Updating any of these changes the route, so stops, distance and duration are recomputed
+ROUTE_FIELDS = {
+    "start_location", "end_location", "start_latitude", "start_longitude",
+    "end_latitude", "end_longitude", "main_stops",
+}
+
+
+def create_ride_template(db: Session, template: RideTemplateCreate, driver_id: int) -> RideTemplate:
+    data = template.dict(exclude={"main_stops"})
+    main_stops = template.main_stops
+    if not main_stops:
+        # Stops are computed once here instead of on every daily ride
+        main_stops, distance_km, duration = plan_ride_stops(template)
+        if distance_km is not None:
+            data["distance_km"] = distance_km
+            data["estimated_duration"] = duration
+
+    db_template = RideTemplate(
+        **data,
+        driver_id=driver_id,
+        main_stops=main_stops
+    )
+    db.add(db_template)
+    db.commit()
+    db.refresh(db_template)
+    return db_template
+
+
+def get_driver_templates(db: Session, driver_id: int) -> List[RideTemplate]:
+    return db.query(RideTemplate).filter(
+        RideTemplate.driver_id == driver_id,
+        RideTemplate.status == "active"
+    ).all()
+
+
+def _now_pakistan() -> datetime:
+    pakistan_tz = pytz.timezone('Asia/Karachi')
+    return datetime.now(pakistan_tz).replace(tzinfo=None)
+
+
+def _future_instances(db: Session, template_ids: List[int]):
+    return db.query(Ride).filter(
+        Ride.template_id.in_(template_ids),
+        Ride.status == "active",
+        Ride.start_time > _now_pakistan()
+    )
+
+
+def _owned_template_ids(db: Session, template_ids: List[int], driver_id: int) -> List[int]:
+    return [row.id for row in db.query(RideTemplate.id).filter(
+        RideTemplate.id.in_(template_ids),
+        RideTemplate.driver_id == driver_id,
+        RideTemplate.status == "active"
+    ).all()]
+
+
+def _replan_route(template: RideTemplate, stops_given: bool) -> dict:
+    """main_stops, distance_km and estimated_duration for a template whose route was edited"""
+    if stops_given:
+        stops = list(template.main_stops or [])
+        # Stored stops always run from the start to the end location, as plan_ride_stops returns them
+        if not stops or stops[0] != template.start_location:
+            stops.insert(0, template.start_location)
+        if stops[-1] != template.end_location:
+            stops.append(template.end_location)
+        distance_km, duration = None, None
+    else:
+        stops, distance_km, duration = plan_ride_stops(template)
+    if distance_km is None:
+        # No road route: measure along the stops instead
+        template.main_stops = stops
+        points = ride_stop_points(template)
+        if points is not None:
+            distance_km = round(float(route_offsets_km(points)[-1]), 2)
+            duration = int(round(float(eta_minutes(distance_km))))
+    return {"main_stops": stops, "distance_km": distance_km, "estimated_duration": duration}
+
+
+def update_ride_templates(db: Session, template_ids: List[int], update: RideTemplateUpdate,
+                          driver_id: int) -> Tuple[int, int]:
+    """
+    Edit templates and their upcoming, still active rides, with one UPDATE each
+    (one per template when the route changes, since stops and distance differ per template).
+
+    Raises ValueError when `car_id` is not one of the driver's cars.
+    """
+    values = update.dict(exclude_unset=True, exclude={"template_ids"})
+    if not values or not template_ids:
+        return 0, 0
+    if "car_id" in values and not db.query(Car.id).filter(
+            Car.id == values["car_id"], Car.user_id == driver_id).first():
+        raise ValueError("Car not found")
+
+    owned_ids = _owned_template_ids(db, template_ids, driver_id)
+    if not owned_ids:
+        return 0, 0
+
+    if ROUTE_FIELDS.isdisjoint(values):
+        templates_updated = db.query(RideTemplate).filter(RideTemplate.id.in_(owned_ids)) \
+            .update(values, synchronize_session=False)
+        rides_updated = _future_instances(db, owned_ids).update(values, synchronize_session=False)
+    else:
+        templates_updated = rides_updated = 0
+        for template in db.query(RideTemplate).filter(RideTemplate.id.in_(owned_ids)).all():
+            for field, value in values.items():
+                setattr(template, field, value)
+            route = _replan_route(template, "main_stops" in values)
+            for field, value in route.items():
+                setattr(template, field, value)
+            templates_updated += 1
+            rides_updated += _future_instances(db, [template.id]) \
+                .update({**values, **route}, synchronize_session=False)
+    db.commit()
+    response_cache.invalidate("ride")
+    return templates_updated, rides_updated
+
+
+def cancel_ride_templates(db: Session, template_ids: List[int], driver_id: int) -> Tuple[int, int]:
+    """Cancel templates and every upcoming ride generated from them"""
+    owned_ids = _owned_template_ids(db, template_ids, driver_id)
+    if not owned_ids:
+        return 0, 0
+
+    templates_cancelled = db.query(RideTemplate).filter(RideTemplate.id.in_(owned_ids)) \
+        .update({"status": "cancelled"}, synchronize_session=False)
+    rides_cancelled = _future_instances(db, owned_ids) \
+        .update({"status": "cancelled"}, synchronize_session=False)
+    db.commit()
+    response_cache.invalidate("ride")
+    return templates_cancelled, rides_cancelled
+
+
+def generate_ride_instances(db: Session, days_ahead: int, driver_id: Optional[int] = None) -> int:
+    """
+    Expand active templates into concrete Ride rows for the next `days_ahead` days.
+
+    Rides that already exist for a (template, start_time) pair are skipped, and all
+    new rows go to the database in a single bulk INSERT.
+    """
+    now = _now_pakistan()
+    query = db.query(RideTemplate, Schedule).join(
+        Schedule, RideTemplate.schedule_id == Schedule.id
+    ).filter(
+        RideTemplate.status == "active",
+        Schedule.start_time.isnot(None)
+    )
+    if driver_id is not None:
+        query = query.filter(RideTemplate.driver_id == driver_id)
+    templates = query.all()
+    if not templates:
+        return 0
+
+    window_end = now + timedelta(days=days_ahead)
+    existing = set(db.query(Ride.template_id, Ride.start_time).filter(
+        Ride.template_id.in_([template.id for template, _ in templates]),
+        Ride.start_time > now,
+        Ride.start_time <= window_end
+    ).all())
+
+    rows = []
+    for offset in range(days_ahead + 1):
+        day = (now + timedelta(days=offset)).date()
+        for template, schedule in templates:
+            if day.weekday() != schedule.day_of_week:
+                continue
+            start_time = datetime.combine(day, schedule.start_time)
+            if start_time <= now or start_time > window_end or (template.id, start_time) in existing:
+                continue
+            row = {field: getattr(template, field) for field in RIDE_FIELDS}
+            row.update(template_id=template.id, start_time=start_time, status="active")
+            rows.append(row)
+
+    if not rows:
+        return 0
+    # Another worker's generation run may insert the same (template, start_time) meanwhile;
+    # uq_rides_template_start_time makes the second insert a no-op instead of a duplicate ride
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(Ride).on_conflict_do_nothing(index_elements=["template_id", "start_time"])
+    created = db.execute(stmt.returning(Ride.driver_id), rows).scalars().all()
+    db.commit()
+    for owner_id in set(created):
+        response_cache.invalidate("user", owner_id)  # rides_offered changed
+    return len(created)
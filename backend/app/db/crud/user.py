@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from app.db.models.user import User
 from app.schema.user import UserCreate, UserUpdate
+from app.core.cache import response_cache
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
@@ -45,4 +46,5 @@ def update_user(db: Session, user_id: int, update_data: dict) -> Optional[User]:
     
     db.commit()
     db.refresh(db_user)
+    response_cache.invalidate("user", user_id)
     return db_user
\ No newline at end of file
@@ -7,6 +7,12 @@ from .message import Message
 from .location import PreferredLocation
 from .schedule import Schedule
 from .ride_history import RideHistory
+from .commute_match import CommuteMatch
+from .ride_template import RideTemplate
+from .ride_track import RideTrack
+from .ride_archive import RideArchive, RideRequestArchive, RideTrackArchive
+from .conversation_unread import ConversationUnread
+from .ride_chat_member import RideChatMember
 
 __all__ = [
     "Base",
@@ -17,5 +23,13 @@ __all__ = [
     "Message",
     "PreferredLocation",
     "Schedule",
-    "RideHistory"
+    "RideHistory",
+    "CommuteMatch",
+    "RideTemplate",
+    "RideTrack",
+    "RideArchive",
+    "RideRequestArchive",
+    "RideTrackArchive",
+    "ConversationUnread",
+    "RideChatMember"
 ]
\ No newline at end of file
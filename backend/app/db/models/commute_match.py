@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CommuteMatch(Base):
+    __tablename__ = "commute_matches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rider_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=False)
+    day_of_week = Column(Integer, nullable=False)  # 0=Monday, 6=Sunday
+    leg = Column(String, nullable=False)  # outbound (home -> office), return (office -> home)
+    match_type = Column(String, nullable=False)  # ride, recurring_driver
+    ride_id = Column(Integer, ForeignKey("rides.id"), nullable=True)
+    driver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    driver_schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=True)
+    score = Column(Float, nullable=False)  # 0-1, higher is a better fit
+    pickup_distance_km = Column(Float, nullable=False)
+    dropoff_distance_km = Column(Float, nullable=False)
+    time_offset_minutes = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    rider = relationship("User", foreign_keys=[rider_id])
+    driver = relationship("User", foreign_keys=[driver_id])
+    ride = relationship("Ride")
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ConversationUnread(Base):
+    """Unread messages per (reader, conversation partner), kept up to date on send / mark-read"""
+    __tablename__ = "conversation_unreads"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)  # reader
+    other_user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)  # sender
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,19 +1,42 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from datetime import datetime, timezone
+from sqlalchemy.sql import func, literal_column, text
 from app.core.database import Base
 
+# Text search configuration of the content index; queries must use the same one to hit it
+SEARCH_CONFIG = "simple"
+
+
 class Message(Base):
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    ride_id = Column(Integer, ForeignKey("rides.id"), nullable=True)
+    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # None for ride group messages
+    ride_id = Column(Integer, nullable=True)  # no foreign key, the ride may be in rides_archive
     content = Column(Text, nullable=False)
-    sent_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key on PostgreSQL (one partition per month, see app/db/partitioning.py)
+    # Set in Python too, so every row carries microseconds and (sent_at, id) cursors compare exactly
+    sent_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                     server_default=func.now(), nullable=False)
+    read_at = Column(DateTime(timezone=True), nullable=True)  # set when the receiver opens the chat
 
     # Relationships
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_messages")
-    ride = relationship("Ride", back_populates="messages")
\ No newline at end of file
+    ride = relationship("Ride", primaryjoin="foreign(Message.ride_id) == Ride.id", back_populates="messages")
+
+    __table_args__ = (
+        # Keyset pagination over (sent_at, id) per conversation direction / ride thread
+        Index("ix_messages_sender_receiver_sent_at_id", "sender_id", "receiver_id", "sent_at", "id"),
+        Index("ix_messages_receiver_sent_at", "receiver_id", "sent_at"),
+        Index("ix_messages_ride_id_sent_at_id", "ride_id", "sent_at", "id"),
+        # Only unread rows, for mark-read
+        Index("ix_messages_receiver_sender_unread", "receiver_id", "sender_id",
+              postgresql_where=text("read_at IS NULL"), sqlite_where=text("read_at IS NULL")),
+        # Keyword search (PostgreSQL); other databases use app/services/message_search.py
+        Index("ix_messages_content_search",
+              func.to_tsvector(literal_column(f"'{SEARCH_CONFIG}'"), content),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB  # if using Postgres
@@ -21,11 +21,20 @@ class Ride(Base):
     start_time = Column(DateTime, nullable=False)
     seats_available = Column(Integer, nullable=False)
     total_fare = Column(Float, nullable=True)        # Added as used in CRUD
-    status = Column(String, nullable=False, default="active")  # pending, confirmed, in_progress, completed, cancelled
+    status = Column(String, nullable=False, default="active")  # active, start, end, expired, cancelled
     main_stops = Column(JSONB, nullable=True)
+    template_id = Column(Integer, ForeignKey("ride_templates.id"), nullable=True, index=True)
 
     # Relationships
     driver = relationship("User", foreign_keys=[driver_id], back_populates="driver_rides")
     car = relationship("Car", back_populates="rides")
     ride_requests = relationship("RideRequest", back_populates="ride")
-    messages = relationship("Message", back_populates="ride")
\ No newline at end of file
+    messages = relationship("Message", primaryjoin="Ride.id == foreign(Message.ride_id)", back_populates="ride")
+    template = relationship("RideTemplate", back_populates="rides")
+
+    __table_args__ = (
+        # Search and the lifecycle scheduler both filter on status + start_time
+        Index("ix_rides_status_start_time", "status", "start_time"),
+        # One ride per template occurrence, however many generation runs overlap
+        UniqueConstraint("template_id", "start_time", name="uq_rides_template_start_time"),
+    )
\ No newline at end of file
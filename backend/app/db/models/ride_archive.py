@@ -0,0 +1,69 @@
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Text, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB  # if using Postgres
+from app.core.database import Base
+
+# Cold copies of finished rides moved out of the hot `rides` / `ride_requests` tables by the
+# lifecycle scheduler. Same columns, no foreign keys, so archived rows never block user deletes.
+# Ride history, messages and chat members keep pointing at an archived ride's id.
+
+class RideArchive(Base):
+    __tablename__ = "rides_archive"
+
+    id = Column(Integer, primary_key=True)
+    driver_id = Column(Integer, nullable=False, index=True)
+    car_id = Column(Integer, nullable=False)
+    start_location = Column(String, nullable=False)
+    end_location = Column(String, nullable=False)
+    start_latitude = Column(Float, nullable=True)
+    start_longitude = Column(Float, nullable=True)
+    end_latitude = Column(Float, nullable=True)
+    end_longitude = Column(Float, nullable=True)
+    distance_km = Column(Float, nullable=True)
+    estimated_duration = Column(Integer, nullable=True)
+    start_time = Column(DateTime, nullable=False)
+    seats_available = Column(Integer, nullable=False)
+    total_fare = Column(Float, nullable=True)
+    status = Column(String, nullable=False)
+    main_stops = Column(JSONB, nullable=True)
+    template_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Read-only, for ride history of archived rides
+    driver = relationship("User", primaryjoin="foreign(RideArchive.driver_id) == User.id", viewonly=True)
+    car = relationship("Car", primaryjoin="foreign(RideArchive.car_id) == Car.id", viewonly=True)
+
+
+class RideRequestArchive(Base):
+    __tablename__ = "ride_requests_archive"
+
+    id = Column(Integer, primary_key=True)
+    rider_id = Column(Integer, nullable=False, index=True)
+    ride_id = Column(Integer, nullable=False, index=True)
+    status = Column(String, nullable=False)
+    requested_at = Column(DateTime(timezone=True), nullable=True)
+    message = Column(Text, nullable=True)
+    joining_stop = Column(String(255), nullable=False)
+    ending_stop = Column(String(255), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RideTrackArchive(Base):
+    __tablename__ = "ride_tracks_archive"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    ride_id = Column(Integer, nullable=False)
+    driver_id = Column(Integer, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed = Column(Float, nullable=True)
+    heading = Column(Float, nullable=True)
+    accuracy = Column(Float, nullable=True)
+    recorded_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_ride_tracks_archive_ride_id_recorded_at", "ride_id", "recorded_at"),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class RideChatMember(Base):
+    """
+    Membership and read state of a ride's group thread: the driver plus accepted riders.
+    Rows follow ride requests being accepted or withdrawn, and stay when the ride is archived.
+    """
+    __tablename__ = "ride_chat_members"
+
+    ride_id = Column(Integer, primary_key=True)  # no foreign key, the ride may be in rides_archive
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    role = Column(String, nullable=False)  # driver, rider
+    unread_count = Column(Integer, nullable=False, default=0)
+    last_read_at = Column(DateTime(timezone=True), nullable=True)
+    joined_at = Column(DateTime(timezone=True), server_default=func.now())
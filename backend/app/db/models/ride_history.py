@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Time, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -8,9 +8,11 @@ class RideHistory(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    ride_id = Column(Integer, ForeignKey("rides.id"), nullable=False)
+    # No foreign key: old rides move to rides_archive and their history stays here
+    ride_id = Column(Integer, nullable=False)
     role = Column(String, nullable=False)  # driver, rider
-    joined_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key on PostgreSQL (one partition per month, see app/db/partitioning.py)
+    joined_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
     rating_given = Column(Integer, nullable=True)  # 1-5 stars
     rating_received = Column(Integer, nullable=True)  # 1-5 stars
@@ -19,4 +21,16 @@ class RideHistory(Base):
 
     # Relationships
     user = relationship("User", back_populates="ride_history")
-    ride = relationship("Ride")
\ No newline at end of file
+    current_ride = relationship("Ride", primaryjoin="foreign(RideHistory.ride_id) == Ride.id")
+    archived_ride = relationship("RideArchive", primaryjoin="foreign(RideHistory.ride_id) == RideArchive.id",
+                                 viewonly=True)
+
+    @property
+    def ride(self):
+        """The ride, from `rides` or, once the lifecycle job moved it, from `rides_archive`"""
+        return self.current_ride or self.archived_ride
+
+    __table_args__ = (
+        Index("ix_ride_history_user_id_joined_at", "user_id", "joined_at"),
+        Index("ix_ride_history_ride_id", "ride_id"),
+    )
\ No newline at end of file
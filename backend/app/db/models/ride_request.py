@@ -9,7 +9,7 @@ class RideRequest(Base):
     id = Column(Integer, primary_key=True, index=True)
     rider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     ride_id = Column(Integer, ForeignKey("rides.id"), nullable=False)
-    status = Column(String, nullable=False, default="pending")  # pending, accepted, rejected
+    status = Column(String, nullable=False, default="pending")  # pending, accepted, rejected, expired
     requested_at = Column(DateTime(timezone=True), server_default=func.now())
     message = Column(Text, nullable=True)
     joining_stop = Column(String(255), nullable=False)  # New field
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class RideTemplate(Base):
+    __tablename__ = "ride_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    driver_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    car_id = Column(Integer, ForeignKey("cars.id"), nullable=False)
+    schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=False)  # day_of_week + start_time
+    start_location = Column(String, nullable=False)
+    end_location = Column(String, nullable=False)
+    start_latitude = Column(Float, nullable=True)
+    start_longitude = Column(Float, nullable=True)
+    end_latitude = Column(Float, nullable=True)
+    end_longitude = Column(Float, nullable=True)
+    distance_km = Column(Float, nullable=True)
+    estimated_duration = Column(Integer, nullable=True)
+    seats_available = Column(Integer, nullable=False)
+    total_fare = Column(Float, nullable=True)
+    main_stops = Column(JSONB, nullable=True)  # computed once, copied into every instance
+    status = Column(String, nullable=False, default="active")  # active, cancelled
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    driver = relationship("User")
+    car = relationship("Car")
+    schedule = relationship("Schedule")
+    rides = relationship("Ride", back_populates="template")
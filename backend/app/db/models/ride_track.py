@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class RideTrack(Base):
+    __tablename__ = "ride_tracks"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    ride_id = Column(Integer, ForeignKey("rides.id"), nullable=False)
+    driver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed = Column(Float, nullable=True)  # m/s as reported by the device
+    heading = Column(Float, nullable=True)  # degrees from north
+    accuracy = Column(Float, nullable=True)  # meters
+    recorded_at = Column(DateTime, nullable=False)  # device time of the fix, Pakistan time like rides.start_time
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    ride = relationship("Ride")
+
+    __table_args__ = (
+        Index("ix_ride_tracks_ride_id_recorded_at", "ride_id", "recorded_at"),
+    )
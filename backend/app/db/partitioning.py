@@ -0,0 +1,110 @@
+"""
+Monthly range partitions for the append-only tables (PostgreSQL only).
+
+`messages` and `ride_history` are partitioned by their creation timestamp, one
+partition per calendar month (UTC) plus a DEFAULT partition that catches rows
+outside the prepared range. Partitions are created ahead of time and, past the
+retention window, detached: the old month stays in the database as a plain
+table (e.g. `messages_2024_01`) that can be dumped and dropped, but queries on
+the parent no longer see it.
+
+On other databases (SQLite in development) `is_partitioned` is always False and
+the tables are left as they are.
+"""
+import re
+from datetime import date
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# table -> partition key column
+PARTITIONED_TABLES = {
+    "messages": "sent_at",
+    "ride_history": "joined_at",
+}
+
+_MONTH_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": table}).scalar())
+
+
+def monthly_partitions(conn: Connection, table: str) -> Dict[date, str]:
+    """Attached monthly partitions of `table` by month (the DEFAULT partition is excluded)"""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+    ), {"table": table}).scalars().all()
+    partitions = {}
+    for name in rows:
+        match = _MONTH_SUFFIX.search(name)
+        if match and name == partition_name(table, date(int(match[1]), int(match[2]), 1)):
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_month_partition(conn: Connection, table: str, column: str, month: date) -> str:
+    """
+    Add the partition for `month`. Rows that already landed in the DEFAULT partition
+    for that month are moved into it first, otherwise ATTACH would be rejected.
+    """
+    name = partition_name(table, month)
+    lower = f"{month.isoformat()} 00:00:00+00"
+    upper = f"{add_months(month, 1).isoformat()} 00:00:00+00"
+    bounds = {"lower": lower, "upper": upper}
+    in_range = f"{column} >= CAST(:lower AS timestamptz) AND {column} < CAST(:upper AS timestamptz)"
+
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"INSERT INTO {name} SELECT * FROM {table}_default WHERE {in_range}"), bounds)
+    conn.execute(text(f"DELETE FROM {table}_default WHERE {in_range}"), bounds)
+    # Indexes and foreign keys of the parent are cloned onto the partition on attach
+    conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    return name
+
+
+def ensure_partitions(conn: Connection, table: str, column: str, first: date, last: date) -> List[str]:
+    """Create any missing monthly partitions from `first` through `last` (inclusive)"""
+    existing = monthly_partitions(conn, table)
+    created = []
+    month = month_start(first)
+    while month <= month_start(last):
+        if month not in existing:
+            created.append(create_month_partition(conn, table, column, month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_old_partitions(conn: Connection, table: str, before: date) -> List[str]:
+    """Detach monthly partitions for months before `before`; the tables themselves are kept"""
+    detached = []
+    for month, name in sorted(monthly_partitions(conn, table).items()):
+        if month < month_start(before):
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            detached.append(name)
+    return detached
@@ -0,0 +1,17 @@
+"""
+Column projections for the compact list views (`?view=card`).
+
+A card schema (app/schema/ride.py) lists the fields a list screen shows. The
+CRUD functions pass it through `card_columns` to `load_only`, so the SELECT
+(including eager-loaded relationships) reads just those columns and skips the
+per-row statistics the full responses compute.
+"""
+from typing import List, Type
+
+from pydantic import BaseModel
+
+
+def card_columns(model, schema: Type[BaseModel]) -> List:
+    """Mapped columns of `model` that `schema` has a field for"""
+    columns = model.__mapper__.column_attrs.keys()
+    return [getattr(model, name) for name in schema.model_fields if name in columns]
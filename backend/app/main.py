@@ -1,7 +1,10 @@
 from dotenv import load_dotenv
 load_dotenv()
+import asyncio
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
@@ -9,13 +12,46 @@ from app.core.database import engine, Base
 
 # Import all models to ensure they are registered with SQLAlchemy
 from app.db.models import *
+from app.services.commute_matcher import commute_matching_loop
+from app.services.ride_scheduler import ride_generation_loop
+from app.services.places import place_index_loop
+from app.services.live_tracking import track_flush_loop, tracking_fanout_loop
+from app.services.ride_lifecycle import ride_lifecycle_loop
+from app.services.partition_maintenance import partition_maintenance_loop
+from app.services.road_graph import get_road_graph
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    # Load the road graph now: a broken ROAD_GRAPH_PATH should stop the deploy, not the first ride
+    get_road_graph()
+
+    # Background jobs
+    tasks = []
+    if settings.COMMUTE_MATCH_INTERVAL_MINUTES > 0:
+        tasks.append(asyncio.create_task(commute_matching_loop()))
+    if settings.RIDE_TEMPLATE_INTERVAL_MINUTES > 0:
+        tasks.append(asyncio.create_task(ride_generation_loop()))
+    if settings.PLACES_INDEX_REFRESH_MINUTES > 0:
+        tasks.append(asyncio.create_task(place_index_loop()))
+    if settings.TRACKING_FLUSH_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(track_flush_loop()))
+    if settings.TRACKING_FANOUT:
+        tasks.append(asyncio.create_task(tracking_fanout_loop()))
+    if settings.RIDE_LIFECYCLE_INTERVAL_MINUTES > 0:
+        tasks.append(asyncio.create_task(ride_lifecycle_loop()))
+    if settings.PARTITION_MAINTENANCE_INTERVAL_MINUTES > 0:
+        tasks.append(asyncio.create_task(partition_maintenance_loop()))
     yield
+    for task in tasks:
+        task.cancel()
+    # Let jobs finish their shutdown work (e.g. the last ride_tracks flush)
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 
 app = FastAPI(
@@ -25,6 +61,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Replay stored responses to retried ride requests / message sends (Idempotency-Key)
+app.add_middleware(IdempotencyMiddleware)
+
+# Throttle OTP, GenAI and search endpoints (inside CORS, so 429s carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +77,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pin clients to the primary database right after their own writes
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 from app.api.auth import router as auth_router
 from app.api.users import router as users_router
@@ -42,6 +88,12 @@ from app.api.messages import router as messages_router
 from app.api.cars import router as cars_router
 from app.api.locations import router as locations_router
 from app.api.genai import router as genai_router
+from app.api.commute import router as commute_router
+from app.api.ride_templates import router as ride_templates_router
+from app.api.images import router as images_router
+from app.api.places import router as places_router
+from app.api.tracking import router as tracking_router
+from app.api.batch import router as batch_router
 
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/api/users", tags=["Users"])
@@ -50,6 +102,17 @@ app.include_router(messages_router, prefix="/api/messages", tags=["Messages"])
 app.include_router(cars_router, prefix="/api/cars", tags=["Cars"])
 app.include_router(locations_router, prefix="/api/locations", tags=["Locations"])
 app.include_router(genai_router, prefix="/api/genai-chat", tags=["GenAI"])
+app.include_router(commute_router, prefix="/api/commute-matches", tags=["Commute Matching"])
+app.include_router(ride_templates_router, prefix="/api/ride-templates", tags=["Ride Templates"])
+app.include_router(images_router, prefix="/api/images", tags=["Images"])
+app.include_router(places_router, prefix="/api/places", tags=["Places"])
+app.include_router(tracking_router, prefix="/api/tracking", tags=["Live Tracking"])
+app.include_router(batch_router, prefix="/api/batch", tags=["Batch"])
+
+# Locally stored images (IMAGE_STORE_BACKEND=local)
+if settings.IMAGE_STORE_BACKEND == "local":
+    os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+    app.mount(settings.MEDIA_URL, StaticFiles(directory=settings.MEDIA_ROOT), name="media")
 
 
 @app.get("/")
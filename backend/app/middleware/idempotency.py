@@ -0,0 +1,222 @@
+"""
+`Idempotency-Key` support for POSTs that mobile clients retry.
+
+The first request with a key runs normally and its response (status, headers,
+body) is stored for IDEMPOTENCY_TTL_SECONDS; retries with the same key get that
+response back without touching the database. A duplicate that arrives while the
+first is still running waits for it (up to IDEMPOTENCY_WAIT_SECONDS) instead of
+running a second time. Keys are scoped to the caller's token subject and the
+route, and reusing one with a different body is rejected with 422.
+
+Server errors (5xx) are not stored, so the client can retry them for real.
+Records live in Redis so every worker sees them, or in process memory while
+Redis is unreachable. This is plain ASGI rather than BaseHTTPMiddleware because
+it needs the request body before the endpoint does.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, redis_connection
+from app.core.security import token_subject
+
+IDEMPOTENT_ROUTES = {
+    ("POST", "/api/rides/request"),
+    ("POST", "/api/messages"),
+}
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+
+PENDING = "pending"
+DONE = "done"
+
+
+class MemoryIdempotencyStore:
+    """Records in process memory; also the fallback while Redis is down"""
+
+    def __init__(self):
+        self._records: Dict[str, Tuple[dict, float]] = {}  # key -> (record, expires at)
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """None if the caller now owns `key`, otherwise the existing record"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._records) > 10000:
+                self._records = {k: v for k, v in self._records.items() if v[1] > now}
+            record, expires_at = self._records.get(key, (None, 0))
+            if record is not None and expires_at > now:
+                return record
+            self._records[key] = ({"state": PENDING, "fingerprint": fingerprint},
+                                  now + settings.IDEMPOTENCY_LOCK_SECONDS)
+            return None
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            record, expires_at = self._records.get(key, (None, 0))
+            return record if expires_at > time.monotonic() else None
+
+    def complete(self, key: str, record: dict):
+        with self._lock:
+            self._records[key] = (record, time.monotonic() + settings.IDEMPOTENCY_TTL_SECONDS)
+
+    def release(self, key: str):
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    def __init__(self, fallback: MemoryIdempotencyStore):
+        self.fallback = fallback
+
+    def _call(self, operation: str, *args):
+        client = get_redis()
+        if client is not None:
+            try:
+                return getattr(self, f"_{operation}")(client, *args)
+            except redis.RedisError as e:
+                redis_connection.mark_down(e)
+        return getattr(self.fallback, operation)(*args)
+
+    def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        return self._call("claim", key, fingerprint)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._call("get", key)
+
+    def complete(self, key: str, record: dict):
+        return self._call("complete", key, record)
+
+    def release(self, key: str):
+        return self._call("release", key)
+
+    @staticmethod
+    def _claim(client, key: str, fingerprint: str) -> Optional[dict]:
+        pending = json.dumps({"state": PENDING, "fingerprint": fingerprint})
+        if client.set(key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return None
+        stored = client.get(key)
+        # Expired between the two calls: treat it as running, the duplicate ends up retrying
+        return json.loads(stored) if stored else {"state": PENDING, "fingerprint": fingerprint}
+
+    @staticmethod
+    def _get(client, key: str) -> Optional[dict]:
+        stored = client.get(key)
+        return json.loads(stored) if stored else None
+
+    @staticmethod
+    def _complete(client, key: str, record: dict):
+        client.set(key, json.dumps(record), ex=settings.IDEMPOTENCY_TTL_SECONDS)
+
+    @staticmethod
+    def _release(client, key: str):
+        client.delete(key)
+
+
+_memory_store = MemoryIdempotencyStore()
+idempotency_store = RedisIdempotencyStore(_memory_store) if settings.IDEMPOTENCY_BACKEND == "redis" \
+    else _memory_store
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def _replay(record: dict, send):
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": base64.b64decode(record["body"])})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/")) not in IDEMPOTENT_ROUTES:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        subject = token_subject(headers.get("authorization"))
+        if not idempotency_key or subject is None:
+            # Unauthenticated requests are rejected by the endpoint anyway
+            return await self.app(scope, receive, send)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Idempotency-Key is too long"}, status_code=400)
+            return await response(scope, receive, send)
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = f"idempotency:{subject}:{scope['method']}:{scope['path'].rstrip('/')}:{idempotency_key}"
+
+        record = await run_in_threadpool(idempotency_store.claim, key, fingerprint)
+        if record is not None:
+            return await self._duplicate(key, record, fingerprint, scope, receive, send)
+
+        captured = {"body": b""}
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()  # only http.disconnect is left
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [(name.decode("latin-1"), value.decode("latin-1"))
+                                       for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                captured["body"] += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            await run_in_threadpool(idempotency_store.release, key)
+            raise
+        if captured.get("status", 500) >= 500:
+            await run_in_threadpool(idempotency_store.release, key)
+            return
+        await run_in_threadpool(idempotency_store.complete, key, {
+            "state": DONE,
+            "fingerprint": fingerprint,
+            "status": captured["status"],
+            "headers": captured["headers"],
+            "body": base64.b64encode(captured["body"]).decode(),
+        })
+
+    async def _duplicate(self, key: str, record: dict, fingerprint: str, scope, receive, send):
+        if record["fingerprint"] != fingerprint:
+            response = JSONResponse({"detail": "Idempotency-Key was already used with a different request"},
+                                    status_code=422)
+            return await response(scope, receive, send)
+        # Same request still running (another retry or another worker): wait for its response
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while record is not None and record["state"] == PENDING and time.monotonic() < deadline:
+            await asyncio.sleep(POLL_SECONDS)
+            record = await run_in_threadpool(idempotency_store.get, key)
+        if record is not None and record["state"] == DONE:
+            return await _replay(record, send)
+        # Still running, or it failed and released the key: the client should retry
+        response = JSONResponse({"detail": "A request with this Idempotency-Key is in progress"},
+                                status_code=409, headers={"Retry-After": "1"})
+        return await response(scope, receive, send)
@@ -0,0 +1,220 @@
+"""
+Token-bucket rate limiting for endpoints that are expensive or abusable.
+
+Each rule matches requests by method and path and has a bucket per client IP
+and, for signed-in callers, per user. A bucket holds `capacity` tokens, refills
+completely over `per_seconds` and a request takes one token from every bucket
+it falls in; with an empty bucket the request is answered `429` with
+`Retry-After` before it reaches a database session or an external provider.
+
+Buckets live in Redis (RATE_LIMIT_BACKEND=redis) so all workers share them,
+falling back to process memory while Redis is unreachable; RATE_LIMIT_BACKEND=memory
+keeps them in process only (single worker, development).
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, redis_connection
+from app.core.security import token_subject
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: int  # burst size
+    per_seconds: float  # time for an empty bucket to fill up again
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """'5/600' -> 5 requests, refilled over 600 seconds"""
+        capacity, per_seconds = value.split("/")
+        return cls(int(capacity), float(per_seconds))
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    name: str
+    methods: Tuple[str, ...]
+    path: str
+    per_ip: Optional[Limit] = None
+    per_user: Optional[Limit] = None
+    prefix: bool = False  # match every path under `path`
+
+    def matches(self, method: str, path: str) -> bool:
+        if method not in self.methods:
+            return False
+        return path.startswith(self.path) if self.prefix else path.rstrip("/") == self.path.rstrip("/")
+
+
+RATE_LIMIT_RULES = [
+    # Each send is an email (SMTP) or WhatsApp message (UltraMsg)
+    RateLimitRule("otp_send", ("POST",), "/api/auth/send-otp", per_ip=Limit(5, 600)),
+    RateLimitRule("otp_send", ("POST",), "/api/auth/send-mobile-otp", per_ip=Limit(5, 600)),
+    # Six digit codes must not be guessable by brute force
+    RateLimitRule("otp_verify", ("POST",), "/api/auth/verify-otp", per_ip=Limit(10, 600)),
+    RateLimitRule("otp_verify", ("POST",), "/api/auth/verify-mobile-otp", per_ip=Limit(10, 600)),
+    # Every message is a Groq completion
+    RateLimitRule("genai", ("POST",), "/api/genai-chat", prefix=True,
+                  per_ip=Limit(60, 60), per_user=Limit(20, 60)),
+    RateLimitRule("ride_search", ("GET",), "/api/rides/", per_ip=Limit(120, 60), per_user=Limit(60, 60)),
+    RateLimitRule("message_search", ("GET",), "/api/messages/search",
+                  per_ip=Limit(60, 60), per_user=Limit(30, 60)),
+    # Each batch runs up to BATCH_MAX_REQUESTS GETs (which are limited one by one as well)
+    RateLimitRule("batch", ("POST",), "/api/batch", per_ip=Limit(120, 60), per_user=Limit(60, 60)),
+]
+
+# Checks every key against its bucket and takes a token from all of them only if
+# none is empty. Returns 0 when allowed, otherwise the seconds until it would be.
+_TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local levels = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - ts) * rate)
+    if level < 1 then
+        retry_after = math.max(retry_after, (1 - level) / rate)
+    end
+    levels[i] = level
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local level = levels[i]
+    if retry_after == 0 then
+        level = level - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(level), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return tostring(retry_after)
+"""
+
+Bucket = Tuple[str, Limit]  # (key, limit)
+
+
+class MemoryBuckets:
+    """Buckets in process memory; also the fallback while Redis is down"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._levels: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, monotonic time)
+        self._lock = threading.Lock()
+
+    def take(self, buckets: List[Bucket]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            retry_after = 0.0
+            for key, limit in buckets:
+                tokens, ts = self._levels.get(key, (limit.capacity, now))
+                level = min(limit.capacity, tokens + (now - ts) * limit.rate)
+                if level < 1:
+                    retry_after = max(retry_after, (1 - level) / limit.rate)
+                levels.append(level)
+            for (key, _), level in zip(buckets, levels):
+                self._levels[key] = (level if retry_after else level - 1, now)
+            if len(self._levels) > self.max_keys:
+                self._prune(now)
+            return retry_after
+
+    def _prune(self, now: float):
+        # A bucket untouched for an hour is full again for any configured limit
+        self._levels = {key: state for key, state in self._levels.items() if now - state[1] < 3600}
+
+
+class RedisBuckets:
+    def __init__(self, fallback: MemoryBuckets):
+        self.fallback = fallback
+        self._script = None
+
+    def take(self, buckets: List[Bucket]) -> float:
+        client = get_redis()
+        if client is None:
+            return self.fallback.take(buckets)
+        try:
+            if self._script is None:
+                self._script = client.register_script(_TAKE_SCRIPT)
+            args = []
+            for _, limit in buckets:
+                args += [limit.capacity, limit.rate]
+            return float(self._script(keys=[key for key, _ in buckets], args=args, client=client))
+        except redis.RedisError as e:
+            redis_connection.mark_down(e)
+            return self.fallback.take(buckets)
+
+
+class RateLimiter:
+    def __init__(self, rules: List[RateLimitRule], backend: str, overrides: Dict[str, str]):
+        self.rules = rules
+        self.memory = MemoryBuckets()
+        self.store = RedisBuckets(self.memory) if backend == "redis" else self.memory
+        # e.g. {"genai:user": "10/60"} replaces the per-user limit of the genai rule
+        self.overrides = {name: Limit.parse(value) for name, value in overrides.items()}
+
+    def rule_for(self, method: str, path: str) -> Optional[RateLimitRule]:
+        return next((rule for rule in self.rules if rule.matches(method, path)), None)
+
+    def buckets(self, rule: RateLimitRule, ip: Optional[str], user: Optional[str]) -> List[Bucket]:
+        buckets = []
+        per_ip = self.overrides.get(f"{rule.name}:ip", rule.per_ip)
+        per_user = self.overrides.get(f"{rule.name}:user", rule.per_user)
+        if per_ip is not None and ip:
+            buckets.append((f"ratelimit:{rule.name}:ip:{ip}", per_ip))
+        if per_user is not None and user:
+            buckets.append((f"ratelimit:{rule.name}:user:{user}", per_user))
+        return buckets
+
+    def take(self, buckets: List[Bucket]) -> float:
+        return self.store.take(buckets)
+
+
+rate_limiter = RateLimiter(RATE_LIMIT_RULES, settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_OVERRIDES)
+
+
+async def retry_after(method: str, path: str, ip: Optional[str], authorization: Optional[str]) -> float:
+    """Take a token for this request; seconds until it would be allowed, 0 if it is"""
+    rule = rate_limiter.rule_for(method, path)
+    if rule is None:
+        return 0.0
+    buckets = rate_limiter.buckets(rule, ip, token_subject(authorization))
+    if not buckets:
+        return 0.0
+    if rate_limiter.store is rate_limiter.memory:
+        return rate_limiter.take(buckets)
+    return await run_in_threadpool(rate_limiter.take, buckets)
+
+
+def too_many_requests(seconds: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests, please try again later"},
+        headers={"Retry-After": str(max(1, math.ceil(seconds)))},
+    )
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        ip = request.client.host if request.client else None
+        seconds = await retry_after(request.method, request.url.path, ip, request.headers.get("authorization"))
+        if seconds > 0:
+            return too_many_requests(seconds)
+        return await call_next(request)
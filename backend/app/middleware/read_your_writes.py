@@ -0,0 +1,22 @@
+from fastapi.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.database import ReadRouter, read_router
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+READ_ONLY_POSTS = {"/api/batch"}  # POSTs that only read
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Remember clients that just wrote so their next reads skip the replicas"""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method not in WRITE_METHODS or request.url.path.rstrip("/") in READ_ONLY_POSTS:
+            return await call_next(request)
+        key = ReadRouter.client_key(request)
+        await run_in_threadpool(read_router.mark_write, key)
+        response = await call_next(request)
+        # Refresh after the commit so the window covers replica lag from this point
+        await run_in_threadpool(read_router.mark_write, key)
+        return response
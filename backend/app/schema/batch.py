@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal, Optional
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None  # echoed back so the client can match responses
+    method: Literal["GET"] = "GET"
+    path: str = Field(..., max_length=2000)  # e.g. "/api/rides/my-rides?view=card"
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1)
+
+
+class BatchItemResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResponse]
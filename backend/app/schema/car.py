@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from typing import Optional
 
+from app.schema.image import PhotoThumbnail, PhotoUrl
+
 
 class CarBase(BaseModel):
     make: str
@@ -28,9 +30,10 @@ class CarUpdate(BaseModel):
     photo_url: Optional[str] = None
 
 
-class CarResponse(CarBase):
+class CarResponse(CarBase, PhotoThumbnail):
     id: int
     user_id: int
+    photo_url: PhotoUrl = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+from app.schema.image import PhotoUrl
+
+
+class CommuteDriver(BaseModel):
+    id: int
+    name: str
+    photo_url: PhotoUrl = None
+
+    class Config:
+        from_attributes = True
+
+
+class CommuteRide(BaseModel):
+    id: int
+    start_location: str
+    end_location: str
+    start_time: datetime
+    seats_available: int
+    total_fare: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CommuteMatchResponse(BaseModel):
+    id: int
+    schedule_id: int
+    day_of_week: int  # 0=Monday, 6=Sunday
+    leg: str  # outbound, return
+    match_type: str  # ride, recurring_driver
+    ride_id: Optional[int] = None
+    driver_id: int
+    driver_schedule_id: Optional[int] = None
+    score: float
+    pickup_distance_km: float
+    dropoff_distance_km: float
+    time_offset_minutes: int
+    computed_at: Optional[datetime] = None
+    driver: CommuteDriver
+    ride: Optional[CommuteRide] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,22 @@
+from pydantic import AfterValidator, BaseModel, computed_field
+from typing import Annotated, Dict, Optional
+
+from app.services.image_storage import LIST_THUMBNAIL_SIZE, image_url, thumbnail_url
+
+
+class ImageUploadResponse(BaseModel):
+    key: str
+    url: str
+    thumbnails: Dict[int, str]  # bounding box size (px) -> url
+
+
+# photo_url columns hold image store keys; responses carry the public URL
+PhotoUrl = Annotated[Optional[str], AfterValidator(image_url)]
+
+
+class PhotoThumbnail(BaseModel):
+    """Adds the small thumbnail list screens should load instead of the full photo"""
+
+    @computed_field
+    def photo_thumbnail_url(self) -> Optional[str]:
+        return thumbnail_url(getattr(self, "photo_url", None), LIST_THUMBNAIL_SIZE)
@@ -1,12 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from app.schema.image import PhotoUrl
+
 
 class UserInMessage(BaseModel):
     id: int
     name: str
-    photo_url: Optional[str] = None
+    photo_url: PhotoUrl = None
     
     class Config:
         from_attributes = True
@@ -25,10 +27,19 @@ class MessageCreate(MessageBase):
         validate_assignment = True
 
 
+class RideMessageCreate(BaseModel):
+    content: str
+
+    class Config:
+        extra = "forbid"
+
+
 class MessageResponse(MessageBase):
+    receiver_id: Optional[int] = None  # None for ride group messages
     id: int
     sender_id: int
     sent_at: datetime
+    read_at: Optional[datetime] = None
     sender: Optional[UserInMessage] = None
     receiver: Optional[UserInMessage] = None
 
@@ -36,11 +47,56 @@ class MessageResponse(MessageBase):
         from_attributes = True
 
 
+class MessageItem(BaseModel):
+    """Compact message row; users are referenced by id and listed once per page"""
+    id: int
+    sender_id: int
+    receiver_id: Optional[int] = None
+    ride_id: Optional[int] = None
+    content: str
+    sent_at: datetime
+    read_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MessagePage(BaseModel):
+    messages: List[MessageItem]  # newest first
+    users: List[UserInMessage]
+    has_more: bool
+    before: Optional[str] = None  # cursor for the next older page
+    after: Optional[str] = None  # cursor for messages newer than this page
+
+
 class ConversationResponse(BaseModel):
     user_id: int
     user_name: str
-    user_photo: Optional[str] = None
+    user_photo: PhotoUrl = None
     last_message: str
     last_message_time: datetime
     last_message_id: int
-    ride_id: Optional[int] = None
\ No newline at end of file
+    ride_id: Optional[int] = None
+    unread_count: int = 0
+
+
+class UnreadConversation(BaseModel):
+    user_id: int
+    unread_count: int
+
+
+class UnreadRideThread(BaseModel):
+    ride_id: int
+    unread_count: int
+
+
+class UnreadCountResponse(BaseModel):
+    total: int
+    conversations: List[UnreadConversation]
+    rides: List[UnreadRideThread] = []
+
+
+class MarkReadResponse(BaseModel):
+    user_id: Optional[int] = None
+    ride_id: Optional[int] = None
+    marked_read: int
\ No newline at end of file
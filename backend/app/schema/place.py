@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class PlaceResponse(BaseModel):
+    name: str
+    area: Optional[str] = None
+    latitude: float
+    longitude: float
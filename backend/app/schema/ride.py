@@ -1,8 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from enum import Enum
 
 from app.schema.car import CarResponse
+from app.schema.image import PhotoThumbnail, PhotoUrl
 from app.schema.user import UserRideResponse, UserResponse
 
 class RideBase(BaseModel):
@@ -63,10 +65,10 @@ class RideRequestCreate(BaseModel):
     ending_stop: str   # New field
 
 
-class UserPublic(BaseModel):
+class UserPublic(PhotoThumbnail):
     id: int
     name: str
-    photo_url: Optional[str] = None
+    photo_url: PhotoUrl = None
     rating: Optional[float] = None
     rides_taken: Optional[int] = None
 
@@ -137,4 +139,103 @@ class RideHistoryCreate(BaseModel):
 class CheckRequestResponse(BaseModel):
     exists: bool
     requested_at: Optional[str] = None  # ISO 8601 format
-    status: Optional[str] = None  # 'pending', 'accepted', 'rejected'
\ No newline at end of file
+    status: Optional[str] = None  # 'pending', 'accepted', 'rejected'
+
+class PickupPlanStop(BaseModel):
+    request_id: int
+    rider_id: int
+    rider_name: Optional[str] = None
+    action: str  # pickup, dropoff
+    stop: str
+    latitude: float
+    longitude: float
+    distance_from_start_km: float
+    eta_minutes: int
+
+
+class PickupPlanResponse(BaseModel):
+    ride_id: int
+    method: str  # exact, heuristic
+    stops: List[PickupPlanStop]
+    total_distance_km: float
+    direct_distance_km: float
+    added_detour_km: float
+    request_order_distance_km: float
+    total_duration_minutes: int
+
+
+class RideView(str, Enum):
+    FULL = "full"
+    CARD = "card"  # only what list screens show, see the *Card schemas below
+
+
+# Compact list projections (`?view=card`). Field names double as the columns the
+# CRUD layer loads (app/db/projections.py), so keep them to plain model columns.
+
+class UserCard(PhotoThumbnail):
+    id: int
+    name: Optional[str] = None
+    photo_url: PhotoUrl = None
+
+    class Config:
+        from_attributes = True
+
+
+class CarCard(PhotoThumbnail):
+    id: int
+    make: str
+    model: str
+    color: Optional[str] = None
+    seats: int
+    photo_url: PhotoUrl = None
+
+    class Config:
+        from_attributes = True
+
+
+class RideSummaryCard(BaseModel):
+    id: int
+    driver_id: int
+    status: str
+    start_location: str
+    end_location: str
+    start_time: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class RideCard(RideSummaryCard):
+    seats_available: int
+    total_fare: Optional[float] = None
+    driver: UserCard
+    car: CarCard
+
+
+class RideRequestCard(BaseModel):
+    id: int
+    ride_id: int
+    rider_id: int
+    status: str
+    requested_at: datetime
+    joining_stop: Optional[str] = None
+    ending_stop: Optional[str] = None
+    rider: UserCard
+    ride: RideSummaryCard
+
+    class Config:
+        from_attributes = True
+
+
+class RideHistoryCard(BaseModel):
+    id: int
+    ride_id: int
+    role: str
+    joined_at: datetime
+    completed_at: Optional[datetime] = None
+    rating_given: Optional[int] = None
+    rating_received: Optional[int] = None
+    ride: Optional[RideSummaryCard] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,67 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+
+class RideTemplateBase(BaseModel):
+    car_id: int
+    schedule_id: int  # departure day and time come from the driver's schedule
+    start_location: str
+    end_location: str
+    start_latitude: Optional[float] = None
+    start_longitude: Optional[float] = None
+    end_latitude: Optional[float] = None
+    end_longitude: Optional[float] = None
+    distance_km: Optional[float] = None
+    estimated_duration: Optional[int] = None
+    seats_available: int
+    total_fare: Optional[float] = None
+    main_stops: Optional[list[str]] = None
+
+    class Config:
+        extra = "forbid"
+
+
+class RideTemplateCreate(RideTemplateBase):
+    pass
+
+
+class RideTemplateUpdate(BaseModel):
+    car_id: Optional[int] = None
+    seats_available: Optional[int] = None
+    total_fare: Optional[float] = None
+    main_stops: Optional[list[str]] = None
+    # Changing the route re-plans main_stops (unless given), distance_km and estimated_duration
+    start_location: Optional[str] = None
+    end_location: Optional[str] = None
+    start_latitude: Optional[float] = None
+    start_longitude: Optional[float] = None
+    end_latitude: Optional[float] = None
+    end_longitude: Optional[float] = None
+
+
+class RideTemplateBulkUpdate(RideTemplateUpdate):
+    template_ids: List[int]
+
+
+class RideTemplateBulkCancel(BaseModel):
+    template_ids: List[int]
+
+
+class RideTemplateResponse(RideTemplateBase):
+    id: int
+    driver_id: int
+    status: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RideTemplateBulkResult(BaseModel):
+    templates_updated: int
+    rides_updated: int
+
+
+class RideGenerationResult(BaseModel):
+    rides_created: int
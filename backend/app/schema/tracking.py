@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+MAX_PINGS_PER_BATCH = 100
+
+class LocationPing(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    speed: Optional[float] = None  # m/s
+    heading: Optional[float] = None  # degrees from north
+    accuracy: Optional[float] = None  # meters
+    recorded_at: Optional[datetime] = None  # device time; server time when missing
+
+
+class LocationPingBatch(BaseModel):
+    pings: List[LocationPing] = Field(..., min_length=1, max_length=MAX_PINGS_PER_BATCH)
+
+
+class LocationIngestResult(BaseModel):
+    accepted: int
+
+
+class LiveLocationResponse(BaseModel):
+    ride_id: int
+    points: List[LocationPing]  # oldest first, latest last
+
+
+class StopEta(BaseModel):
+    index: int  # position in the ride's main_stops
+    stop: str
+    distance_km: float
+    eta_minutes: float
+    arrival_at: Optional[datetime] = None
+
+
+class RideEtaResponse(BaseModel):
+    ride_id: int
+    stops: List[StopEta]  # remaining stops only
@@ -3,6 +3,8 @@ from typing import Optional, List, Literal
 from datetime import datetime
 from enum import Enum
 
+from app.schema.image import PhotoThumbnail, PhotoUrl
+
 
 class GenderPreference(str, Enum):
     NO_PREFERENCE = "No preference"
@@ -71,9 +73,9 @@ class UserUpdate(BaseModel):
     photo_url: Optional[str] = None
 
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, PhotoThumbnail):
     id: int
-    photo_url: Optional[str] = None
+    photo_url: PhotoUrl = None
     trust_score: float
     created_at: datetime
     @computed_field
@@ -101,7 +103,7 @@ class ProfileResponse(BaseModel):
     gender: Optional[str] = None
     is_driver: bool
     is_rider: bool
-    photo_url: Optional[str] = None
+    photo_url: PhotoUrl = None
     rides_taken: int
     rides_offered: int
     preferences: Optional[UserPreferences] = None
@@ -115,7 +117,7 @@ class PublicUserProfile(BaseModel):
     id: int
     name: str
     bio: Optional[str]
-    photo_url: Optional[str]
+    photo_url: PhotoUrl
     rides_taken: int
     rides_offered: int
     rider_rating: float
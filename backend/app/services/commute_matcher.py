@@ -0,0 +1,263 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytz
+import redis
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_client import get_redis, redis_connection
+from app.db.crud.commute_match import lock_commute_matches, replace_commute_matches
+from app.db.models.location import PreferredLocation
+from app.db.models.ride import Ride
+from app.db.models.schedule import Schedule
+from app.db.models.user import User
+from app.services.geo_matrix import haversine_km
+
+logger = logging.getLogger(__name__)
+
+HOME_LABELS = ("home",)
+OFFICE_LABELS = ("office", "work")
+# Share of the cost that comes from distance; the rest is the time offset
+DISTANCE_WEIGHT = 0.6
+# Rider legs scored per broadcast block, keeps the legs x candidates matrix small
+LEG_BLOCK_SIZE = 256
+# Held for one interval by the worker that rebuilds the matches
+LEASE_KEY = "commute_matches:lease"
+
+
+def _minute_of_day(value) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _find_location(locations: List[PreferredLocation], labels) -> Optional[PreferredLocation]:
+    for location in locations:
+        name = (location.name or "").lower()
+        if any(label in name for label in labels) and \
+                location.latitude is not None and location.longitude is not None:
+            return location
+    return None
+
+
+def _commute_legs(db: Session, user_ids=None) -> List[dict]:
+    """Expand schedules into home->office (start_time) and office->home (end_time) legs"""
+    query = db.query(Schedule)
+    if user_ids is not None:
+        query = query.filter(Schedule.user_id.in_(user_ids))
+    schedules = query.all()
+    if not schedules:
+        return []
+
+    locations: Dict[int, List[PreferredLocation]] = {}
+    for location in db.query(PreferredLocation).filter(
+        PreferredLocation.user_id.in_({s.user_id for s in schedules})
+    ).all():
+        locations.setdefault(location.user_id, []).append(location)
+
+    legs = []
+    for schedule in schedules:
+        user_locations = locations.get(schedule.user_id, [])
+        home = _find_location(user_locations, HOME_LABELS)
+        office = _find_location(user_locations, OFFICE_LABELS)
+        if not home or not office:
+            continue
+        for leg, origin, destination, at in (
+            ("outbound", home, office, schedule.start_time),
+            ("return", office, home, schedule.end_time),
+        ):
+            if at is None:
+                continue
+            legs.append({
+                "user_id": schedule.user_id,
+                "schedule_id": schedule.id,
+                "leg": leg,
+                "day": schedule.day_of_week,
+                "minute": _minute_of_day(at),
+                "start_lat": origin.latitude,
+                "start_lon": origin.longitude,
+                "end_lat": destination.latitude,
+                "end_lon": destination.longitude,
+            })
+    return legs
+
+
+def _ride_candidates(db: Session, now: datetime) -> List[dict]:
+    """Active rides with coordinates departing within the coming week"""
+    rows = db.query(
+        Ride.id, Ride.driver_id, Ride.start_time,
+        Ride.start_latitude, Ride.start_longitude,
+        Ride.end_latitude, Ride.end_longitude
+    ).filter(
+        Ride.status == "active",
+        Ride.seats_available > 0,
+        Ride.start_time > now,
+        Ride.start_time <= now + timedelta(days=7),
+        Ride.start_latitude.isnot(None),
+        Ride.start_longitude.isnot(None),
+        Ride.end_latitude.isnot(None),
+        Ride.end_longitude.isnot(None),
+    ).all()
+    return [{
+        "ride_id": row.id,
+        "driver_id": row.driver_id,
+        "driver_schedule_id": None,
+        "day": row.start_time.weekday(),
+        "minute": _minute_of_day(row.start_time),
+        "start_lat": row.start_latitude,
+        "start_lon": row.start_longitude,
+        "end_lat": row.end_latitude,
+        "end_lon": row.end_longitude,
+    } for row in rows]
+
+
+def _driver_candidates(db: Session) -> List[dict]:
+    """Recurring drivers, taken from the commute legs of users who drive"""
+    driver_ids = [row.id for row in db.query(User.id).filter(User.is_driver == True).all()]
+    if not driver_ids:
+        return []
+    return [{
+        "ride_id": None,
+        "driver_id": leg["user_id"],
+        "driver_schedule_id": leg["schedule_id"],
+        "day": leg["day"],
+        "minute": leg["minute"],
+        "start_lat": leg["start_lat"],
+        "start_lon": leg["start_lon"],
+        "end_lat": leg["end_lat"],
+        "end_lon": leg["end_lon"],
+    } for leg in _commute_legs(db, driver_ids)]
+
+
+def _as_arrays(records: List[dict], fields) -> Dict[str, np.ndarray]:
+    return {field: np.array([r[field] for r in records], dtype=float) for field in fields}
+
+
+def score_candidates(legs: List[dict], candidates: List[dict], top_k: int,
+                     max_distance_km: float, time_window_minutes: int) -> List[tuple]:
+    """
+    Score every rider leg against every candidate at once.
+
+    Returns (leg_index, candidate_index, score, pickup_km, dropoff_km, offset_minutes)
+    tuples, at most top_k per leg, best first.
+    """
+    if not legs or not candidates:
+        return []
+
+    fields = ("day", "minute", "start_lat", "start_lon", "end_lat", "end_lon")
+    L = _as_arrays(legs, fields + ("user_id",))
+    C = _as_arrays(candidates, fields + ("driver_id",))
+
+    results = []
+    for block_start in range(0, len(legs), LEG_BLOCK_SIZE):
+        block = slice(block_start, block_start + LEG_BLOCK_SIZE)
+        col = lambda name: L[name][block][:, None]
+
+        pickup = haversine_km(col("start_lat"), col("start_lon"), C["start_lat"], C["start_lon"])
+        dropoff = haversine_km(col("end_lat"), col("end_lon"), C["end_lat"], C["end_lon"])
+        offset = C["minute"] - col("minute")
+
+        fits = (col("day") == C["day"]) \
+            & (col("user_id") != C["driver_id"]) \
+            & (pickup <= max_distance_km) \
+            & (dropoff <= max_distance_km) \
+            & (np.abs(offset) <= time_window_minutes)
+        cost = DISTANCE_WEIGHT * (pickup + dropoff) / (2.0 * max_distance_km) \
+            + (1.0 - DISTANCE_WEIGHT) * np.abs(offset) / time_window_minutes
+        score = np.where(fits, 1.0 - cost, -np.inf)
+
+        k = min(top_k, score.shape[1])
+        best = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        for row, cols in enumerate(best):
+            cols = cols[np.argsort(-score[row, cols])]
+            for c in cols:
+                if not np.isfinite(score[row, c]):
+                    break
+                results.append((
+                    block_start + row, int(c), round(float(score[row, c]), 4),
+                    round(float(pickup[row, c]), 3), round(float(dropoff[row, c]), 3),
+                    int(offset[row, c])
+                ))
+    return results
+
+
+def compute_commute_matches(db: Session) -> Optional[int]:
+    """Rebuild the commute_matches table for every rider schedule slot; None if another rebuild is running"""
+    if not lock_commute_matches(db):
+        return None
+    pakistan_tz = pytz.timezone('Asia/Karachi')
+    now_pakistan = datetime.now(pakistan_tz).replace(tzinfo=None)
+
+    legs = _commute_legs(db)
+    rows = []
+    for match_type, candidates in (
+        ("ride", _ride_candidates(db, now_pakistan)),
+        ("recurring_driver", _driver_candidates(db)),
+    ):
+        for leg_idx, cand_idx, score, pickup_km, dropoff_km, offset in score_candidates(
+            legs, candidates,
+            top_k=settings.COMMUTE_MATCH_TOP_K,
+            max_distance_km=settings.COMMUTE_MATCH_MAX_DISTANCE_KM,
+            time_window_minutes=settings.COMMUTE_MATCH_TIME_WINDOW_MINUTES,
+        ):
+            leg, candidate = legs[leg_idx], candidates[cand_idx]
+            rows.append({
+                "rider_id": leg["user_id"],
+                "schedule_id": leg["schedule_id"],
+                "day_of_week": leg["day"],
+                "leg": leg["leg"],
+                "match_type": match_type,
+                "ride_id": candidate["ride_id"],
+                "driver_id": candidate["driver_id"],
+                "driver_schedule_id": candidate["driver_schedule_id"],
+                "score": score,
+                "pickup_distance_km": pickup_km,
+                "dropoff_distance_km": dropoff_km,
+                "time_offset_minutes": offset,
+                "computed_at": now_pakistan,
+            })
+
+    return replace_commute_matches(db, rows)
+
+
+def _take_lease(seconds: int) -> bool:
+    """Let one worker per interval rebuild; every worker may while Redis is unreachable"""
+    client = get_redis()
+    if client is None:
+        return True
+    try:
+        return bool(client.set(LEASE_KEY, "1", nx=True, ex=max(1, seconds)))
+    except redis.RedisError as e:
+        redis_connection.mark_down(e)
+        return True
+
+
+def run_commute_matching_job() -> int:
+    if not _take_lease(settings.COMMUTE_MATCH_INTERVAL_MINUTES * 60):
+        return 0
+    db = SessionLocal()
+    try:
+        count = compute_commute_matches(db)
+        if count is None:
+            logger.info("Commute matching skipped, another worker is rebuilding")
+            return 0
+        logger.info(f"Commute matching stored {count} matches")
+        return count
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Commute matching failed: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+
+async def commute_matching_loop():
+    """Periodic batch job started from the app lifespan"""
+    interval = settings.COMMUTE_MATCH_INTERVAL_MINUTES * 60
+    while True:
+        await run_in_threadpool(run_commute_matching_job)
+        await asyncio.sleep(interval)
@@ -0,0 +1,120 @@
+"""
+Batch distance and ETA computations for ride stops and rider points.
+
+All functions take (N, 2) latitude/longitude arrays (or lists of pairs) and
+work on whole NumPy arrays; large inputs are processed in row blocks so the
+temporaries stay bounded. `mode="road"` scales great-circle distances by
+ROAD_CIRCUITY_FACTOR, a cheap stand-in for network distance.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.places import place_service
+
+EARTH_RADIUS_KM = 6371.0088
+# Rows per block when building large matrices (BLOCK_ROWS x M temporaries)
+BLOCK_ROWS = 1024
+# Slack (km) when checking that a geocoded stop lies roughly between the ride endpoints
+MAX_STOP_DETOUR_KM = 2.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, broadcasting over NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def as_points(points) -> np.ndarray:
+    """(N, 2) float array of (latitude, longitude)"""
+    array = np.asarray(points, dtype=float)
+    if array.size == 0:
+        return array.reshape(0, 2)
+    if array.ndim != 2 or array.shape[1] != 2:
+        raise ValueError("points must be a sequence of (latitude, longitude) pairs")
+    return array
+
+
+def _scale(distances: np.ndarray, mode: str) -> np.ndarray:
+    if mode == "road":
+        distances *= settings.ROAD_CIRCUITY_FACTOR
+    elif mode != "haversine":
+        raise ValueError(f"Unknown distance mode: {mode}")
+    return distances
+
+
+def distance_matrix(origins, destinations=None, mode: str = "haversine") -> np.ndarray:
+    """Pairwise distances (km) between every origin and every destination"""
+    origins = as_points(origins)
+    destinations = origins if destinations is None else as_points(destinations)
+    result = np.empty((len(origins), len(destinations)))
+    origin_rad = np.radians(origins)
+    dest_lat, dest_lon = np.radians(destinations[:, 0]), np.radians(destinations[:, 1])
+    cos_dest = np.cos(dest_lat)
+    for start in range(0, len(origins), BLOCK_ROWS):
+        lat = origin_rad[start:start + BLOCK_ROWS, 0:1]
+        lon = origin_rad[start:start + BLOCK_ROWS, 1:2]
+        a = np.sin((dest_lat - lat) / 2.0) ** 2 + \
+            np.cos(lat) * cos_dest * np.sin((dest_lon - lon) / 2.0) ** 2
+        result[start:start + BLOCK_ROWS] = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return _scale(result, mode)
+
+
+def pairwise_distance(origins, destinations, mode: str = "haversine") -> np.ndarray:
+    """Element-wise distances (km) between origins[i] and destinations[i]"""
+    origins, destinations = as_points(origins), as_points(destinations)
+    distances = haversine_km(origins[:, 0], origins[:, 1], destinations[:, 0], destinations[:, 1])
+    return _scale(np.asarray(distances, dtype=float), mode)
+
+
+def eta_minutes(distances_km, speed_kmh: Optional[float] = None) -> np.ndarray:
+    """Travel time in minutes for distances at an average city speed"""
+    speed = speed_kmh or settings.AVERAGE_SPEED_KMH
+    return np.asarray(distances_km, dtype=float) * (60.0 / speed)
+
+
+def route_offsets_km(stops, mode: str = "road") -> np.ndarray:
+    """Cumulative distance (km) from the first stop to each stop along the ordered route"""
+    stops = as_points(stops)
+    if len(stops) == 0:
+        return np.zeros(0)
+    legs = pairwise_distance(stops[:-1], stops[1:], mode)
+    return np.concatenate(([0.0], np.cumsum(legs)))
+
+
+def ride_stop_points(ride) -> Optional[np.ndarray]:
+    """
+    Coordinates for a ride's ordered `main_stops`.
+
+    The first and last stops use the ride's own coordinates; intermediate stop
+    names are geocoded through the place index, and any that are unknown (or
+    geocode far off the route) are placed by interpolating between their known
+    neighbours. None when the ride has no coordinates.
+    """
+    if None in (ride.start_latitude, ride.start_longitude, ride.end_latitude, ride.end_longitude):
+        return None
+    names: List[str] = list(ride.main_stops or [])
+    if len(names) < 2:
+        names = [ride.start_location, ride.end_location]
+
+    points = np.full((len(names), 2), np.nan)
+    points[0] = (ride.start_latitude, ride.start_longitude)
+    points[-1] = (ride.end_latitude, ride.end_longitude)
+    direct = float(haversine_km(*points[0], *points[-1]))
+    for i, name in enumerate(names[1:-1], start=1):
+        place = place_service.geocode(name)
+        if not place:
+            continue
+        point = (place["latitude"], place["longitude"])
+        via = float(haversine_km(*points[0], *point) + haversine_km(*point, *points[-1]))
+        if via <= 2.0 * direct + MAX_STOP_DETOUR_KM:
+            points[i] = point
+
+    known = ~np.isnan(points[:, 0])
+    positions = np.arange(len(names))
+    for column in (0, 1):
+        points[~known, column] = np.interp(positions[~known], positions[known], points[known, column])
+    return points
@@ -0,0 +1,221 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Dict, Optional
+
+from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Square bounding boxes (px) generated next to every original
+THUMBNAIL_SIZES = (96, 320)
+LIST_THUMBNAIL_SIZE = 96  # what ride, request and chat lists show
+CHUNK_SIZE = 64 * 1024
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+class ImageStore:
+    """Storage backend interface; keys are content hashes so equal uploads share one object"""
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def save(self, key: str, fileobj: BinaryIO, content_type: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class LocalImageStore(ImageStore):
+    """Files under MEDIA_ROOT, served by the app at MEDIA_URL"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def save(self, key: str, fileobj: BinaryIO, content_type: str):
+        # Write to a temp file first so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(fileobj, out, CHUNK_SIZE)
+        os.replace(tmp_path, self._path(key))
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class S3ImageStore(ImageStore):
+    """Any S3-compatible object store (AWS S3, MinIO, R2, ...)"""
+
+    def __init__(self, bucket: str, public_url: str, endpoint_url: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None):
+        import boto3  # only needed when IMAGE_STORE_BACKEND=s3
+
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+        )
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def save(self, key: str, fileobj: BinaryIO, content_type: str):
+        self.client.upload_fileobj(
+            fileobj, self.bucket, key,
+            ExtraArgs={"ContentType": content_type, "CacheControl": "public, max-age=31536000, immutable"}
+        )
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+
+_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    global _store
+    if _store is None:
+        if settings.IMAGE_STORE_BACKEND == "s3":
+            _store = S3ImageStore(
+                bucket=settings.S3_BUCKET,
+                public_url=settings.S3_PUBLIC_URL,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                access_key=settings.S3_ACCESS_KEY,
+                secret_key=settings.S3_SECRET_KEY,
+            )
+        else:
+            _store = LocalImageStore(settings.MEDIA_ROOT, f"{settings.MEDIA_BASE_URL}{settings.MEDIA_URL}")
+    return _store
+
+
+def _thumbnail_key(key: str, size: int) -> str:
+    return f"{key.rsplit('.', 1)[0]}_{size}.jpg"
+
+
+def store_image(fileobj: BinaryIO, digest: str) -> Dict:
+    """
+    Store an already hashed image and its thumbnails.
+
+    `fileobj` must be positioned at the start; `digest` is the sha256 of its bytes.
+    Returns {"key": ..., "url": ..., "thumbnails": {size: url}}. Store the key in
+    `photo_url` columns; `image_url` turns it into a URL when responses are built.
+    Decoding and resizing is CPU-bound, so call this from a worker thread.
+    """
+    store = get_image_store()
+    try:
+        image = Image.open(fileobj)
+        image.verify()
+        fileobj.seek(0)
+        image = Image.open(fileobj)
+    except (UnidentifiedImageError, OSError):
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid image")
+
+    extension = FORMAT_EXTENSIONS.get(image.format)
+    if not extension:
+        raise HTTPException(status_code=400, detail=f"Unsupported image format: {image.format}")
+
+    key = f"{digest}.{extension}"
+    thumbnail_keys = {size: _thumbnail_key(key, size) for size in THUMBNAIL_SIZES}
+
+    if not store.exists(key):
+        for size, thumbnail_key in thumbnail_keys.items():
+            thumbnail = image.convert("RGB")
+            thumbnail.thumbnail((size, size))
+            with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as buffer:
+                thumbnail.save(buffer, format="JPEG", quality=85, optimize=True)
+                buffer.seek(0)
+                store.save(thumbnail_key, buffer, "image/jpeg")
+        # Original last: its presence marks the whole set as complete for dedup
+        fileobj.seek(0)
+        store.save(key, fileobj, Image.MIME.get(image.format, "application/octet-stream"))
+    else:
+        logger.info(f"Image {key} already stored, skipping upload")
+
+    return {
+        "key": key,
+        "url": store.url(key),
+        "thumbnails": {size: store.url(thumbnail_key) for size, thumbnail_key in thumbnail_keys.items()},
+    }
+
+
+def store_image_bytes(data: bytes) -> Dict:
+    with tempfile.SpooledTemporaryFile(max_size=settings.MAX_IMAGE_UPLOAD_BYTES) as buffer:
+        buffer.write(data)
+        buffer.seek(0)
+        return store_image(buffer, hashlib.sha256(data).hexdigest())
+
+
+def externalize_data_url(value: Optional[str]) -> Optional[str]:
+    """
+    Replace a `data:image/...;base64,` string with the key of the stored image.
+
+    Anything else (already a URL or key, empty, None) is returned unchanged.
+    """
+    if not value or not value.startswith("data:image"):
+        return value
+    try:
+        _, encoded = value.split(",", 1)
+        data = base64.b64decode(encoded, validate=False)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid base64 image data")
+    if len(data) > settings.MAX_IMAGE_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Image is too large")
+    return store_image_bytes(data)["key"]
+
+
+def _is_key(value: Optional[str]) -> bool:
+    return bool(value) and "://" not in value and not value.startswith("data:")
+
+
+def image_key(value: Optional[str]) -> Optional[str]:
+    """
+    What to save in a `photo_url` column for a value a client sent: base64 data URLs
+    are stored (Pillow work, so run this in a worker thread) and URLs of our own
+    store are cut down to their key. Other URLs (e.g. provider avatars) are kept.
+    """
+    value = externalize_data_url(value)
+    if not value:
+        return value
+    prefix = get_image_store().url("")
+    return value[len(prefix):] if value.startswith(prefix) else value
+
+
+def image_url(value: Optional[str]) -> Optional[str]:
+    """Public URL for a stored `photo_url` value; URLs pass through unchanged"""
+    return get_image_store().url(value) if _is_key(value) else value
+
+
+def thumbnail_url(value: Optional[str], size: int) -> Optional[str]:
+    """URL of the `size` px thumbnail of a `photo_url` value (stored key or URL)"""
+    if not value or value.startswith("data:"):
+        return None  # legacy inline image: no thumbnail, and too large to repeat
+    store = get_image_store()
+    prefix = store.url("")
+    if value.startswith(prefix):
+        value = value[len(prefix):]
+    return store.url(_thumbnail_key(value, size)) if _is_key(value) else value
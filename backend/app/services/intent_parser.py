@@ -0,0 +1,138 @@
+"""
+Rule-based parser for ride booking messages ("from Gulshan to Saddar at 8am").
+
+Most GenAI chat inputs name a pickup, a destination and maybe a time in one of
+a few phrasings, English or Roman Urdu ("Gulshan se Saddar 8 baje"). The parser
+pulls the time out first, matches the rest against route patterns and scores
+the result: explicit "from ... to ..." phrasing scores higher than a bare
+"A to B", and every endpoint found in the place gazetteer (app/services/places.py)
+adds to it. The chat endpoint uses the result when the confidence reaches
+GENAI_FAST_PATH_MIN_CONFIDENCE (0.8) and asks the LLM otherwise; the scores are
+set so that takes both endpoints in the gazetteer, whatever the phrasing.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.services.places import normalize, place_service
+
+MAX_PLACE_WORDS = 6  # longer "places" are sentences the patterns misread
+
+# Base confidence per phrasing, before the gazetteer bonus. One known endpoint stays below 0.8:
+# the other one is then often the rest of a sentence ("from work, it is urgent")
+FROM_TO = 0.5
+URDU = 0.45
+BARE = 0.4
+KNOWN_PLACE_BONUS = 0.2
+
+_FILLER = re.compile(
+    r"^(?:(?:hi|hello|hey|salam|assalam o alaikum|please|pls|plz|kindly|can you|could you|"
+    r"i want|i need|i would like|i'd like|i am looking for|looking for|find me|find|get me|book me|book|"
+    r"show me|show|search|search for|is there|are there|any|need|want|to book|to get|to go|go|"
+    r"a|an|the|me|ride|rides|lift|carpool|seat|a ride|a lift|mujhe|chahiye|jana hai|jaana hai)\b[\s,!.]*)+",
+    re.IGNORECASE
+)
+_TRAILING = re.compile(r"[\s,!.?]*(?:\b(?:please|pls|plz|thanks|thank you|jana hai|jaana hai|chahiye|tak)\b[\s,!.?]*)*$",
+                       re.IGNORECASE)
+
+_DAY = r"(?:today|tomorrow|tonight|aaj|kal)"
+_PERIOD = r"(?:morning|afternoon|evening|night|subah|shaam|raat)"
+_CLOCK = r"\d{1,2}(?:[:.]\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.|baje|o'?clock)?"
+_AT = r"(?:\b(?:at|@|around|by|before|after|for)\s+)?"
+_TIME = re.compile(
+    rf"{_AT}(?:{_DAY}\s+)?(?:{_PERIOD}\s+)?{_AT}(?:\b{_CLOCK}(?=\s|$|[,.!?])|\bnoon\b|\bmidnight\b)"
+    rf"(?:\s+{_DAY})?(?:\s+(?:in the\s+)?{_PERIOD})?"
+    rf"|\b{_DAY}(?:\s+{_PERIOD})?\b|\b(?:this|in the)\s+{_PERIOD}\b",
+    re.IGNORECASE
+)
+# A clock time needs am/pm, "baje", a colon or a leading "at" to count; bare numbers may be
+# part of a place name ("DHA Phase 5")
+_CLOCK_EVIDENCE = re.compile(r"am|pm|a\.m\.|p\.m\.|baje|o'?clock|[:.]\d{2}|^\s*(?:at|@|around|by)\b|noon|midnight|"
+                             rf"{_DAY}|{_PERIOD}", re.IGNORECASE)
+
+_ROUTES = [
+    (re.compile(r"^(?:.*?\bfrom\s+)(?P<start>.+?)\s+(?:to|till|until|towards)\s+(?P<end>.+)$", re.IGNORECASE), FROM_TO),
+    # Greedy prefix: the destination follows the last "to" ("I want to go to X from Y")
+    (re.compile(r"^(?:.*\bto\s+)(?P<end>.+?)\s+from\s+(?P<start>.+)$", re.IGNORECASE), FROM_TO),
+    (re.compile(r"^(?P<start>.+?)\s+se\s+(?P<end>.+?)$", re.IGNORECASE), URDU),
+    (re.compile(r"^(?P<start>.+?)\s*(?:\bto\b|->|→|—|–)\s*(?P<end>.+)$", re.IGNORECASE), BARE),
+]
+
+
+@dataclass
+class RideIntent:
+    start_location: str
+    end_location: str
+    time: str
+    confidence: float
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"start_location": self.start_location, "end_location": self.end_location, "time": self.time}
+
+
+def _clean_place(text: str) -> str:
+    text = _FILLER.sub("", text.strip(" ,.!?"))
+    return _TRAILING.sub("", text).strip(" ,.!?")
+
+
+def _extract_time(text: str):
+    """(text without the time phrase, the time phrase or '')"""
+    for match in _TIME.finditer(text):
+        phrase = match.group().strip()
+        if phrase and _CLOCK_EVIDENCE.search(phrase):
+            return " ".join((text[:match.start()] + " " + text[match.end():]).split()), phrase
+    return text, ""
+
+
+def _known_place(text: str) -> bool:
+    # Exact name, or every typed word starts a word of one ("gulshan" -> "Gulshan-e-Iqbal")
+    return bool(normalize(text)) and place_service.geocode(text) is not None
+
+
+def parse_ride_intent(message: str) -> Optional[RideIntent]:
+    """Pickup, destination and time of a booking message, or None if no route phrasing matches"""
+    text, time = _extract_time(" ".join(message.split()))
+    text = text.strip(" ,.!?")
+    for pattern, base in _ROUTES:
+        match = pattern.match(text)
+        if not match:
+            continue
+        start, end = _clean_place(match["start"]), _clean_place(match["end"])
+        if not start or not end:
+            continue
+        if normalize(start) == normalize(end):
+            return None
+        if max(len(start.split()), len(end.split())) > MAX_PLACE_WORDS:
+            continue
+        confidence = base + KNOWN_PLACE_BONUS * (_known_place(start) + _known_place(end))
+        return RideIntent(start, end, time, round(confidence, 2))
+    return None
+
+
+class IntentMetrics:
+    """How many chat messages the rule-based parser answered without the LLM"""
+
+    def __init__(self):
+        self.fast_path = 0
+        self.llm = 0
+        self._lock = threading.Lock()
+
+    def record(self, fast_path: bool):
+        with self._lock:
+            if fast_path:
+                self.fast_path += 1
+            else:
+                self.llm += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            total = self.fast_path + self.llm
+            return {
+                "fast_path": self.fast_path,
+                "llm": self.llm,
+                "fast_path_rate": round(self.fast_path / total, 4) if total else 0.0,
+            }
+
+
+intent_metrics = IntentMetrics()
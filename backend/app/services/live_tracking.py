@@ -0,0 +1,321 @@
+"""
+Live driver locations for rides in progress.
+
+Each ride has an in-memory channel with a ring buffer of its latest positions
+and the queues of connected listeners (the driver and accepted riders). Pings
+are fanned out as soon as they arrive; rows for `ride_tracks` are collected and
+written in bulk by a background flush loop instead of one insert per ping.
+
+Every update is delivered to this worker's listeners directly and relayed to
+the other workers over Redis pub/sub (`tracking:<ride_id>`) by
+`tracking_fanout_loop`, so the driver and the riders of a ride may be connected
+to different workers. Relayed locations also fill the other workers' buffers
+and ETA state, so every worker answers from the whole track.
+While Redis is down each worker only reaches its own listeners.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
+import pytz
+import redis
+import redis.asyncio
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_client import redis_connection
+from app.db.models.ride import Ride
+from app.db.models.ride_request import RideRequest
+from app.db.models.ride_track import RideTrack
+from app.services.ride_eta import eta_tracker
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 32  # slow listeners lose their oldest updates, never block the driver
+CHANNEL_IDLE_SECONDS = 15 * 60
+MAX_PENDING_ROWS = 200_000  # cap on unsaved rows if the database is unavailable
+RELAY_QUEUE_SIZE = 10_000  # updates waiting to be published; newer ones are dropped beyond this
+RELAY_PREFIX = "tracking:"
+# How far ahead of the server a device timestamp may be before it is pulled back to that limit
+MAX_CLOCK_AHEAD = timedelta(seconds=10)
+
+
+def pakistan_now() -> datetime:
+    return datetime.now(pytz.timezone('Asia/Karachi')).replace(tzinfo=None)
+
+
+def _as_pakistan_time(value: Optional[datetime]) -> datetime:
+    now = pakistan_now()
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.timezone('Asia/Karachi')).replace(tzinfo=None)
+    # A phone clock running ahead would otherwise hold back every correct ping that follows
+    return min(value, now + MAX_CLOCK_AHEAD)
+
+
+class RideChannel:
+    def __init__(self, ride_id: int):
+        self.ride_id = ride_id
+        self.driver_id: Optional[int] = None
+        self.rider_ids: Set[int] = set()
+        self.status: Optional[str] = None
+        self.checked_at = 0.0
+        self.last_activity = time.monotonic()
+        self.points: Deque[dict] = deque(maxlen=settings.TRACKING_BUFFER_SIZE)
+        self.subscribers: Set[asyncio.Queue] = set()
+
+    def is_member(self, user_id: int) -> bool:
+        return user_id == self.driver_id or user_id in self.rider_ids
+
+    @property
+    def accepts_pings(self) -> bool:
+        return self.status == "start"
+
+
+class TrackingHub:
+    def __init__(self):
+        self.channels: Dict[int, RideChannel] = {}
+        self._pending: List[dict] = []
+        self._pending_lock = threading.Lock()
+        self.worker_id = uuid.uuid4().hex  # relayed updates from this worker are not delivered twice
+        self._outbox: Optional[asyncio.Queue] = None  # set while tracking_fanout_loop is connected
+
+    # ---------------------------------------------------------------- access
+
+    @staticmethod
+    def _read_access(ride_id: int) -> Optional[Tuple[int, str, Set[int]]]:
+        """(driver id, status, accepted rider ids) from the database; blocking"""
+        db = SessionLocal()
+        try:
+            ride = db.query(Ride.driver_id, Ride.status).filter(Ride.id == ride_id).first()
+            if ride is None:
+                return None
+            rider_ids = {row.rider_id for row in db.query(RideRequest.rider_id).filter(
+                RideRequest.ride_id == ride_id,
+                RideRequest.status == "accepted"
+            ).all()}
+            return ride.driver_id, ride.status, rider_ids
+        finally:
+            db.close()
+
+    async def channel(self, ride_id: int) -> Optional[RideChannel]:
+        """
+        Channel for a ride, with driver / accepted riders / status re-read from the
+        database (in a worker thread) at most every TRACKING_ACCESS_TTL_SECONDS. The
+        ride's ETA route state is loaded there too on first use. None if the ride is unknown.
+        """
+        channel = self.channels.get(ride_id)
+        if channel is not None and time.monotonic() - channel.checked_at < settings.TRACKING_ACCESS_TTL_SECONDS:
+            return channel
+
+        access = await run_in_threadpool(self._read_access, ride_id)
+        if access is None:
+            self.channels.pop(ride_id, None)
+            return None
+        if not eta_tracker.loaded(ride_id):
+            await run_in_threadpool(eta_tracker.load, ride_id)
+        channel = self.channels.setdefault(ride_id, RideChannel(ride_id))
+        channel.driver_id, channel.status, channel.rider_ids = access
+        channel.checked_at = time.monotonic()
+        return channel
+
+    # ---------------------------------------------------------------- ingest
+
+    def ingest(self, channel: RideChannel, pings: List[dict]) -> List[dict]:
+        """
+        Buffer, queue for persistence and fan out a driver's pings.
+
+        Pings older than the latest buffered one are dropped (late retries / reordering),
+        and timestamps from the future are pulled back to MAX_CLOCK_AHEAD past the server's
+        time. Returns the accepted points.
+        """
+        last = channel.points[-1]["recorded_at"] if channel.points else None
+        accepted = []
+        points = [{**ping, "recorded_at": _as_pakistan_time(ping.get("recorded_at"))} for ping in pings]
+        for point in sorted(points, key=lambda p: p["recorded_at"]):
+            if last is not None and point["recorded_at"] <= last:
+                continue
+            last = point["recorded_at"]
+            channel.points.append(point)
+            accepted.append(point)
+        if not accepted:
+            return accepted
+
+        channel.last_activity = time.monotonic()
+        rows = [{**point, "ride_id": channel.ride_id, "driver_id": channel.driver_id} for point in accepted]
+        with self._pending_lock:
+            self._pending.extend(rows)
+            if len(self._pending) > MAX_PENDING_ROWS:
+                dropped = len(self._pending) - MAX_PENDING_ROWS
+                del self._pending[:dropped]
+                logger.warning(f"Dropped {dropped} unsaved ride track rows")
+
+        # Listeners only need the newest position from a batch
+        self.publish(channel, {"type": "location", "ride_id": channel.ride_id, **accepted[-1]})
+        eta_update = eta_tracker.on_pings(channel.ride_id, accepted)
+        if eta_update is not None:
+            self.publish(channel, eta_update)
+        return accepted
+
+    # --------------------------------------------------------------- fan-out
+
+    def subscribe(self, channel: RideChannel) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        channel.subscribers.add(queue)
+        channel.last_activity = time.monotonic()
+        return queue
+
+    def unsubscribe(self, channel: RideChannel, queue: asyncio.Queue):
+        channel.subscribers.discard(queue)
+        channel.last_activity = time.monotonic()
+
+    @staticmethod
+    def _deliver(channel: RideChannel, text: str):
+        for queue in channel.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(text)
+
+    def publish(self, channel: RideChannel, message: dict):
+        """Encode once, hand the same text to this worker's listeners and relay it to the others"""
+        self.broadcast(channel.ride_id, message)
+
+    def broadcast(self, ride_id: int, message: dict):
+        """Publish to a ride's listeners on every worker (no database access); call on the event loop"""
+        text = orjson.dumps(jsonable_encoder(message)).decode()
+        channel = self.channels.get(ride_id)
+        if channel is not None:
+            self._deliver(channel, text)
+        if self._outbox is not None:
+            try:
+                self._outbox.put_nowait((ride_id, text))
+            except asyncio.QueueFull:
+                logger.warning(f"Tracking relay queue full, update for ride {ride_id} not sent to other workers")
+
+    def receive(self, redis_channel: str, payload: str):
+        """
+        An update relayed by another worker: keep its location (buffer and ETA state)
+        and pass it to local listeners
+        """
+        origin, _, text = payload.partition(" ")
+        if origin == self.worker_id:
+            return
+        channel = self.channels.get(int(redis_channel[len(RELAY_PREFIX):]))
+        if channel is None:
+            return
+        if text.startswith('{"type":"location"'):
+            point = orjson.loads(text)
+            point.pop("type"), point.pop("ride_id")
+            point["recorded_at"] = datetime.fromisoformat(point["recorded_at"])
+            if not channel.points or point["recorded_at"] > channel.points[-1]["recorded_at"]:
+                channel.points.append(point)
+                # Keeps this worker's ETAs current; the sender relays its own `eta` messages
+                eta_tracker.on_pings(channel.ride_id, [point])
+            channel.last_activity = time.monotonic()
+        self._deliver(channel, text)
+
+    async def relay(self, client: redis.asyncio.Redis):
+        """Publish queued updates for the other workers until cancelled or Redis fails"""
+        self._outbox = asyncio.Queue(maxsize=RELAY_QUEUE_SIZE)
+        try:
+            while True:
+                ride_id, text = await self._outbox.get()
+                await client.publish(f"{RELAY_PREFIX}{ride_id}", f"{self.worker_id} {text}")
+        finally:
+            # Nothing queues up while disconnected: a location from the outage is stale anyway
+            self._outbox = None
+
+    def snapshot(self, channel: RideChannel) -> List[dict]:
+        return list(channel.points)
+
+    # ----------------------------------------------------------- persistence
+
+    def flush(self) -> int:
+        """Write queued track rows with one multi-row INSERT per TRACKING_FLUSH_BATCH_SIZE rows"""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+
+        db = SessionLocal()
+        try:
+            batch_size = settings.TRACKING_FLUSH_BATCH_SIZE
+            for start in range(0, len(rows), batch_size):
+                db.execute(insert(RideTrack), rows[start:start + batch_size])
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            with self._pending_lock:
+                self._pending[:0] = rows  # retry on the next flush, oldest first
+            raise
+        finally:
+            db.close()
+
+    def sweep(self):
+        """Forget channels nobody has used for a while"""
+        now = time.monotonic()
+        for ride_id, channel in list(self.channels.items()):
+            if not channel.subscribers and now - channel.last_activity > CHANNEL_IDLE_SECONDS:
+                del self.channels[ride_id]
+                eta_tracker.forget(ride_id)
+
+
+tracking_hub = TrackingHub()
+
+
+def run_track_flush_job() -> int:
+    try:
+        return tracking_hub.flush()
+    except Exception as e:
+        logger.error(f"Ride track flush failed: {str(e)}")
+        return 0
+
+
+async def tracking_fanout_loop():
+    """Relay live updates between workers over Redis pub/sub, reconnecting after failures"""
+    while True:
+        client = redis.asyncio.Redis.from_url(
+            settings.REDIS_URL, socket_connect_timeout=settings.REDIS_TIMEOUT_SECONDS, decode_responses=True
+        )
+        pubsub = client.pubsub()
+        relay = None
+        try:
+            await pubsub.psubscribe(f"{RELAY_PREFIX}*")
+            relay = asyncio.create_task(tracking_hub.relay(client))
+            while not relay.done():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    tracking_hub.receive(message["channel"], message["data"])
+            relay.result()  # re-raise the publisher's Redis error
+        except (redis.RedisError, OSError) as e:
+            redis_connection.mark_down(e)
+            await asyncio.sleep(settings.REDIS_RETRY_SECONDS)
+        finally:
+            if relay is not None:
+                relay.cancel()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+async def track_flush_loop():
+    """Periodic bulk write of buffered ride_tracks rows"""
+    interval = settings.TRACKING_FLUSH_INTERVAL_SECONDS
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await run_in_threadpool(run_track_flush_job)
+            tracking_hub.sweep()
+    finally:
+        # Save what is still buffered on shutdown
+        run_track_flush_job()
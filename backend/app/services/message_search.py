@@ -0,0 +1,73 @@
+"""
+Keyword search over message text.
+
+On PostgreSQL messages are matched against the GIN index on
+`to_tsvector(SEARCH_CONFIG, content)` (see the Message model), which the
+database maintains on every insert. Other databases (SQLite in development and
+tests) have no full-text index, so this module keeps an in-process inverted
+index instead: word -> message ids, loaded from the table on the first search
+and updated as messages are created through app/db/crud/messages.py.
+"""
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy.orm import Session
+
+from app.db.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 5000
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words, the same split the 'simple' text search config makes"""
+    return _WORD.findall(text.lower())
+
+
+class MessageSearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _add(self, message_id: int, content: str):
+        for word in set(tokenize(content)):
+            self._postings.setdefault(word, set()).add(message_id)
+
+    def _load(self, db: Session):
+        count = 0
+        for message_id, content in db.query(Message.id, Message.content).yield_per(LOAD_BATCH_SIZE):
+            self._add(message_id, content)
+            count += 1
+        self._loaded = True
+        logger.info(f"Message search index loaded: {count} messages, {len(self._postings)} words")
+
+    def add(self, message_id: int, content: str):
+        """Index a new message; before the first search the load picks it up instead"""
+        with self._lock:
+            if self._loaded:
+                self._add(message_id, content)
+
+    def clear(self):
+        """Forget everything; the next search reloads from the table (e.g. after a bulk import)"""
+        with self._lock:
+            self._postings = {}
+            self._loaded = False
+
+    def search(self, db: Session, words: Iterable[str]) -> Set[int]:
+        """Ids of messages containing every word"""
+        with self._lock:
+            if not self._loaded:
+                self._load(db)
+            postings = sorted((self._postings.get(word, set()) for word in set(words)), key=len)
+            if not postings:
+                return set()
+            return set(postings[0]).intersection(*postings[1:])
+
+
+message_search_index = MessageSearchIndex()
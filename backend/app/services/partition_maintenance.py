@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import engine
+from app.db.partitioning import (
+    PARTITIONED_TABLES,
+    add_months,
+    detach_old_partitions,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _retention_months(table: str) -> int:
+    return {
+        "messages": settings.MESSAGES_RETENTION_MONTHS,
+        "ride_history": settings.RIDE_HISTORY_RETENTION_MONTHS,
+    }.get(table, 0)
+
+
+def run_partition_maintenance_job() -> dict:
+    """Create upcoming monthly partitions and detach the ones past retention, one transaction per table"""
+    this_month = month_start(datetime.now(timezone.utc))
+    changes = {}
+    for table, column in PARTITIONED_TABLES.items():
+        try:
+            with engine.begin() as conn:
+                if not is_partitioned(conn, table):
+                    continue
+                created = ensure_partitions(conn, table, column, this_month,
+                                            add_months(this_month, settings.PARTITION_MONTHS_AHEAD))
+                detached = []
+                retention = _retention_months(table)
+                if retention > 0:
+                    detached = detach_old_partitions(conn, table, add_months(this_month, -retention))
+            if created or detached:
+                logger.info(f"Partitions of {table}: created {created}, detached {detached}")
+            changes[table] = {"created": created, "detached": detached}
+        except Exception as e:
+            logger.error(f"Partition maintenance for {table} failed: {str(e)}")
+    return changes
+
+
+async def partition_maintenance_loop():
+    """Periodic job that keeps PARTITION_MONTHS_AHEAD months of partitions ready"""
+    interval = settings.PARTITION_MAINTENANCE_INTERVAL_MINUTES * 60
+    while True:
+        await run_in_threadpool(run_partition_maintenance_job)
+        await asyncio.sleep(interval)
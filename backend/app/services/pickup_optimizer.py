@@ -0,0 +1,222 @@
+"""
+Pickup and drop-off ordering for a ride with several accepted riders.
+
+The driver starts at the ride's start, must pick every rider up before
+dropping them off, and finishes at the ride's end. The ride follows its
+`main_stops` in order, so points at one of those stops are visited in stop
+order (a node's "rank" is its stop index; points elsewhere have none and can
+go anywhere). Small carpools are solved
+exactly with a dynamic program over rider states (waiting / on board / dropped
+off); larger ones use cheapest insertion followed by relocation passes.
+
+Nodes in the distance matrix are laid out as:
+0 = ride start, 1..n = pickups, n+1..2n = drop-offs, 2n+1 = ride end.
+"""
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.geo_matrix import distance_matrix, eta_minutes, ride_stop_points
+from app.services.places import normalize, place_service
+
+logger = logging.getLogger(__name__)
+
+# 3^n states x (2n)^2 transitions; 7 riders is ~0.4M steps
+EXACT_MAX_RIDERS = 7
+RELOCATION_PASSES = 3
+
+
+Ranks = Optional[Sequence[Optional[int]]]  # per node: index in main_stops, None when off the stop list
+
+
+def _route_length(dist: np.ndarray, order: List[int]) -> float:
+    return float(dist[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def follows_stops(order: List[int], ranks: Ranks) -> bool:
+    """True when the ranked nodes of `order` never go back to an earlier stop"""
+    if ranks is None:
+        return True
+    floor = -1
+    for node in order:
+        rank = ranks[node]
+        if rank is not None:
+            if rank < floor:
+                return False
+            floor = rank
+    return True
+
+
+def solve_exact(dist: np.ndarray, n: int, ranks: Ranks = None) -> List[int]:
+    """Optimal visiting order (start and end included) via DP over base-3 rider states"""
+    end = 2 * n + 1
+    powers = [3 ** i for i in range(n)]
+    # best[(state, last, floor)] = (cost, previous key); state digit 0 waiting, 1 on board, 2 dropped;
+    # floor is the latest main_stops index reached, which later ranked nodes may not go below
+    best: Dict[Tuple[int, int, int], Tuple[float, Optional[tuple]]] = {(0, 0, -1): (0.0, None)}
+    frontier = [(0, 0, -1)]
+    for _ in range(2 * n):
+        next_frontier = {}
+        for key in frontier:
+            state, last, floor = key
+            cost = best[key][0]
+            for rider in range(n):
+                digit = state // powers[rider] % 3
+                if digit == 2:
+                    continue
+                node = rider + 1 if digit == 0 else rider + 1 + n
+                rank = ranks[node] if ranks is not None else None
+                if rank is not None and rank < floor:
+                    continue
+                new_key = (state + powers[rider], node, floor if rank is None else rank)
+                new_cost = cost + dist[last, node]
+                if new_key not in best or new_cost < best[new_key][0]:
+                    best[new_key] = (new_cost, key)
+                    next_frontier[new_key] = True
+        frontier = list(next_frontier)
+
+    final_state = sum(2 * p for p in powers)
+    last_key = min(
+        (key for key in frontier if key[0] == final_state),
+        key=lambda k: best[k][0] + dist[k[1], end],
+    ) if n else (0, 0, -1)
+
+    order = [end]
+    key = last_key
+    while key is not None:
+        order.append(key[1])
+        key = best[key][1]
+    order.reverse()
+    return order
+
+
+def _insert_rider(dist: np.ndarray, order: List[int], pickup: int, dropoff: int,
+                  ranks: Ranks = None) -> List[int]:
+    """Cheapest feasible positions for a pickup / drop-off pair (pickup first, stop order kept)"""
+    best_cost, best_order = np.inf, None
+    for i in range(1, len(order)):
+        added_pickup = dist[order[i - 1], pickup] + dist[pickup, order[i]] - dist[order[i - 1], order[i]]
+        with_pickup = order[:i] + [pickup] + order[i:]
+        if not follows_stops(with_pickup, ranks):
+            continue
+        for j in range(i + 1, len(with_pickup)):
+            a, b = with_pickup[j - 1], with_pickup[j]
+            cost = added_pickup + dist[a, dropoff] + dist[dropoff, b] - dist[a, b]
+            if cost < best_cost:
+                candidate = with_pickup[:j] + [dropoff] + with_pickup[j:]
+                if follows_stops(candidate, ranks):
+                    best_cost, best_order = cost, candidate
+    return best_order
+
+
+def solve_heuristic(dist: np.ndarray, n: int, ranks: Ranks = None) -> List[int]:
+    """Cheapest insertion (farthest riders first), then re-insert each rider while it helps"""
+    end = 2 * n + 1
+    order = [0, end]
+    # Riders whose pickup is furthest from the start shape the route, insert them first
+    for rider in sorted(range(n), key=lambda r: -dist[0, r + 1]):
+        order = _insert_rider(dist, order, rider + 1, rider + 1 + n, ranks)
+
+    for _ in range(RELOCATION_PASSES):
+        improved = False
+        for rider in range(n):
+            pickup, dropoff = rider + 1, rider + 1 + n
+            current = _route_length(dist, order)
+            without = [node for node in order if node not in (pickup, dropoff)]
+            candidate = _insert_rider(dist, without, pickup, dropoff, ranks)
+            if _route_length(dist, candidate) < current - 1e-9:
+                order, improved = candidate, True
+        if not improved:
+            break
+    return order
+
+
+def optimize_order(dist: np.ndarray, n: int, ranks: Ranks = None) -> Tuple[List[int], str]:
+    if n <= EXACT_MAX_RIDERS:
+        return solve_exact(dist, n, ranks), "exact"
+    return solve_heuristic(dist, n, ranks), "heuristic"
+
+
+def _stop_point(name: str, stop_index: Dict[str, int], stop_points: np.ndarray, fallback) -> tuple:
+    """Coordinates of a named stop: the ride's own stop, else the place index, else `fallback`"""
+    key = normalize(name or "")
+    if key in stop_index:
+        return tuple(stop_points[stop_index[key]])
+    place = place_service.geocode(name) if key else None
+    if place:
+        return place["latitude"], place["longitude"]
+    return tuple(fallback)
+
+
+def plan_pickups(ride, requests) -> Optional[dict]:
+    """
+    Best pickup / drop-off sequence for a ride's accepted requests.
+
+    Returns None when the ride has no coordinates to plan with.
+    """
+    stop_points = ride_stop_points(ride)
+    if stop_points is None:
+        return None
+    stop_names = list(ride.main_stops or []) if len(ride.main_stops or []) >= 2 \
+        else [ride.start_location, ride.end_location]
+    stop_index = {}
+    for i, name in enumerate(stop_names):
+        stop_index.setdefault(normalize(name), i)
+
+    n = len(requests)
+    start, end = stop_points[0], stop_points[-1]
+    points = [tuple(start)]
+    points += [_stop_point(r.joining_stop, stop_index, stop_points, start) for r in requests]
+    points += [_stop_point(r.ending_stop, stop_index, stop_points, end) for r in requests]
+    points.append(tuple(end))
+    dist = distance_matrix(points, mode="road")
+
+    def rank(name):
+        return stop_index.get(normalize(name or ""))
+
+    ranks = [0] + [rank(r.joining_stop) for r in requests] + [rank(r.ending_stop) for r in requests] \
+        + [len(stop_names) - 1]
+    for i, request in enumerate(requests):
+        pickup, dropoff = ranks[i + 1], ranks[i + 1 + n]
+        if pickup is not None and dropoff is not None and pickup > dropoff:
+            # Rides against the stop order (bad data): leave that rider unconstrained, else no plan exists
+            logger.warning(f"Request {request.id} boards after it alights on ride {ride.id}")
+            ranks[i + 1] = ranks[i + 1 + n] = None
+
+    order, method = optimize_order(dist, n, ranks)
+    request_order = [0] + [node for i in range(n) for node in (i + 1, i + 1 + n)] + [2 * n + 1]
+
+    stops = []
+    travelled = 0.0
+    for previous, node in zip(order, order[1:]):
+        travelled += dist[previous, node]
+        if node == 2 * n + 1:
+            break
+        rider = (node - 1) % n
+        request = requests[rider]
+        pickup = node <= n
+        stops.append({
+            "request_id": request.id,
+            "rider_id": request.rider_id,
+            "rider_name": request.rider.name if request.rider else None,
+            "action": "pickup" if pickup else "dropoff",
+            "stop": request.joining_stop if pickup else request.ending_stop,
+            "latitude": round(points[node][0], 6),
+            "longitude": round(points[node][1], 6),
+            "distance_from_start_km": round(float(travelled), 2),
+            "eta_minutes": int(round(float(eta_minutes(travelled)))),
+        })
+
+    total = _route_length(dist, order)
+    direct = float(dist[0, 2 * n + 1])
+    return {
+        "ride_id": ride.id,
+        "method": method,
+        "stops": stops,
+        "total_distance_km": round(total, 2),
+        "direct_distance_km": round(direct, 2),
+        "added_detour_km": round(total - direct, 2),
+        "request_order_distance_km": round(_route_length(dist, request_order), 2),
+        "total_duration_minutes": int(round(float(eta_minutes(total)))),
+    }
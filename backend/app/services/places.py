@@ -0,0 +1,215 @@
+"""
+Place autocomplete and geocoding served from memory.
+
+Places come from the bundled Karachi dataset plus addresses that several users
+have saved as preferred locations. Every word start of a place name is inserted
+into a character trie whose nodes keep the most popular matches, so a lookup is
+a walk down the typed prefix. When that node is full and its matches do not
+fill the page, the places are scanned instead. Hot queries are answered from a
+small LRU.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.models.location import PreferredLocation
+
+logger = logging.getLogger(__name__)
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "karachi_places.json")
+MAX_PREFIX_LENGTH = 24  # deeper prefixes are confirmed by filtering the candidates
+NODE_CAPACITY = 50      # best places kept per trie node
+SAVED_PLACE_POPULARITY = 10  # popularity per user who saved an address
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+class _TrieNode:
+    __slots__ = ("children", "places")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.places: List[int] = []
+
+
+class PlaceIndex:
+    def __init__(self, places: List[dict]):
+        # Inserting in popularity order keeps every node's list ranked without sorting
+        self.places = sorted(places, key=lambda p: -p["popularity"])
+        self.root = _TrieNode()
+        self.by_name: Dict[str, int] = {}
+        self._name_tokens: List[List[str]] = []
+        self._tokens: List[List[str]] = []
+        for place_id, place in enumerate(self.places):
+            key = normalize(place["name"])
+            self.by_name.setdefault(key, place_id)
+            tokens = key.split()
+            self._name_tokens.append(tokens)
+            self._tokens.append(tokens + normalize(place.get("area") or "").split())
+            for start in self._word_starts(key):
+                self._insert(key[start:start + MAX_PREFIX_LENGTH], place_id)
+
+    @staticmethod
+    def _word_starts(key: str):
+        yield 0
+        for match in re.finditer(" ", key):
+            yield match.end()
+
+    def _insert(self, key: str, place_id: int):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if len(node.places) < NODE_CAPACITY and place_id not in node.places:
+                node.places.append(place_id)
+
+    def _candidates(self, prefix: str) -> List[int]:
+        node = self.root
+        for char in prefix[:MAX_PREFIX_LENGTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.places
+
+    def _matches(self, candidates, words: List[str], limit: int) -> List[dict]:
+        results = []
+        for place_id in candidates:
+            tokens = self._tokens[place_id]
+            if any(token.startswith(words[0]) for token in self._name_tokens[place_id]) \
+                    and all(any(token.startswith(word) for token in tokens) for word in words[1:]):
+                results.append(self.places[place_id])
+                if len(results) == limit:
+                    break
+        return results
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        key = normalize(query)
+        if not key:
+            return []
+        words = key.split()
+        # The first word walks the trie; every word must then start one of the place's words
+        candidates = self._candidates(words[0])
+        results = self._matches(candidates, words, limit)
+        if len(results) < limit and len(candidates) >= NODE_CAPACITY:
+            # The node is full, so less popular matches were never stored there: scan in popularity order
+            results = self._matches(range(len(self.places)), words, limit)
+        return results
+
+    def geocode(self, query: str) -> Optional[dict]:
+        place_id = self.by_name.get(normalize(query))
+        if place_id is not None:
+            return self.places[place_id]
+        matches = self.search(query, 1)
+        return matches[0] if matches else None
+
+
+def _load_dataset() -> List[dict]:
+    with open(DATASET_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _saved_places(db) -> List[dict]:
+    """
+    Addresses saved by at least PLACES_MIN_SHARED_SAVES different users.
+
+    Single-user entries are left out so nobody's home address shows up for others.
+    """
+    rows = db.query(
+        PreferredLocation.address,
+        func.avg(PreferredLocation.latitude).label("latitude"),
+        func.avg(PreferredLocation.longitude).label("longitude"),
+        func.count(func.distinct(PreferredLocation.user_id)).label("users"),
+    ).filter(
+        PreferredLocation.latitude.isnot(None),
+        PreferredLocation.longitude.isnot(None),
+    ).group_by(PreferredLocation.address).having(
+        func.count(func.distinct(PreferredLocation.user_id)) >= settings.PLACES_MIN_SHARED_SAVES
+    ).all()
+    return [{
+        "name": row.address,
+        "area": None,
+        "latitude": float(row.latitude),
+        "longitude": float(row.longitude),
+        "popularity": row.users * SAVED_PLACE_POPULARITY,
+    } for row in rows]
+
+
+class PlaceService:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._index: Optional[PlaceIndex] = None
+        self._lru: "OrderedDict[tuple, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rebuild(self, db=None):
+        places = _load_dataset()
+        if db is not None:
+            known = {normalize(p["name"]): p for p in places}
+            for saved in _saved_places(db):
+                existing = known.get(normalize(saved["name"]))
+                if existing:
+                    existing["popularity"] += saved["popularity"]
+                else:
+                    places.append(saved)
+        index = PlaceIndex(places)
+        with self._lock:
+            self._index = index
+            self._lru.clear()
+        logger.info(f"Place index built with {len(index.places)} places")
+
+    @property
+    def index(self) -> PlaceIndex:
+        if self._index is None:
+            self.rebuild()
+        return self._index
+
+    def autocomplete(self, query: str, limit: int) -> List[dict]:
+        key = (normalize(query), limit)
+        with self._lock:
+            cached = self._lru.get(key)
+            if cached is not None:
+                self._lru.move_to_end(key)
+                return cached
+        results = self.index.search(query, limit)
+        with self._lock:
+            self._lru[key] = results
+            if len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+        return results
+
+    def geocode(self, query: str) -> Optional[dict]:
+        return self.index.geocode(query)
+
+
+place_service = PlaceService(settings.PLACES_CACHE_MAX_ENTRIES)
+
+
+def run_place_index_job():
+    db = SessionLocal()
+    try:
+        place_service.rebuild(db)
+    except Exception as e:
+        logger.error(f"Place index rebuild failed: {str(e)}")
+    finally:
+        db.close()
+
+
+async def place_index_loop():
+    """Periodically fold users' shared saved addresses into the place index"""
+    interval = settings.PLACES_INDEX_REFRESH_MINUTES * 60
+    while True:
+        await run_in_threadpool(run_place_index_job)
+        await asyncio.sleep(interval)
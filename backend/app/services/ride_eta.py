@@ -0,0 +1,176 @@
+"""
+Per-stop arrival estimates from the live driver track.
+
+A ride's ordered stops form a polyline in a local flat (km) frame built once per
+ride. Each ping is projected onto the few segments at and after the driver's
+current one, which gives the distance travelled along the route; a smoothed
+speed from consecutive projections turns the remaining distance to every stop
+into minutes. Listeners only get an update when some stop's ETA moved by at
+least ETA_PUSH_THRESHOLD_MINUTES or a stop was passed.
+"""
+import logging
+import math
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.models.ride import Ride
+from app.db.models.ride_track import RideTrack
+from app.services.geo_matrix import ride_stop_points
+
+logger = logging.getLogger(__name__)
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON_EQUATOR = 111.320
+SEARCH_WINDOW = 3          # segments checked from the current one on each ping
+SPEED_SMOOTHING = 0.3      # weight of the newest speed sample
+MIN_SPEED_KMH = 5.0        # floor so a stopped car does not produce endless ETAs
+MAX_SPEED_KMH = 100.0
+BACKTRACK_TOLERANCE_KM = 0.2  # GPS jitter allowed before progress is treated as backwards
+SEED_PINGS = 10  # latest saved pings replayed when a worker loads a ride already under way
+
+
+class RideEta:
+    def __init__(self, ride_id: int, names: List[str], points: np.ndarray):
+        self.ride_id = ride_id
+        self.names = names
+        self.kx = KM_PER_DEGREE_LON_EQUATOR * math.cos(math.radians(float(points[:, 0].mean())))
+        xy = np.column_stack((points[:, 1] * self.kx, points[:, 0] * KM_PER_DEGREE_LAT))
+        self.origins = xy[:-1]
+        self.vectors = np.diff(xy, axis=0)
+        self.lengths = np.hypot(self.vectors[:, 0], self.vectors[:, 1])
+        self.offsets = np.concatenate(([0.0], np.cumsum(self.lengths)))  # km along the polyline per stop
+
+        self.segment = 0
+        self.progress = 0.0
+        self.speed_kmh: Optional[float] = None
+        self.last_time = None
+        self.pushed: Dict[int, float] = {}
+
+    def _project(self, latitude: float, longitude: float) -> tuple:
+        """(segment, km along the route) of the closest point in the search window"""
+        end = min(len(self.lengths), self.segment + SEARCH_WINDOW)
+        window = slice(self.segment, end)
+        origins, vectors, lengths = self.origins[window], self.vectors[window], self.lengths[window]
+        point = np.array([longitude * self.kx, latitude * KM_PER_DEGREE_LAT])
+        relative = point - origins
+        t = np.clip(np.einsum("ij,ij->i", relative, vectors) / np.maximum(lengths ** 2, 1e-12), 0.0, 1.0)
+        distance = np.hypot(*(relative - t[:, None] * vectors).T)
+        best = int(np.argmin(distance))
+        segment = self.segment + best
+        return segment, float(self.offsets[segment] + t[best] * lengths[best])
+
+    def update(self, point: dict):
+        """Advance the driver along the route with one ping (incremental, O(SEARCH_WINDOW))"""
+        if len(self.lengths) == 0:
+            return
+        segment, progress = self._project(point["latitude"], point["longitude"])
+        if progress < self.progress - BACKTRACK_TOLERANCE_KM:
+            # Off-route or jitter behind the driver: keep the last good position, but the time
+            # moves on so the next speed sample and arrival times start from this ping
+            self.last_time = point["recorded_at"]
+            return
+        advanced = max(0.0, progress - self.progress)
+        if progress >= self.progress:
+            self.segment, self.progress = segment, progress
+
+        if self.last_time is not None:
+            minutes = (point["recorded_at"] - self.last_time).total_seconds() / 60.0
+            if minutes > 0:
+                sample = advanced * settings.ROAD_CIRCUITY_FACTOR / minutes * 60.0
+                self.speed_kmh = sample if self.speed_kmh is None else \
+                    SPEED_SMOOTHING * sample + (1 - SPEED_SMOOTHING) * self.speed_kmh
+        elif point.get("speed") is not None:
+            self.speed_kmh = point["speed"] * 3.6
+        self.last_time = point["recorded_at"]
+
+    def etas(self) -> List[dict]:
+        speed = min(max(self.speed_kmh or settings.AVERAGE_SPEED_KMH, MIN_SPEED_KMH), MAX_SPEED_KMH)
+        remaining = []
+        for index in range(len(self.names)):
+            left_km = (self.offsets[index] - self.progress) * settings.ROAD_CIRCUITY_FACTOR
+            if left_km <= 0:
+                continue
+            minutes = float(left_km / speed * 60.0)
+            remaining.append({
+                "index": index,
+                "stop": self.names[index],
+                "distance_km": round(float(left_km), 2),
+                "eta_minutes": round(minutes, 1),
+                "arrival_at": self.last_time + timedelta(minutes=minutes) if self.last_time else None,
+            })
+        return remaining
+
+    def changed(self, etas: List[dict]) -> bool:
+        """Whether these ETAs differ enough from the last pushed ones to notify listeners"""
+        current = {eta["index"]: eta["eta_minutes"] for eta in etas}
+        if current.keys() != self.pushed.keys():
+            return True
+        threshold = settings.ETA_PUSH_THRESHOLD_MINUTES
+        return any(abs(minutes - self.pushed[index]) >= threshold for index, minutes in current.items())
+
+
+class EtaTracker:
+    def __init__(self):
+        self.rides: Dict[int, Optional[RideEta]] = {}
+
+    def loaded(self, ride_id: int) -> bool:
+        return ride_id in self.rides
+
+    def load(self, ride_id: int):
+        """
+        Build a ride's route state from the database, starting from the driver's latest
+        saved pings; blocking, so run it in the threadpool
+        """
+        if ride_id in self.rides:
+            return
+        db = SessionLocal()
+        try:
+            ride = db.query(Ride).filter(Ride.id == ride_id).first()
+            points = ride_stop_points(ride) if ride else None
+            names = list(ride.main_stops or []) if ride and len(ride.main_stops or []) >= 2 \
+                else ([ride.start_location, ride.end_location] if ride else [])
+            recent = db.query(
+                RideTrack.latitude, RideTrack.longitude, RideTrack.speed, RideTrack.recorded_at
+            ).filter(RideTrack.ride_id == ride_id).order_by(
+                RideTrack.recorded_at.desc()
+            ).limit(SEED_PINGS).all() if points is not None else []
+        finally:
+            db.close()
+        state = RideEta(ride_id, names, points) if points is not None else None
+        for row in reversed(recent):
+            state.update(row._asdict())
+        self.rides[ride_id] = state
+
+    def state(self, ride_id: int) -> Optional[RideEta]:
+        """
+        Route state for a ride; None when the ride has no coordinates or was not loaded
+        yet (TrackingHub.channel loads it, so the event loop never queries here)
+        """
+        return self.rides.get(ride_id)
+
+    def on_pings(self, ride_id: int, points: List[dict]) -> Optional[dict]:
+        """Fold new pings in; returns an `eta` message when listeners should be updated"""
+        state = self.state(ride_id)
+        if state is None:
+            return None
+        for point in points:
+            state.update(point)
+        etas = state.etas()
+        if not state.changed(etas):
+            return None
+        state.pushed = {eta["index"]: eta["eta_minutes"] for eta in etas}
+        return {"type": "eta", "ride_id": ride_id, "stops": etas}
+
+    def current(self, ride_id: int) -> List[dict]:
+        state = self.state(ride_id)
+        return state.etas() if state and state.last_time else []
+
+    def forget(self, ride_id: int):
+        self.rides.pop(ride_id, None)
+
+
+eta_tracker = EtaTracker()
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.crud.ride_lifecycle import archive_old_rides, auto_end_started_rides, expire_overdue_rides
+
+logger = logging.getLogger(__name__)
+
+
+def run_ride_lifecycle_job() -> dict:
+    db = SessionLocal()
+    try:
+        batch_size = settings.RIDE_LIFECYCLE_BATCH_SIZE
+        expired = expire_overdue_rides(db, settings.RIDE_EXPIRE_GRACE_MINUTES, batch_size)
+        ended = auto_end_started_rides(db, settings.RIDE_AUTO_END_HOURS, batch_size)
+        archived, driver_ids = archive_old_rides(db, settings.RIDE_ARCHIVE_AFTER_DAYS, batch_size)
+        if expired or ended or archived:
+            response_cache.invalidate("ride")
+        for driver_id in driver_ids:
+            response_cache.invalidate("user", driver_id)  # rides_offered changed
+        logger.info(f"Ride lifecycle expired {expired}, auto-ended {ended}, archived {archived} rides")
+        return {"expired": expired, "ended": ended, "archived": archived}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Ride lifecycle job failed: {str(e)}")
+        return {"expired": 0, "ended": 0, "archived": 0}
+    finally:
+        db.close()
+
+
+async def ride_lifecycle_loop():
+    """Periodic job that retires overdue rides and moves old ones out of the hot tables"""
+    interval = settings.RIDE_LIFECYCLE_INTERVAL_MINUTES * 60
+    while True:
+        await run_in_threadpool(run_ride_lifecycle_job)
+        await asyncio.sleep(interval)
@@ -0,0 +1,32 @@
+import asyncio
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.crud.ride_template import generate_ride_instances
+
+logger = logging.getLogger(__name__)
+
+
+def run_ride_generation_job() -> int:
+    db = SessionLocal()
+    try:
+        count = generate_ride_instances(db, settings.RIDE_TEMPLATE_DAYS_AHEAD)
+        logger.info(f"Ride scheduler created {count} rides from templates")
+        return count
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Ride scheduler failed: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+
+async def ride_generation_loop():
+    """Periodic job that keeps the next RIDE_TEMPLATE_DAYS_AHEAD days of template rides in place"""
+    interval = settings.RIDE_TEMPLATE_INTERVAL_MINUTES * 60
+    while True:
+        await run_in_threadpool(run_ride_generation_job)
+        await asyncio.sleep(interval)
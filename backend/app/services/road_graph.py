@@ -0,0 +1,445 @@
+"""
+Offline road routing over an OpenStreetMap extract.
+
+The OSM file is compiled once (see build_road_graph.py) into a compact,
+array-backed graph saved as .npz; the app only ever loads that file:
+
+- junction nodes only (shape points between junctions are folded into edge lengths)
+- forward and reverse CSR adjacency with per-edge length, travel time and road name
+- ALT landmark tables (travel time from/to a few far-apart landmarks), which give
+  A* an admissible lower bound and keep searches to a small part of the city
+
+At request time a route is a nearest-node lookup plus an ALT A* search, and the
+ordered stops come from named junctions and road changes along the path.
+"""
+import bz2
+import gzip
+import heapq
+import logging
+import math
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+
+# Default speeds (km/h) by OSM highway type when no maxspeed tag is present
+HIGHWAY_SPEEDS = {
+    "motorway": 80, "motorway_link": 50,
+    "trunk": 60, "trunk_link": 40,
+    "primary": 50, "primary_link": 35,
+    "secondary": 40, "secondary_link": 30,
+    "tertiary": 35, "tertiary_link": 25,
+    "unclassified": 30, "residential": 25,
+    "living_street": 10, "service": 15, "road": 25,
+}
+NUM_LANDMARKS = 8
+MIN_STOP_SPACING_M = 800  # avoid listing junctions that are practically next to each other
+MAX_STOPS = 6
+KMH_PER_MPH = 1.609344
+_MAXSPEED = re.compile(r"^(\d+(?:\.\d+)?)\s*(mph|km/h|kmh|kph)?$")
+
+
+def _open(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _speed_kmh(tags: Dict[str, str]) -> float:
+    # "50", "30 mph", "50;60" (first value); "none", "signals", "PK:urban" use the road type default
+    match = _MAXSPEED.match(tags.get("maxspeed", "").split(";")[0].strip().lower())
+    if match and float(match.group(1)) > 0:
+        speed = float(match.group(1))
+        return speed * KMH_PER_MPH if match.group(2) == "mph" else speed
+    return float(HIGHWAY_SPEEDS[tags["highway"]])
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _csr(n: int, src: np.ndarray, order_key: np.ndarray):
+    order = np.argsort(order_key, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(indptr, src + 1, 1)
+    return np.cumsum(indptr), order
+
+
+class RoadGraph:
+    def __init__(self, lat, lon, node_names, indptr, targets, weights, lengths, edge_names,
+                 rev_indptr, rev_targets, rev_weights, names, lm_from, lm_to):
+        self.lat = lat
+        self.lon = lon
+        self.node_names = node_names      # int32 index into names, -1 when unnamed
+        self.indptr = indptr              # forward CSR
+        self.targets = targets
+        self.weights = weights            # travel time, seconds
+        self.lengths = lengths            # meters
+        self.edge_names = edge_names      # int32 index into names, -1 when unnamed
+        self.rev_indptr = rev_indptr      # reverse CSR (for landmark preprocessing)
+        self.rev_targets = rev_targets
+        self.rev_weights = rev_weights
+        self.names = names
+        self.lm_from = lm_from            # (N, K) travel time landmark -> node
+        self.lm_to = lm_to                # (N, K) travel time node -> landmark
+        self._cos_lat = math.cos(math.radians(float(np.mean(lat)))) if len(lat) else 1.0
+        # Python lists make the inner A* loop noticeably faster than NumPy scalar access
+        self._indptr = indptr.tolist()
+        self._targets = targets.tolist()
+        self._weights = weights.tolist()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lat)
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_osm(cls, path: str) -> "RoadGraph":
+        """Compile an .osm / .osm.bz2 / .osm.gz extract into a routing graph"""
+        ways = []
+        node_use: Dict[int, int] = {}
+        with _open(path) as f:
+            for _, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == "way":
+                    tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                    if tags.get("highway") in HIGHWAY_SPEEDS and tags.get("access") not in ("private", "no"):
+                        refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                        if len(refs) >= 2:
+                            oneway = tags.get("oneway")
+                            if oneway == "-1":
+                                refs.reverse()
+                            is_oneway = oneway in ("yes", "1", "-1") or \
+                                tags.get("junction") == "roundabout" or tags["highway"] == "motorway"
+                            ways.append((refs, tags.get("name") or tags.get("ref"), _speed_kmh(tags), is_oneway))
+                            for i, ref in enumerate(refs):
+                                # endpoints count twice so they always become junctions
+                                node_use[ref] = node_use.get(ref, 0) + (2 if i in (0, len(refs) - 1) else 1)
+                    elem.clear()
+                elif elem.tag == "node":
+                    elem.clear()
+
+        coords: Dict[int, tuple] = {}
+        named: Dict[int, str] = {}
+        with _open(path) as f:
+            for _, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == "node":
+                    node_id = int(elem.get("id"))
+                    if node_id in node_use:
+                        coords[node_id] = (float(elem.get("lat")), float(elem.get("lon")))
+                        for tag in elem.iter("tag"):
+                            if tag.get("k") == "name":
+                                named[node_id] = tag.get("v")
+                    elem.clear()
+                elif elem.tag in ("way", "relation"):
+                    elem.clear()
+
+        names: List[str] = []
+        name_ids: Dict[str, int] = {}
+
+        def name_id(name: Optional[str]) -> int:
+            if not name:
+                return -1
+            if name not in name_ids:
+                name_ids[name] = len(names)
+                names.append(name)
+            return name_ids[name]
+
+        junction_index: Dict[int, int] = {}
+
+        def junction(node_id: int) -> int:
+            if node_id not in junction_index:
+                junction_index[node_id] = len(junction_index)
+            return junction_index[node_id]
+
+        src, dst, length, seconds, edge_name = [], [], [], [], []
+        for refs, way_name, speed, is_oneway in ways:
+            refs = [ref for ref in refs if ref in coords]
+            if len(refs) < 2:
+                continue
+            way_name_id = name_id(way_name)
+            points = np.array([coords[ref] for ref in refs])
+            segment = _haversine_m(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+            start, acc = refs[0], 0.0
+            for i in range(1, len(refs)):
+                acc += float(segment[i - 1])
+                ref = refs[i]
+                if node_use[ref] >= 2 or ref in named or i == len(refs) - 1:
+                    if ref != start:
+                        a, b = junction(start), junction(ref)
+                        travel = acc / (speed / 3.6)
+                        src.append(a); dst.append(b); length.append(acc); seconds.append(travel)
+                        edge_name.append(way_name_id)
+                        if not is_oneway:
+                            src.append(b); dst.append(a); length.append(acc); seconds.append(travel)
+                            edge_name.append(way_name_id)
+                    start, acc = ref, 0.0
+
+        node_ids = np.empty(len(junction_index), dtype=np.int64)
+        for node_id, index in junction_index.items():
+            node_ids[index] = node_id
+        lat = np.array([coords[n][0] for n in node_ids], dtype=np.float64)
+        lon = np.array([coords[n][1] for n in node_ids], dtype=np.float64)
+        node_names = np.array([name_id(named.get(int(n))) for n in node_ids], dtype=np.int32)
+
+        return cls._assemble(
+            lat, lon, node_names,
+            np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64),
+            np.array(seconds, dtype=np.float32), np.array(length, dtype=np.float32),
+            np.array(edge_name, dtype=np.int32), names,
+        )
+
+    @classmethod
+    def _assemble(cls, lat, lon, node_names, src, dst, seconds, length, edge_name, names) -> "RoadGraph":
+        graph = cls._assemble_raw(lat, lon, node_names, src, dst, seconds, length, edge_name, names)
+        graph = graph._largest_component()
+        graph._build_landmarks(NUM_LANDMARKS)
+        return graph
+
+    def _largest_component(self) -> "RoadGraph":
+        """Keep the strongly connected part around the busiest junction so every route exists"""
+        if self.node_count == 0:
+            return self
+        degree = np.diff(self.indptr)
+        root = int(np.argmax(degree))
+        forward = np.isfinite(self._dijkstra(root, self.indptr, self.targets, self.weights))
+        backward = np.isfinite(self._dijkstra(root, self.rev_indptr, self.rev_targets, self.rev_weights))
+        keep = forward & backward
+        if keep.all():
+            return self
+
+        remap = -np.ones(self.node_count, dtype=np.int64)
+        remap[keep] = np.arange(int(keep.sum()))
+        src = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        dst = self.targets.astype(np.int64)
+        edge_keep = keep[src] & keep[dst]
+        return RoadGraph._assemble_raw(
+            self.lat[keep], self.lon[keep], self.node_names[keep],
+            remap[src[edge_keep]], remap[dst[edge_keep]],
+            self.weights[edge_keep], self.lengths[edge_keep], self.edge_names[edge_keep], self.names,
+        )
+
+    @classmethod
+    def _assemble_raw(cls, lat, lon, node_names, src, dst, seconds, length, edge_name, names) -> "RoadGraph":
+        n = len(lat)
+        indptr, order = _csr(n, src, src)
+        rev_indptr, rev_order = _csr(n, dst, dst)
+        return cls(
+            lat, lon, node_names,
+            indptr, dst[order].astype(np.int32), seconds[order], length[order], edge_name[order],
+            rev_indptr, src[rev_order].astype(np.int32), seconds[rev_order],
+            names, np.zeros((n, 0), dtype=np.float32), np.zeros((n, 0), dtype=np.float32),
+        )
+
+    @staticmethod
+    def _dijkstra(source: int, indptr, targets, weights) -> np.ndarray:
+        n = len(indptr) - 1
+        dist = np.full(n, np.inf)
+        dist[source] = 0.0
+        indptr, targets, weights = indptr.tolist(), targets.tolist(), weights.tolist()
+        heap = [(0.0, source)]
+        done = bytearray(n)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = 1
+            for e in range(indptr[u], indptr[u + 1]):
+                v = targets[e]
+                nd = d + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def _build_landmarks(self, k: int):
+        """Farthest-point landmark selection, then one forward and one reverse Dijkstra each"""
+        n = self.node_count
+        if n == 0:
+            return
+        k = min(k, n)
+        lm_from = np.zeros((k, n), dtype=np.float32)
+        lm_to = np.zeros((k, n), dtype=np.float32)
+        landmark = int(np.argmax(self.lat + self.lon))
+        closest = np.full(n, np.inf)
+        for i in range(k):
+            lm_from[i] = self._dijkstra(landmark, self.indptr, self.targets, self.weights)
+            lm_to[i] = self._dijkstra(landmark, self.rev_indptr, self.rev_targets, self.rev_weights)
+            closest = np.minimum(closest, lm_from[i])
+            landmark = int(np.argmax(closest))
+        self.lm_from = np.ascontiguousarray(lm_from.T)
+        self.lm_to = np.ascontiguousarray(lm_to.T)
+
+    # ---------------------------------------------------------------- persist
+
+    def save(self, path: str):
+        # Names go in as one UTF-8 buffer plus offsets, so loading never needs pickle
+        encoded = [name.encode("utf-8") for name in self.names]
+        name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        name_offsets[1:] = np.cumsum([len(name) for name in encoded])
+        np.savez_compressed(
+            path,
+            lat=self.lat, lon=self.lon, node_names=self.node_names,
+            indptr=self.indptr, targets=self.targets, weights=self.weights,
+            lengths=self.lengths, edge_names=self.edge_names,
+            rev_indptr=self.rev_indptr, rev_targets=self.rev_targets, rev_weights=self.rev_weights,
+            name_bytes=np.frombuffer(b"".join(encoded), dtype=np.uint8), name_offsets=name_offsets,
+            lm_from=self.lm_from, lm_to=self.lm_to,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        """Load a graph written by `save`; raw OSM extracts must go through build_road_graph.py first"""
+        if not path.endswith(".npz"):
+            raise ValueError(f"{path} is not a compiled road graph; build one with build_road_graph.py")
+        data = np.load(path, allow_pickle=False)
+        if "name_bytes" not in data:
+            raise ValueError(f"{path} was built by an older version; rebuild it with build_road_graph.py")
+        name_bytes, offsets = data["name_bytes"].tobytes(), data["name_offsets"].tolist()
+        names = [name_bytes[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+        return cls(
+            data["lat"], data["lon"], data["node_names"],
+            data["indptr"], data["targets"], data["weights"], data["lengths"], data["edge_names"],
+            data["rev_indptr"], data["rev_targets"], data["rev_weights"],
+            names, data["lm_from"], data["lm_to"],
+        )
+
+    # ----------------------------------------------------------------- query
+
+    def nearest_node(self, lat: float, lon: float) -> int:
+        d = (self.lat - lat) ** 2 + ((self.lon - lon) * self._cos_lat) ** 2
+        return int(np.argmin(d))
+
+    def shortest_path(self, source: int, target: int) -> Optional[tuple]:
+        """ALT A*; returns (node path, edge path) or None"""
+        if source == target:
+            return [source], []
+        lm_from, lm_to = self.lm_from, self.lm_to
+        from_t, to_t = lm_from[target], lm_to[target]
+        heuristic_cache = {}
+
+        def h(v):
+            value = heuristic_cache.get(v)
+            if value is None:
+                if lm_from.shape[1] == 0:
+                    value = 0.0
+                else:
+                    value = max(0.0, float(max((from_t - lm_from[v]).max(), (lm_to[v] - to_t).max())))
+                heuristic_cache[v] = value
+            return value
+
+        indptr, targets, weights = self._indptr, self._targets, self._weights
+        dist = {source: 0.0}
+        parent_edge = {}
+        closed = set()
+        heap = [(h(source), source)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            if u == target:
+                break
+            closed.add(u)
+            du = dist[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = targets[e]
+                nd = du + weights[e]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    parent_edge[v] = (u, e)
+                    heapq.heappush(heap, (nd + h(v), v))
+        if target not in dist:
+            return None
+
+        nodes, edges = [target], []
+        while nodes[-1] != source:
+            u, e = parent_edge[nodes[-1]]
+            edges.append(e)
+            nodes.append(u)
+        nodes.reverse()
+        edges.reverse()
+        return nodes, edges
+
+    def route(self, start_lat: float, start_lon: float, end_lat: float, end_lon: float) -> Optional[dict]:
+        source = self.nearest_node(start_lat, start_lon)
+        target = self.nearest_node(end_lat, end_lon)
+        result = self.shortest_path(source, target)
+        if result is None:
+            return None
+        nodes, edges = result
+        edge_index = np.array(edges, dtype=np.int64)
+        return {
+            "nodes": nodes,
+            "distance_km": round(float(self.lengths[edge_index].sum()) / 1000.0, 2),
+            "duration_minutes": max(1, int(round(float(self.weights[edge_index].sum()) / 60.0))),
+            "stops": self._stops(nodes, edges),
+        }
+
+    def _stops(self, nodes: List[int], edges: List[int]) -> List[str]:
+        """Named junctions on the path, falling back to the road being joined"""
+        candidates = []  # (distance along route, name)
+        travelled = 0.0
+        previous_road = -1
+        for i, e in enumerate(edges):
+            road = int(self.edge_names[e])
+            junction_name = int(self.node_names[nodes[i]])
+            if i > 0 and junction_name >= 0:
+                candidates.append((travelled, self.names[junction_name]))
+            elif i > 0 and road >= 0 and road != previous_road:
+                candidates.append((travelled, self.names[road]))
+            if road >= 0:
+                previous_road = road
+            travelled += float(self.lengths[e])
+
+        stops, last_at = [], -MIN_STOP_SPACING_M
+        for at, name in candidates:
+            if at - last_at >= MIN_STOP_SPACING_M and name not in stops:
+                stops.append(name)
+                last_at = at
+        if len(stops) > MAX_STOPS:
+            step = len(stops) / MAX_STOPS
+            stops = [stops[int(i * step)] for i in range(MAX_STOPS)]
+        return stops
+
+
+_graph: Optional[RoadGraph] = None
+_graph_loaded = False
+
+
+def get_road_graph() -> Optional[RoadGraph]:
+    """
+    Graph from ROAD_GRAPH_PATH, loaded once; None when no graph file is there.
+
+    A file that is present but not a loadable compiled graph raises, so the app
+    start-up (which calls this) fails instead of quietly routing without it.
+    """
+    global _graph, _graph_loaded
+    if not _graph_loaded:
+        path = settings.ROAD_GRAPH_PATH
+        if path and os.path.exists(path):
+            _graph = RoadGraph.load(path)
+            logger.info(f"Loaded road graph with {_graph.node_count} junctions from {path}")
+        elif path:
+            logger.warning(f"No road graph at {path}, ride stops fall back to the LLM")
+        _graph_loaded = True
+    return _graph
+
+
+def plan_route(start_lat, start_lon, end_lat, end_lon) -> Optional[dict]:
+    """Route between two coordinates, or None when routing is unavailable"""
+    graph = get_road_graph()
+    if graph is None or None in (start_lat, start_lon, end_lat, end_lon):
+        return None
+    return graph.route(start_lat, start_lon, end_lat, end_lon)
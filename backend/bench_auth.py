@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: password hashing, login and authenticated-request throughput under concurrency
+
+1. Event loop stall while `concurrency` bcrypt hashes run inline in async code vs on
+   the crypto pool (the worst delay a ticker on the loop sees).
+2. OTP logins per second (token signing on the crypto pool).
+3. GET /api/auth/me per second with one token, with and without the verified-token cache,
+   and the cost of verify_token itself both ways.
+
+Requests go through the ASGI app in process against a throwaway SQLite database, so no
+server is needed. Keep `concurrency` below the connection pool size (15 for SQLite): the
+auth handlers are async and check out their connection on the event loop.
+
+Usage: python bench_auth.py [requests] [concurrency]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='bench_auth_')}/bench.db"
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:8081")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+os.environ["READ_REPLICA_URLS"] = "[]"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx
+
+from app.core.database import SessionLocal, engine
+from app.core.security import get_password_hash, run_crypto, store_otp, token_cache, verify_token
+from app.db.models import User
+from app.main import app
+
+VERIFY_CALLS = 20000
+
+
+async def loop_stall(hash_password, concurrency: int) -> float:
+    """Longest gap between 1 ms ticks while `concurrency` hashes run"""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last - 0.001)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.gather(*(hash_password(f"password-{i}") for i in range(concurrency)))
+    done = True
+    await tick
+    return worst
+
+
+async def inline_hash(password: str):
+    return get_password_hash(password)
+
+
+async def pooled_hash(password: str):
+    return await run_crypto(get_password_hash, password)
+
+
+async def throughput(client: httpx.AsyncClient, make_request, n: int, concurrency: int) -> float:
+    queue = iter(range(n))
+
+    async def worker():
+        for i in queue:
+            response = await make_request(i)
+            assert response.status_code == 200, response.text
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return n / (time.perf_counter() - started)
+
+
+async def main(n: int, concurrency: int):
+    User.__table__.create(bind=engine)  # the only table login and /me touch
+    db = SessionLocal()
+    db.add_all([User(name=f"Rider {i}", email=f"rider{i}@example.com") for i in range(n)])
+    db.commit()
+    db.close()
+
+    print(f"bcrypt, {concurrency} concurrent hashes")
+    print(f"  inline on the loop : worst loop stall {await loop_stall(inline_hash, concurrency) * 1000:8.1f} ms")
+    print(f"  crypto pool        : worst loop stall {await loop_stall(pooled_hash, concurrency) * 1000:8.1f} ms")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(n):
+            store_otp(f"rider{i}@example.com", "123456")
+
+        async def login(i):
+            return await client.post("/api/auth/verify-otp", json={"email": f"rider{i}@example.com", "otp": "123456"})
+
+        print(f"\n{n} requests, {concurrency} concurrent")
+        print(f"  OTP login              : {await throughput(client, login, n, concurrency):8.0f} req/s")
+
+        store_otp("rider0@example.com", "123456")
+        token = (await login(0)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def me(i):
+            return await client.get("/api/auth/me", headers=headers)
+
+        max_entries = token_cache.max_entries
+        token_cache.max_entries = 0
+        uncached = await throughput(client, me, n, concurrency)
+        token_cache.max_entries = max_entries
+        cached = await throughput(client, me, n, concurrency)
+        print(f"  /me, decode every time : {uncached:8.0f} req/s")
+        print(f"  /me, token cache       : {cached:8.0f} req/s")
+
+    print(f"\nverify_token, same token ({VERIFY_CALLS} calls)")
+    token_cache.max_entries = 0
+    print(f"  decode every time      : {per_call_us(verify_token, token):8.1f} us / call")
+    token_cache.max_entries = max_entries
+    print(f"  token cache            : {per_call_us(verify_token, token):8.1f} us / call")
+
+
+def per_call_us(fn, *args) -> float:
+    fn(*args)
+    started = time.perf_counter()
+    for _ in range(VERIFY_CALLS):
+        fn(*args)
+    return (time.perf_counter() - started) / VERIFY_CALLS * 1e6
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    asyncio.run(main(n, concurrency))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: stop x point distance and ETA matrices
+
+Compares app.services.geo_matrix (NumPy, blocked) with a plain Python loop
+over math.* for the same haversine formula. No database or server is needed.
+
+Usage: python bench_distance_matrix.py [n_stops] [n_points] [repeats]
+"""
+import os
+import sys
+import math
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:8081")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.geo_matrix import EARTH_RADIUS_KM, distance_matrix, eta_minutes
+
+
+def random_points(n: int, rng) -> np.ndarray:
+    # Roughly the Karachi urban area
+    return np.column_stack((rng.uniform(24.78, 25.05, n), rng.uniform(66.95, 67.25, n)))
+
+
+def python_loop(stops, points):
+    distances, etas = [], []
+    minutes_per_km = 60.0 / settings.AVERAGE_SPEED_KMH
+    for lat1, lon1 in stops:
+        distance_row, eta_row = [], []
+        for lat2, lon2 in points:
+            p1, p2 = math.radians(lat1), math.radians(lat2)
+            a = math.sin((p2 - p1) / 2) ** 2 + \
+                math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+            km = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+            distance_row.append(km)
+            eta_row.append(km * minutes_per_km)
+        distances.append(distance_row)
+        etas.append(eta_row)
+    return distances, etas
+
+
+def vectorized(stops, points):
+    distances = distance_matrix(stops, points)
+    return distances, eta_minutes(distances)
+
+
+def bench(fn, stops, points, repeats: int) -> float:
+    fn(stops, points)  # warm up
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(stops, points)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    n_stops = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_points = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    rng = np.random.default_rng(42)
+    stops, points = random_points(n_stops, rng), random_points(n_points, rng)
+
+    expected, _ = python_loop(stops.tolist(), points.tolist())
+    actual, _ = vectorized(stops, points)
+    assert np.allclose(expected, actual), "matrices differ"
+
+    before = bench(python_loop, stops.tolist(), points.tolist(), repeats)
+    after = bench(vectorized, stops, points, repeats)
+    print(f"{n_stops} stops x {n_points} points = {n_stops * n_points:,} pairs (best of {repeats})")
+    print(f"  python loop : {before * 1000:9.2f} ms")
+    print(f"  numpy       : {after * 1000:9.2f} ms")
+    print(f"  speed-up    : {before / after:9.1f}x")
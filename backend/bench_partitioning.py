@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recent-message reads as message history grows, plain vs monthly partitions
+
+Builds two copies of a synthetic `messages` table in a scratch schema of a
+PostgreSQL database: one plain table and one range-partitioned by month (the
+layout created by the e7b2d4f1a358 migration). History is grown backwards in
+time month by month. At each checkpoint both tables are queried the way
+app/db/crud/messages.py reads a page: one user's newest messages, first within
+the last MESSAGE_HISTORY_DAYS ("window"), and the same page with no time bound
+for comparison. The median latency and partitions scanned are printed.
+
+Needs a PostgreSQL URL; the scratch schema is dropped at the end.
+
+Usage: DATABASE_URL=postgresql://... python bench_partitioning.py [rows_per_month] [max_months]
+"""
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, text
+
+from app.db.partitioning import add_months, ensure_partitions, month_start
+
+SCHEMA = "bench_partitioning"
+USERS = 5000
+CHECKPOINTS = (3, 6, 12, 24, 36, 48)
+HISTORY_DAYS = 90
+REPEATS = 200
+# Tables a plan reads rows from (index names in "Bitmap Index Scan on ..." are skipped)
+SCANNED_TABLE = re.compile(r"(?:Seq Scan|Heap Scan|Index Scan using \S+|Index Only Scan using \S+) on (messages\w*)")
+
+COLUMNS = """
+    id bigserial,
+    sender_id integer NOT NULL,
+    receiver_id integer NOT NULL,
+    ride_id integer,
+    content text NOT NULL,
+    sent_at timestamp with time zone NOT NULL DEFAULT now()
+"""
+
+PAGE = 30
+QUERY = """
+    SELECT id, sender_id, receiver_id, content, sent_at FROM {table}
+    WHERE (sender_id = :user_id OR receiver_id = :user_id) {bound}
+    ORDER BY sent_at DESC, id DESC LIMIT %d
+""" % (PAGE + 1)
+WINDOW = "AND sent_at >= :since"
+
+
+def setup(conn):
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    conn.execute(text(f"CREATE TABLE messages_plain ({COLUMNS}, PRIMARY KEY (id))"))
+    conn.execute(text(f"CREATE TABLE messages ({COLUMNS}, PRIMARY KEY (id, sent_at)) PARTITION BY RANGE (sent_at)"))
+    conn.execute(text("CREATE TABLE messages_default PARTITION OF messages DEFAULT"))
+    for table in ("messages_plain", "messages"):
+        conn.execute(text(f"CREATE INDEX ON {table} (sender_id, receiver_id, sent_at)"))
+        conn.execute(text(f"CREATE INDEX ON {table} (receiver_id, sent_at)"))
+
+
+def add_month(conn, month, rows: int):
+    """One month of synthetic messages into both tables"""
+    conn.execute(text(f"""
+        INSERT INTO messages_plain (sender_id, receiver_id, content, sent_at)
+        SELECT 1 + floor(random() * {USERS})::int, 1 + floor(random() * {USERS})::int,
+               'synthetic message ' || g,
+               CAST(:month AS timestamptz) + random() * (CAST(:next AS timestamptz) - CAST(:month AS timestamptz))
+        FROM generate_series(1, {rows}) g
+    """), {"month": f"{month} 00:00:00+00", "next": f"{add_months(month, 1)} 00:00:00+00"})
+    conn.execute(text("""
+        INSERT INTO messages (sender_id, receiver_id, content, sent_at)
+        SELECT sender_id, receiver_id, content, sent_at FROM messages_plain
+        WHERE sent_at >= CAST(:month AS timestamptz) AND sent_at < CAST(:next AS timestamptz)
+    """), {"month": f"{month} 00:00:00+00", "next": f"{add_months(month, 1)} 00:00:00+00"})
+
+
+def measure(conn, table: str, since, bound: str = WINDOW) -> tuple:
+    sql = QUERY.format(table=table, bound=bound)
+    timings = []
+    for i in range(REPEATS):
+        params = {"user_id": 1 + (i * 7919) % USERS, "since": since}
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    plan = "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + sql), {"user_id": 1, "since": since}))
+    scanned = len(set(SCANNED_TABLE.findall(plan)))
+    return statistics.median(timings), scanned
+
+
+def main():
+    url = os.environ.get("DATABASE_URL", "")
+    if not url.startswith("postgresql"):
+        sys.exit("Set DATABASE_URL to a PostgreSQL database (partitioning is PostgreSQL only)")
+    rows_per_month = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_months = int(sys.argv[2]) if len(sys.argv) > 2 else CHECKPOINTS[-1]
+
+    engine = create_engine(url)
+    this_month = month_start(datetime.now(timezone.utc))
+    since = datetime.now(timezone.utc) - timedelta(days=HISTORY_DAYS)
+
+    with engine.connect() as conn:
+        with conn.begin():
+            setup(conn)
+            ensure_partitions(conn, "messages", "sent_at", add_months(this_month, 1 - max_months), this_month)
+
+        print(f"{rows_per_month:,} messages per month, {USERS:,} users, pages of {PAGE}, "
+              f"window of the last {HISTORY_DAYS} days")
+        print(f"{'months':>6} {'rows':>12} {'plain ms':>10} {'partitioned ms':>15} {'scanned':>8} "
+              f"{'no window ms':>13} {'scanned':>8}")
+        try:
+            for months in range(1, max_months + 1):
+                with conn.begin():
+                    add_month(conn, add_months(this_month, 1 - months), rows_per_month)
+                if months not in CHECKPOINTS and months != max_months:
+                    continue
+                with conn.begin():
+                    conn.execute(text("ANALYZE messages_plain"))
+                    conn.execute(text("ANALYZE messages"))
+                with conn.begin():
+                    plain_ms, _ = measure(conn, "messages_plain", since)
+                    partitioned_ms, scanned = measure(conn, "messages", since)
+                    unbounded_ms, unbounded_scanned = measure(conn, "messages", since, bound="")
+                print(f"{months:>6} {months * rows_per_month:>12,} {plain_ms:>10.3f} "
+                      f"{partitioned_ms:>15.3f} {scanned:>8} {unbounded_ms:>13.3f} {unbounded_scanned:>8}")
+        finally:
+            with conn.begin():
+                conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: cost of serializing 1k rides per list response
+
+Compares the default path (Pydantic from_attributes validation + jsonable_encoder
++ json.dumps, as FastAPI does for response_model) with FAST_SERIALIZATION
+(prebuilt serializer + orjson). No database or server is needed.
+
+Usage: python bench_serialization.py [n_rides] [repeats]
+"""
+import os
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:8081")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.db.models import User, Car, Ride
+from app.schema.ride import RideResponse
+from app.core.serialization import fast_serializer, ORJSONListResponse
+
+
+def make_rides(n: int) -> List[Ride]:
+    rides = []
+    start = datetime(2026, 1, 5, 8, 0)
+    for i in range(n):
+        driver = User(
+            id=i, name=f"Driver {i}", email=f"driver{i}@example.com", phone=f"+92300{i:07d}",
+            bio="Daily commuter", gender="Male", is_driver=True, is_rider=False, trust_score=4.5,
+            preferences={"music_preference": "Light music"}, created_at=start,
+            photo_url="/media/users/abc123_96.jpg",
+        )
+        driver.driver_rating = 4.6
+        driver.ride_offered = 12
+        car = Car(id=i, user_id=i, make="Toyota", model="Corolla", year=2018, color="White",
+                  license_plate=f"ABC-{i}", seats=4, ac_available=True)
+        rides.append(Ride(
+            id=i, driver_id=i, car_id=i, start_location="Gulshan-e-Iqbal", end_location="Saddar",
+            start_latitude=24.92, start_longitude=67.09, end_latitude=24.86, end_longitude=67.03,
+            distance_km=14.2, estimated_duration=35, start_time=start + timedelta(minutes=i),
+            seats_available=3, total_fare=350.0, status="active",
+            main_stops=["Gulshan-e-Iqbal", "Karsaz", "FTC", "Saddar"],
+            driver=driver, car=car,
+        ))
+    return rides
+
+
+def default_path(rides) -> bytes:
+    validated = TypeAdapter(List[RideResponse]).validate_python(rides, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(rides) -> bytes:
+    serialize = fast_serializer(RideResponse)
+    return ORJSONListResponse(content=[serialize(ride) for ride in rides]).body
+
+
+def bench(fn, rides, repeats: int) -> float:
+    fn(rides)  # warm up
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(rides)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rides = make_rides(n)
+
+    assert json.loads(default_path(rides)) == json.loads(fast_path(rides)), "payloads differ"
+
+    before = bench(default_path, rides, repeats)
+    after = bench(fast_path, rides, repeats)
+    per_1k = 1000.0 / n
+    print(f"Serializing {n} rides (best of {repeats})")
+    print(f"  pydantic + json : {before * per_1k * 1000:8.2f} ms / 1k rides")
+    print(f"  fast + orjson   : {after * per_1k * 1000:8.2f} ms / 1k rides")
+    print(f"  speed-up        : {before / after:8.1f}x")
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Compile an OpenStreetMap extract into the routing graph used for ride stops
+
+Download an extract covering the service area (e.g. from
+https://download.geofabrik.de or the Overpass API) as .osm / .osm.bz2, then:
+
+Usage: python build_road_graph.py karachi.osm.bz2 [data/karachi_road_graph.npz]
+"""
+import os
+import sys
+import time
+
+from app.services.road_graph import RoadGraph
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else "data/karachi_road_graph.npz"
+
+    started = time.perf_counter()
+    graph = RoadGraph.from_osm(source)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    graph.save(target)
+    print(f"Built {graph.node_count} junctions / {len(graph.targets)} edges "
+          f"in {time.perf_counter() - started:.1f}s -> {target}")
@@ -0,0 +1,74 @@
+"""
+Test setup: a throwaway SQLite database (or TEST_DATABASE_URL, e.g. an empty
+PostgreSQL database) and no background jobs.
+
+The environment is set before `app` is imported, since settings, engines and
+the background loops are created at import time. Postgres-only column types
+are compiled to their SQLite equivalents so the models can be created here.
+"""
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="commute_io_tests_")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+# Nothing listens here, so shared state falls back to process memory unless TEST_REDIS_URL is set
+os.environ["REDIS_URL"] = os.environ.get("TEST_REDIS_URL", "redis://127.0.0.1:1/0")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:8081")
+os.environ["ENVIRONMENT"] = "test"
+os.environ["READ_REPLICA_URLS"] = "[]"
+os.environ["MEDIA_ROOT"] = f"{_DB_DIR}/media"
+for _job in ("COMMUTE_MATCH_INTERVAL_MINUTES", "RIDE_TEMPLATE_INTERVAL_MINUTES",
+             "PLACES_INDEX_REFRESH_MINUTES", "TRACKING_FLUSH_INTERVAL_SECONDS",
+             "RIDE_LIFECYCLE_INTERVAL_MINUTES", "PARTITION_MAINTENANCE_INTERVAL_MINUTES", "TRACKING_FANOUT"):
+    os.environ[_job] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector(type_, compiler, **kw):
+    return "TEXT"
+
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.models import User  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.message_search import message_search_index  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    message_search_index.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user(db):
+    """make_user(name) -> (user, auth headers)"""
+    def make(name: str, **fields):
+        user = User(name=name, email=f"{name.lower()}@example.com", **fields)
+        db.add(user)
+        db.commit()
+        token = create_access_token({"sub": user.email, "auth_method": "email"})
+        return user, {"Authorization": f"Bearer {token}"}
+    return make
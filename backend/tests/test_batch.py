@@ -0,0 +1,42 @@
+from app.core.config import settings
+
+
+def _batch(client, headers, *paths):
+    return client.post("/api/batch", headers=headers,
+                       json={"requests": [{"id": str(i), "path": path} for i, path in enumerate(paths)]})
+
+
+def test_batch_runs_sub_requests_with_one_token_check(client, make_user, monkeypatch):
+    from app.api import auth
+
+    checks = []
+    verify_token = auth.verify_token
+    monkeypatch.setattr(auth, "verify_token", lambda token: checks.append(token) or verify_token(token))
+    user, headers = make_user("Rider")
+
+    response = _batch(client, headers, "/api/auth/me", "/api/rides/my-rides?view=card",
+                      "/api/messages/conversations", "/api/rides/history")
+
+    assert response.status_code == 200
+    items = response.json()["responses"]
+    assert [(item["id"], item["status"]) for item in items] == [("0", 200), ("1", 200), ("2", 200), ("3", 200)]
+    assert items[0]["body"]["email"] == "rider@example.com"
+    assert items[1]["body"] == [] and items[2]["body"] == []
+    assert len(checks) == 1
+
+
+def test_each_sub_request_reports_its_own_status(client, make_user):
+    _, headers = make_user("Rider")
+
+    items = _batch(client, headers, "/api/rides/12345", "/api/rides/?view=everything", "/api/nowhere",
+                   "/api/batch", "https://example.com/api/auth/me", "/api/auth/me").json()["responses"]
+
+    assert [item["status"] for item in items] == [404, 422, 404, 400, 400, 200]
+
+
+def test_batch_size_and_auth_are_checked(client, make_user, monkeypatch):
+    _, headers = make_user("Rider")
+    monkeypatch.setattr(settings, "BATCH_MAX_REQUESTS", 2)
+
+    assert _batch(client, headers, *["/api/auth/me"] * 3).status_code == 400
+    assert _batch(client, {}, "/api/auth/me").status_code == 403
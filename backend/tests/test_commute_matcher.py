@@ -0,0 +1,119 @@
+from datetime import time
+
+import numpy as np
+import pytest
+
+from app.core.database import SessionLocal
+from app.db.crud.commute_match import lock_commute_matches
+from app.db.models import CommuteMatch, PreferredLocation, Schedule
+from app.services import commute_matcher
+from app.services.commute_matcher import compute_commute_matches, score_candidates
+
+HOME, OFFICE = (24.90, 67.10), (24.85, 67.00)
+
+
+def _trip(user_key, user_id, minute=480, day=0, start=HOME, end=OFFICE, **extra):
+    return {user_key: user_id, "day": day, "minute": minute, "start_lat": start[0], "start_lon": start[1],
+            "end_lat": end[0], "end_lon": end[1], **extra}
+
+
+def _score(legs, candidates, top_k=5):
+    return score_candidates(legs, candidates, top_k=top_k, max_distance_km=3.0, time_window_minutes=45)
+
+
+def test_scores_blend_distance_and_time_offset():
+    leg = _trip("user_id", 1)
+    exact = _trip("driver_id", 2)
+    later = _trip("driver_id", 3, minute=510)
+    moved = _trip("driver_id", 4, start=(HOME[0] + 0.018, HOME[1]))  # about 2 km north
+
+    results = _score([leg], [later, exact, moved])
+
+    assert [(cand, score) for _, cand, score, *_ in results][0] == (1, 1.0)
+    scores = {cand: (score, pickup, dropoff, offset) for _, cand, score, pickup, dropoff, offset in results}
+    assert scores[0] == (round(1.0 - 0.4 * 30 / 45, 4), 0.0, 0.0, 30)
+    pickup = scores[2][1]
+    assert pickup == pytest.approx(2.0, abs=0.01)
+    assert scores[2][0] == pytest.approx(1.0 - 0.6 * pickup / 6.0, abs=1e-3)
+
+
+def test_candidates_outside_the_window_distance_or_day_are_dropped():
+    leg = _trip("user_id", 1)
+    candidates = [
+        _trip("driver_id", 2, minute=480 + 46),                       # outside the 45 minute window
+        _trip("driver_id", 3, minute=480 - 45),                       # on the edge, kept
+        _trip("driver_id", 4, end=(OFFICE[0] - 0.036, OFFICE[1])),    # drop-off about 4 km off
+        _trip("driver_id", 5, day=1),                                 # another weekday
+        _trip("driver_id", 1),                                        # the rider's own leg
+    ]
+
+    assert [cand for _, cand, *_ in _score([leg], candidates)] == [1]
+
+
+def test_top_k_matches_a_full_sort(monkeypatch):
+    monkeypatch.setattr(commute_matcher, "LEG_BLOCK_SIZE", 3)  # several blocks, the last one partial
+    rng = np.random.default_rng(26)
+    legs = [_trip("user_id", 1000 + i, minute=int(rng.integers(420, 540))) for i in range(7)]
+    candidates = [_trip("driver_id", i, minute=int(rng.integers(380, 580)),
+                        start=(HOME[0] + rng.uniform(-0.03, 0.03), HOME[1] + rng.uniform(-0.03, 0.03)))
+                  for i in range(40)]
+
+    results = _score(legs, candidates, top_k=4)
+
+    for leg_idx in range(len(legs)):
+        got = [(cand, score) for row, cand, score, *_ in results if row == leg_idx]
+        everything = _score([legs[leg_idx]], candidates, top_k=len(candidates))
+        assert [score for _, score in got] == [score for _, _, score, *_ in everything][:4]
+        assert [score for _, score in got] == sorted((score for _, score in got), reverse=True)
+
+
+def test_top_k_larger_than_candidates_and_empty_inputs():
+    leg = _trip("user_id", 1)
+    assert len(_score([leg], [_trip("driver_id", 2)], top_k=10)) == 1
+    assert _score([], [_trip("driver_id", 2)]) == [] and _score([leg], []) == []
+
+
+def test_compute_commute_matches_replaces_the_set(db, make_user):
+    rider, _ = make_user("Rider")
+    driver, _ = make_user("Driver", is_driver=True)
+    for user, depart in ((rider, time(8, 0)), (driver, time(8, 15))):
+        db.add(PreferredLocation(user_id=user.id, name="Home", address="Gulshan", latitude=HOME[0], longitude=HOME[1]))
+        db.add(PreferredLocation(user_id=user.id, name="Office", address="Saddar",
+                                 latitude=OFFICE[0], longitude=OFFICE[1]))
+        db.add(Schedule(user_id=user.id, day_of_week=0, start_time=depart, end_time=time(17, 0)))
+    db.commit()
+
+    assert compute_commute_matches(db) == 2
+    assert compute_commute_matches(db) == 2
+
+    matches = db.query(CommuteMatch).order_by(CommuteMatch.leg).all()
+    assert [(m.rider_id, m.driver_id, m.leg, m.match_type, m.time_offset_minutes) for m in matches] == [
+        (rider.id, driver.id, "outbound", "recurring_driver", 15),
+        (rider.id, driver.id, "return", "recurring_driver", 0),
+    ]
+
+
+def test_one_worker_per_interval_rebuilds(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(commute_matcher, "get_redis", lambda: client)
+    runs = []
+    monkeypatch.setattr(commute_matcher, "compute_commute_matches", lambda db: runs.append(db) or 0)
+
+    commute_matcher.run_commute_matching_job()
+    commute_matcher.run_commute_matching_job()  # another worker, same interval
+
+    assert len(runs) == 1
+
+
+def test_overlapping_rebuilds_do_not_both_write(db):
+    if db.bind.dialect.name != "postgresql":
+        pytest.skip("advisory locks are PostgreSQL only")
+    other = SessionLocal()
+    try:
+        assert lock_commute_matches(other)
+        assert compute_commute_matches(db) is None
+        other.rollback()
+        assert compute_commute_matches(db) == 0
+    finally:
+        other.close()
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import geo_matrix
+from app.services.geo_matrix import (EARTH_RADIUS_KM, distance_matrix, eta_minutes, pairwise_distance,
+                                     route_offsets_km)
+
+
+def _haversine(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def _points(n, seed):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.uniform(24.7, 25.1, n), rng.uniform(66.9, 67.3, n)))
+
+
+@pytest.mark.parametrize("rows", [1, 5, 6, 7, 13])
+def test_blocked_matrix_matches_scalar_haversine(monkeypatch, rows):
+    monkeypatch.setattr(geo_matrix, "BLOCK_ROWS", 3)  # whole and partial last blocks
+    origins, destinations = _points(rows, 1), _points(4, 2)
+
+    matrix = distance_matrix(origins, destinations)
+
+    expected = [[_haversine(o, d) for d in destinations] for o in origins]
+    assert matrix.shape == (rows, 4)
+    np.testing.assert_allclose(matrix, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_square_matrix_and_road_mode(monkeypatch):
+    monkeypatch.setattr(geo_matrix, "BLOCK_ROWS", 2)
+    stops = _points(5, 3)
+
+    matrix = distance_matrix(stops.tolist())
+
+    np.testing.assert_allclose(np.diag(matrix), 0.0, atol=1e-9)
+    np.testing.assert_allclose(matrix, matrix.T, rtol=1e-12)
+    np.testing.assert_allclose(distance_matrix(stops, mode="road"), matrix * settings.ROAD_CIRCUITY_FACTOR)
+    with pytest.raises(ValueError):
+        distance_matrix(stops, mode="manhattan")
+
+
+def test_empty_inputs():
+    assert distance_matrix([], _points(3, 4)).shape == (0, 3)
+    assert distance_matrix(_points(3, 4), []).shape == (3, 0)
+    assert distance_matrix([]).shape == (0, 0)
+    assert pairwise_distance([], []).shape == (0,)
+    assert route_offsets_km([]).shape == (0,)
+    assert eta_minutes([]).shape == (0,)
+    with pytest.raises(ValueError):
+        distance_matrix([24.9, 67.0])
+
+
+def test_pairwise_distance_eta_and_route_offsets():
+    origins, destinations = _points(6, 5), _points(6, 6)
+
+    pairwise = pairwise_distance(origins, destinations)
+    np.testing.assert_allclose(pairwise, [_haversine(o, d) for o, d in zip(origins, destinations)], rtol=1e-9)
+    np.testing.assert_allclose(pairwise, np.diag(distance_matrix(origins, destinations)), rtol=1e-12)
+
+    np.testing.assert_allclose(eta_minutes([0.0, 15.0], speed_kmh=30), [0.0, 30.0])
+    assert eta_minutes([settings.AVERAGE_SPEED_KMH])[0] == pytest.approx(60.0)
+
+    stops = _points(4, 7)
+    legs = [_haversine(a, b) * settings.ROAD_CIRCUITY_FACTOR for a, b in zip(stops, stops[1:])]
+    np.testing.assert_allclose(route_offsets_km(stops), np.concatenate(([0.0], np.cumsum(legs))), rtol=1e-9)
+    assert route_offsets_km(stops[:1]).tolist() == [0.0]
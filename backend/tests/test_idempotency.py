@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.db.models import Car, Message, Ride, RideRequest
+from app.main import app
+from app.middleware import idempotency
+from app.middleware.idempotency import MemoryIdempotencyStore
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(monkeypatch):
+    monkeypatch.setattr(idempotency, "idempotency_store", MemoryIdempotencyStore())
+
+
+@pytest.fixture
+def ride(db, make_user):
+    driver, _ = make_user("Driver")
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=datetime.now() + timedelta(days=1), seats_available=3, total_fare=300,
+                status="active", main_stops=["Gulshan", "Karsaz", "Saddar"])
+    db.add(ride)
+    db.commit()
+    return ride
+
+
+def test_retried_message_send_is_stored_once(client, db, make_user):
+    _, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    payload = {"receiver_id": bob.id, "content": "On my way"}
+    retry_headers = dict(headers, **{"Idempotency-Key": "send-1"})
+
+    first = client.post("/api/messages/", headers=retry_headers, json=payload)
+    second = client.post("/api/messages/", headers=retry_headers, json=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert db.query(Message).count() == 1
+    assert client.post("/api/messages/", headers=dict(headers, **{"Idempotency-Key": "send-2"}),
+                       json=payload).json()["id"] != first.json()["id"]
+
+
+def test_retried_ride_request_replays_first_response(client, db, make_user, ride):
+    _, headers = make_user("Rider")
+    payload = {"ride_id": ride.id, "joining_stop": "Gulshan", "ending_stop": "Saddar"}
+    retry_headers = dict(headers, **{"Idempotency-Key": "join-1"})
+
+    first = client.post("/api/rides/request", headers=retry_headers, json=payload)
+    second = client.post("/api/rides/request", headers=retry_headers, json=payload)
+
+    assert first.status_code == 200
+    assert second.status_code == 200 and second.json() == first.json()
+    assert db.query(RideRequest).count() == 1
+    # Without a key the retry still reaches the endpoint
+    assert client.post("/api/rides/request", headers=headers, json=payload).status_code == 400
+
+
+def test_key_reused_with_other_body_is_rejected(client, make_user):
+    _, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    retry_headers = dict(headers, **{"Idempotency-Key": "send-1"})
+    client.post("/api/messages/", headers=retry_headers, json={"receiver_id": bob.id, "content": "a"})
+
+    response = client.post("/api/messages/", headers=retry_headers, json={"receiver_id": bob.id, "content": "b"})
+
+    assert response.status_code == 422
+
+
+def test_concurrent_duplicates_run_once(db, make_user):
+    _, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    retry_headers = dict(headers, **{"Idempotency-Key": "send-1"})
+
+    async def send_twice():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/api/messages/", headers=retry_headers, json={"receiver_id": bob.id, "content": "hi"})
+                for _ in range(2)
+            ])
+
+    responses = asyncio.run(send_twice())
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert db.query(Message).count() == 1
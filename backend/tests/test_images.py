@@ -0,0 +1,58 @@
+import base64
+import io
+from datetime import datetime, timedelta
+
+import pytz
+from PIL import Image
+
+from app.core.config import settings
+from app.db.models import Car, Ride, User
+
+
+def _data_url() -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (200, 30, 30)).save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def test_profile_photo_is_stored_as_a_key_and_served_as_a_url(client, db, make_user):
+    user, headers = make_user("Driver", is_driver=True)
+
+    response = client.put("/api/users/profile", json={"photo_url": _data_url()}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    db.refresh(user)
+    assert "://" not in user.photo_url and user.photo_url.endswith(".png")
+    body = response.json()
+    assert body["photo_url"] == f"{settings.MEDIA_BASE_URL}{settings.MEDIA_URL}/{user.photo_url}"
+    digest = user.photo_url.split(".")[0]
+    assert body["photo_thumbnail_url"].endswith(f"/{digest}_96.jpg")
+
+    # Sending the URL back (e.g. an unchanged form) keeps the key
+    client.put("/api/users/profile", json={"photo_url": body["photo_url"]}, headers=headers)
+    db.refresh(user)
+    assert user.photo_url == f"{digest}.png"
+
+
+def test_ride_lists_carry_thumbnails(client, db, make_user, monkeypatch):
+    driver, _ = make_user("Driver", is_driver=True)
+    _, rider_headers = make_user("Rider")
+    db.query(User).filter(User.id == driver.id).update({"photo_url": "abc.png"})
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", license_plate="ABC-1", seats=4,
+              photo_url="https://example.com/car.jpg")
+    db.add(car)
+    db.commit()
+    start_time = datetime.now(pytz.timezone("Asia/Karachi")).replace(tzinfo=None) + timedelta(minutes=30)
+    db.add(Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=start_time, seats_available=3, total_fare=300, status="active"))
+    db.commit()
+    media = f"{settings.MEDIA_BASE_URL}{settings.MEDIA_URL}"
+
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_SERIALIZATION", fast)
+        for path in ("/api/rides/", "/api/rides/?view=card"):
+            ride = client.get(path, headers=rider_headers).json()[0]
+            assert ride["driver"]["photo_url"] == f"{media}/abc.png", (fast, path)
+            assert ride["driver"]["photo_thumbnail_url"] == f"{media}/abc_96.jpg", (fast, path)
+            # Photos hosted elsewhere have no thumbnails of ours
+            assert ride["car"]["photo_thumbnail_url"] == "https://example.com/car.jpg", (fast, path)
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.intent_parser import parse_ride_intent
+from app.services.places import normalize
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "ride_intents.jsonl")
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = [json.loads(line) for line in f if line.strip()]
+
+
+def _fast_path(text):
+    intent = parse_ride_intent(text)
+    return intent if intent is not None and intent.confidence >= settings.GENAI_FAST_PATH_MIN_CONFIDENCE else None
+
+
+def _correct(intent, case) -> bool:
+    return (normalize(intent.start_location) == normalize(case["start"])
+            and normalize(intent.end_location) == normalize(case["end"])
+            and intent.time.lower() == case["time"].lower())
+
+
+def test_fast_path_accuracy_on_corpus():
+    answered = [(case, _fast_path(case["text"])) for case in CORPUS if not case.get("llm")]
+    wrong = [case["text"] for case, intent in answered if intent is None or not _correct(intent, case)]
+
+    # Every clear phrasing in the corpus is answered locally and correctly
+    assert wrong == []
+
+
+@pytest.mark.parametrize("case", [case for case in CORPUS if case.get("llm")], ids=lambda case: case["text"])
+def test_unclear_messages_go_to_the_llm(case):
+    assert _fast_path(case["text"]) is None
+
+
+def test_one_known_endpoint_is_not_enough():
+    intent = parse_ride_intent("from Gulshan to Saddar at 4 not 5")
+    # The time comes out without leaving a gap, and the leftover words keep Saddar from matching
+    assert (intent.end_location, intent.time) == ("Saddar not 5", "at 4")
+    assert intent.confidence < settings.GENAI_FAST_PATH_MIN_CONFIDENCE
+
+
+def test_genai_chat_skips_the_llm_for_clear_messages(client, make_user, monkeypatch):
+    from app.api import genai
+    from app.services.intent_parser import intent_metrics
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("LLM called for a clear message")
+
+    monkeypatch.setattr(genai.requests, "post", no_llm)
+    monkeypatch.setattr(intent_metrics, "fast_path", 0)
+    monkeypatch.setattr(intent_metrics, "llm", 0)
+    _, headers = make_user("Rider")
+
+    response = client.post("/api/genai-chat/api/genai-chat", headers=headers,
+                           json={"message": "from Gulshan to Saddar at 8am"})
+
+    assert response.status_code == 200
+    assert response.json()["reply"] == "Sorry, no rides found for your criteria."
+    assert intent_metrics.snapshot()["fast_path"] == 1
+
+
+def test_genai_chat_stream_sends_intent_then_each_ride(client, db, make_user, monkeypatch):
+    from datetime import datetime, timedelta
+
+    from app.api import genai
+    from app.db.models import Car, Ride
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("LLM called for a clear message")
+
+    monkeypatch.setattr(genai.requests, "post", no_llm)
+    driver, _ = make_user("Driver", phone="03001234567")
+    rider, headers = make_user("Rider")
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    for hour in (8, 9):
+        db.add(Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan-e-Iqbal", end_location="Saddar",
+                    start_time=datetime.now() + timedelta(days=1, hours=hour), seats_available=3,
+                    total_fare=300, status="active"))
+    db.commit()
+
+    with client.stream("POST", "/api/genai-chat/stream", headers=headers,
+                       json={"message": "from Gulshan to Saddar at 8am"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [(block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+                  for block in response.read().decode().split("\n\n") if block]
+
+    assert [name for name, _ in events] == ["intent", "ride", "ride", "reply"]
+    assert events[0][1] == {"start_location": "Gulshan", "end_location": "Saddar", "time": "at 8am",
+                            "source": "parser"}
+    assert [data["index"] for name, data in events if name == "ride"] == [1, 2]
+    assert events[-1][1]["reply"].startswith("I found these rides from Gulshan to Saddar:\n1. Driver: Driver")
+    # The options are remembered for the numbered reply that books one
+    assert genai.conversation_state.pop(rider.id) == [data["ride_id"] for name, data in events if name == "ride"]
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.db.models import Car, Ride, RideHistory, RideRequest
+
+
+def _seed(db, make_user):
+    driver, driver_headers = make_user("Driver")
+    rider, rider_headers = make_user("Rider")
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", color="White", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    # Search lists rides after the current Karachi time, my-requests the ones within six hours
+    start_time = datetime.now(pytz.timezone("Asia/Karachi")).replace(tzinfo=None) + timedelta(minutes=30)
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=start_time, seats_available=3, total_fare=300,
+                status="active", main_stops=["Gulshan", "Karsaz", "Saddar"])
+    db.add(ride)
+    db.commit()
+    db.add(RideRequest(ride_id=ride.id, rider_id=rider.id, status="pending",
+                       joining_stop="Gulshan", ending_stop="Saddar"))
+    db.add(RideHistory(user_id=rider.id, ride_id=ride.id, role="rider"))
+    db.commit()
+    return ride, driver_headers, rider_headers
+
+
+def _get(client, path, headers):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200, response.text
+    return response.json(), statements
+
+
+def test_ride_search_card_view_loads_only_card_columns(client, db, make_user):
+    ride, _, rider_headers = _seed(db, make_user)
+
+    full, _ = _get(client, "/api/rides/", rider_headers)
+    cards, statements = _get(client, "/api/rides/?view=card", rider_headers)
+
+    assert "main_stops" in full[0] and "driver_rating" in full[0]["driver"]
+    assert cards == [{
+        "id": ride.id, "driver_id": ride.driver_id, "status": "active", "start_location": "Gulshan",
+        "end_location": "Saddar", "start_time": cards[0]["start_time"], "seats_available": 3, "total_fare": 300.0,
+        "driver": {"id": ride.driver_id, "name": "Driver", "photo_url": None, "photo_thumbnail_url": None},
+        "car": {"id": ride.car_id, "make": "Toyota", "model": "Corolla", "color": "White", "seats": 4,
+                "photo_url": None, "photo_thumbnail_url": None},
+    }]
+    ride_queries = [s for s in statements if "FROM rides" in s]
+    # One query, no per-driver rating / ride count lookups, no unused columns
+    assert len(ride_queries) == 1
+    assert "main_stops" not in ride_queries[0] and "license_plate" not in ride_queries[0]
+
+
+def test_request_and_history_card_views(client, db, make_user):
+    ride, driver_headers, rider_headers = _seed(db, make_user)
+
+    driver_requests, statements = _get(client, "/api/rides/driver-requests?view=card", driver_headers)
+    assert [(r["ride"]["id"], r["rider"]["name"], r["joining_stop"]) for r in driver_requests] == \
+        [(ride.id, "Rider", "Gulshan")]
+    assert not any("ride_history" in s for s in statements)  # no rides_taken / rating per rider
+
+    my_requests, _ = _get(client, "/api/rides/my-requests?view=card", rider_headers)
+    assert set(my_requests[0]) == {"id", "ride_id", "rider_id", "status", "requested_at", "joining_stop",
+                                   "ending_stop", "rider", "ride"}
+
+    history, _ = _get(client, "/api/rides/history?view=card", rider_headers)
+    assert history[0]["ride"] == {"id": ride.id, "driver_id": ride.driver_id, "status": "active",
+                                  "start_location": "Gulshan", "end_location": "Saddar",
+                                  "start_time": history[0]["ride"]["start_time"]}
+    assert "user_id" not in history[0]
+
+
+def test_unknown_view_is_rejected(client, db, make_user):
+    _, _, rider_headers = _seed(db, make_user)
+    assert client.get("/api/rides/?view=everything", headers=rider_headers).status_code == 422
@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.models import Car, Ride, RideTrack
+from app.services import live_tracking
+from app.services.live_tracking import RideChannel, TrackingHub
+from app.services.ride_eta import EtaTracker, RideEta
+
+
+def _started_ride(db, make_user):
+    driver, _ = make_user("Driver", is_driver=True)
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=datetime(2026, 10, 19, 8, 0), seats_available=3, status="start")
+    db.add(ride)
+    db.commit()
+    return ride, create_access_token({"sub": driver.email, "auth_method": "email"})
+
+
+def test_socket_batches_are_capped(client, db, make_user):
+    ride, token = _started_ride(db, make_user)
+    ping = {"latitude": 24.9, "longitude": 67.0}
+
+    with client.websocket_connect(f"/api/tracking/rides/{ride.id}/ws?token={token}") as socket:
+        assert socket.receive_json()["type"] == "snapshot"
+        socket.send_json({"pings": [ping] * 101})
+        assert socket.receive_json()["type"] == "error"
+        socket.send_json({"pings": [{**ping, "recorded_at": "2026-10-19T08:00:00"}]})
+        assert socket.receive_json()["type"] == "location"
+
+
+def test_relayed_updates_reach_listeners_on_other_workers():
+    worker_a, worker_b = TrackingHub(), TrackingHub()
+    channel = worker_b.channels.setdefault(7, RideChannel(7))
+    queue = asyncio.Queue(maxsize=8)
+    channel.subscribers.add(queue)
+    worker_a._outbox = asyncio.Queue()
+
+    worker_a.broadcast(7, {"type": "location", "ride_id": 7, "latitude": 24.9, "longitude": 67.0,
+                           "recorded_at": datetime(2026, 10, 19, 8, 0)})
+    ride_id, text = worker_a._outbox.get_nowait()
+    worker_b.receive(f"tracking:{ride_id}", f"{worker_a.worker_id} {text}")
+    worker_b.receive(f"tracking:{ride_id}", f"{worker_b.worker_id} {text}")  # its own, already delivered
+
+    assert queue.qsize() == 1 and queue.get_nowait() == text
+    assert list(channel.points) == [{"latitude": 24.9, "longitude": 67.0,
+                                     "recorded_at": datetime(2026, 10, 19, 8, 0)}]
+
+
+def test_relay_publishes_through_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe("tracking:*")
+        hub = TrackingHub()
+        relay = asyncio.create_task(hub.relay(client))
+        await asyncio.sleep(0)
+        hub.broadcast(3, {"type": "chat", "message": {"content": "5 min away"}})
+        message = None
+        while message is None:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+        relay.cancel()
+        return message
+
+    message = asyncio.run(scenario())
+    assert message["channel"] == "tracking:3"
+    assert message["data"].endswith('{"type":"chat","message":{"content":"5 min away"}}')
+
+
+def test_channel_loads_eta_state_off_the_event_loop(db, make_user, monkeypatch):
+    ride, _ = _started_ride(db, make_user)
+    ride.start_latitude, ride.start_longitude, ride.end_latitude, ride.end_longitude = 24.92, 67.09, 24.86, 67.02
+    db.commit()
+    tracker = EtaTracker()
+    monkeypatch.setattr(live_tracking, "eta_tracker", tracker)
+
+    assert tracker.on_pings(ride.id, [{"latitude": 24.92, "longitude": 67.09, "recorded_at": datetime.now()}]) is None
+    assert not tracker.loaded(ride.id)  # ingest never queries the database itself
+
+    asyncio.run(TrackingHub().channel(ride.id))
+    assert tracker.state(ride.id) is not None
+
+
+def test_backwards_ping_still_moves_the_clock():
+    state = RideEta(1, ["A", "B"], np.array([[24.90, 67.00], [24.90, 67.10]]))
+    start = datetime(2026, 10, 19, 8, 0)
+    state.update({"latitude": 24.90, "longitude": 67.05, "recorded_at": start})
+    state.update({"latitude": 24.90, "longitude": 67.00, "recorded_at": start + timedelta(minutes=5)})
+    assert state.last_time == start + timedelta(minutes=5)
+
+    # 1 km more in the next minute: speed comes from that minute, not the six since the last good ping
+    state.update({"latitude": 24.90, "longitude": 67.05 + 1 / state.kx, "recorded_at": start + timedelta(minutes=6)})
+    assert state.speed_kmh == pytest.approx(60 * settings.ROAD_CIRCUITY_FACTOR, rel=0.01)
+
+
+def test_pings_from_a_clock_running_ahead_are_pulled_back(monkeypatch):
+    now = datetime(2026, 10, 19, 8, 0)
+    monkeypatch.setattr(live_tracking, "pakistan_now", lambda: now)
+    hub, channel = TrackingHub(), RideChannel(5)
+
+    ahead = hub.ingest(channel, [{"latitude": 24.9, "longitude": 67.0, "recorded_at": now + timedelta(hours=1)}])
+    assert ahead[0]["recorded_at"] == now + live_tracking.MAX_CLOCK_AHEAD
+
+    now += timedelta(seconds=20)
+    accepted = hub.ingest(channel, [{"latitude": 24.91, "longitude": 67.0, "recorded_at": now}])
+    assert [point["recorded_at"] for point in accepted] == [now]
+    assert [row["recorded_at"] for row in hub._pending] == [ahead[0]["recorded_at"], now]
+
+
+def test_relayed_locations_keep_etas_current_on_other_workers(monkeypatch):
+    route = np.array([[24.90, 67.00], [24.90, 67.10]])
+    tracker_a, tracker_b = EtaTracker(), EtaTracker()
+    tracker_a.rides[7], tracker_b.rides[7] = RideEta(7, ["A", "B"], route), RideEta(7, ["A", "B"], route)
+    worker_a, worker_b = TrackingHub(), TrackingHub()
+    channel_a, channel_b = RideChannel(7), worker_b.channels.setdefault(7, RideChannel(7))
+    worker_a._outbox = asyncio.Queue()
+    start = datetime(2026, 10, 19, 8, 0)
+
+    for minute, longitude in ((0, 67.02), (2, 67.04)):
+        monkeypatch.setattr(live_tracking, "eta_tracker", tracker_a)
+        worker_a.ingest(channel_a, [{"latitude": 24.90, "longitude": longitude,
+                                     "recorded_at": start + timedelta(minutes=minute)}])
+        monkeypatch.setattr(live_tracking, "eta_tracker", tracker_b)
+        while not worker_a._outbox.empty():
+            ride_id, text = worker_a._outbox.get_nowait()
+            worker_b.receive(f"tracking:{ride_id}", f"{worker_a.worker_id} {text}")
+
+    assert len(channel_b.points) == 2
+    assert tracker_b.current(7) == tracker_a.current(7) != []
+
+
+def test_eta_state_starts_from_the_saved_track(db, make_user):
+    ride, _ = _started_ride(db, make_user)
+    ride.start_latitude, ride.start_longitude, ride.end_latitude, ride.end_longitude = 24.90, 67.00, 24.90, 67.10
+    start = datetime(2026, 10, 19, 8, 0)
+    db.add_all([RideTrack(ride_id=ride.id, driver_id=ride.driver_id, latitude=24.90, longitude=longitude,
+                          recorded_at=start + timedelta(minutes=minute))
+                for minute, longitude in ((0, 67.02), (2, 67.04))])
+    db.commit()
+    tracker = EtaTracker()
+
+    tracker.load(ride.id)
+
+    etas = tracker.current(ride.id)
+    assert etas and etas[-1]["arrival_at"] > start + timedelta(minutes=2)
+    assert tracker.state(ride.id).last_time == start + timedelta(minutes=2)
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.db.models import Message
+
+
+def _add_messages(db, pairs, sent_at):
+    """One message per (sender, receiver) pair, all with the same sent_at"""
+    messages = [Message(sender_id=sender.id, receiver_id=receiver.id, content=f"m{i}", sent_at=sent_at)
+                for i, (sender, receiver) in enumerate(pairs)]
+    db.add_all(messages)
+    db.commit()
+    return [message.id for message in messages]
+
+
+def _pages(client, url, headers, **params):
+    """Follow `before` cursors to the start of the thread"""
+    ids = []
+    while True:
+        response = client.get(url, headers=headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        ids += [message["id"] for message in page["messages"]]
+        if not page["has_more"]:
+            return ids, page
+        params = dict(params, before=page["before"])
+
+
+def test_before_pages_through_equal_sent_at(client, db, make_user):
+    alice, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    sent_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    ids = _add_messages(db, [(alice, bob)] * 7, sent_at)
+
+    seen, _ = _pages(client, f"/api/messages/{bob.id}/history", headers, limit=3)
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_after_returns_newer_messages_with_equal_sent_at(client, db, make_user):
+    alice, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    sent_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    first = _add_messages(db, [(alice, bob)] * 2, sent_at)
+    page = client.get(f"/api/messages/{bob.id}/history", headers=headers).json()
+    assert [message["id"] for message in page["messages"]] == sorted(first, reverse=True)
+
+    newer = _add_messages(db, [(bob, alice)] * 4, sent_at)
+    response = client.get(f"/api/messages/{bob.id}/history", headers=headers,
+                          params={"after": page["after"], "limit": 3})
+
+    assert response.status_code == 200
+    catch_up = response.json()
+    assert [message["id"] for message in catch_up["messages"]] == sorted(newer)[:3][::-1]
+    assert catch_up["has_more"] is True
+    rest = client.get(f"/api/messages/{bob.id}/history", headers=headers,
+                      params={"after": catch_up["after"]}).json()
+    assert [message["id"] for message in rest["messages"]] == sorted(newer)[3:]
+    assert rest["has_more"] is False
+
+
+def test_conversation_merges_both_directions(client, db, make_user):
+    alice, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    carol, _ = make_user("Carol")
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    expected = []
+    for minute in range(6):
+        sender, receiver = (alice, bob) if minute % 2 else (bob, alice)
+        expected += _add_messages(db, [(sender, receiver)], start + timedelta(minutes=minute))
+    _add_messages(db, [(alice, carol), (carol, alice)], start + timedelta(minutes=2))
+
+    seen, page = _pages(client, f"/api/messages/{bob.id}/history", headers, limit=4)
+
+    assert seen == expected[::-1]
+    assert {user["id"] for user in page["users"]} == {alice.id, bob.id}
+
+
+def test_invalid_cursor_is_rejected(client, make_user):
+    _, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+
+    for params in ({"before": "not-a-cursor"}, {"after": "bm90LWEtY3Vyc29y"}):
+        response = client.get(f"/api/messages/{bob.id}/history", headers=headers, params=params)
+        assert response.status_code == 400
+
+
+def test_before_and_after_together_are_rejected(client, db, make_user):
+    alice, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    _add_messages(db, [(alice, bob)] * 2, datetime.now(timezone.utc))
+    page = client.get(f"/api/messages/{bob.id}/history", headers=headers, params={"limit": 1}).json()
+
+    response = client.get(f"/api/messages/{bob.id}/history", headers=headers,
+                          params={"before": page["before"], "after": page["after"]})
+
+    assert response.status_code == 400
+
+
+def test_messages_older_than_the_window_are_still_read(client, db, make_user, monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_HISTORY_DAYS", 30)
+    alice, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    carol, _ = make_user("Carol")
+    now = datetime.now(timezone.utc)
+    old = _add_messages(db, [(alice, bob)] * 3, now - timedelta(days=90))
+    recent = _add_messages(db, [(bob, alice)] * 2, now - timedelta(minutes=5))
+    _add_messages(db, [(carol, alice)], now - timedelta(days=400))
+
+    seen, _ = _pages(client, f"/api/messages/{bob.id}/history", headers, limit=4)
+    assert seen == sorted(recent, reverse=True) + sorted(old, reverse=True)
+
+    conversations = client.get("/api/messages/conversations", headers=headers).json()
+    assert [c["user_id"] for c in conversations] == [bob.id, carol.id]
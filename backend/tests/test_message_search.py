@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from app.db.models import Car, Ride, RideRequest
+
+
+def _send(client, headers, receiver, content):
+    response = client.post("/api/messages/", headers=headers, json={"receiver_id": receiver.id, "content": content})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _search(client, headers, **params):
+    response = client.get("/api/messages/search", headers=headers, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_matches_every_word_in_own_conversations(client, make_user):
+    alice, alice_headers = make_user("Alice")
+    bob, bob_headers = make_user("Bob")
+    carol, carol_headers = make_user("Carol")
+    first = _send(client, alice_headers, bob, "Pickup at the Karsaz gate tomorrow")
+    _send(client, bob_headers, alice, "Tomorrow I leave early")
+    second = _send(client, bob_headers, alice, "karsaz gate works, see you TOMORROW")
+    _send(client, carol_headers, bob, "Karsaz gate tomorrow?")  # not Alice's conversation
+
+    page = _search(client, alice_headers, q="tomorrow Karsaz")
+
+    assert [message["id"] for message in page["messages"]] == [second, first]
+    assert {user["id"] for user in page["users"]} == {alice.id, bob.id}
+    assert _search(client, carol_headers, q="leave")["messages"] == []
+
+
+def test_search_includes_ride_threads_of_members_only(client, db, make_user):
+    driver, driver_headers = make_user("Driver")
+    rider, rider_headers = make_user("Rider")
+    _, outsider_headers = make_user("Outsider")
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=datetime.now() + timedelta(days=1), seats_available=3, total_fare=300, status="active")
+    db.add(ride)
+    db.commit()
+    db.add(RideRequest(ride_id=ride.id, rider_id=rider.id, status="accepted",
+                       joining_stop="Gulshan", ending_stop="Saddar"))
+    db.commit()
+
+    response = client.post(f"/api/messages/rides/{ride.id}", headers=driver_headers,
+                           json={"content": "Running ten minutes late"})
+    assert response.status_code == 200
+
+    assert [m["id"] for m in _search(client, rider_headers, q="late")["messages"]] == [response.json()["id"]]
+    assert _search(client, outsider_headers, q="late")["messages"] == []
+
+
+def test_search_pages_with_before_cursor(client, make_user):
+    alice, headers = make_user("Alice")
+    bob, _ = make_user("Bob")
+    ids = [_send(client, headers, bob, f"fare update {i}") for i in range(5)]
+
+    seen, params = [], {"q": "fare", "limit": 2}
+    while True:
+        page = _search(client, headers, **params)
+        seen += [message["id"] for message in page["messages"]]
+        if not page["has_more"]:
+            break
+        params["before"] = page["before"]
+
+    assert seen == ids[::-1]
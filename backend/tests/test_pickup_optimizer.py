@@ -0,0 +1,46 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services.pickup_optimizer import follows_stops, solve_exact, solve_heuristic
+
+
+def _line(positions):
+    x = np.asarray(positions, dtype=float)
+    return np.abs(x[:, None] - x[None, :])
+
+
+@pytest.mark.parametrize("solve", [solve_exact, solve_heuristic])
+def test_stops_are_visited_in_route_order(solve):
+    # The route's stops double back: start (0) -> Karsaz (5) -> Baloch Colony (1) -> end (6).
+    # Rider 1 boards at Baloch Colony, rider 2 at Karsaz, both ride to the end.
+    dist = _line([0, 1, 5, 6, 6, 6])
+    ranks = [0, 2, 1, 3, 3, 3]
+
+    unconstrained = solve(dist, 2)
+    order = solve(dist, 2, ranks)
+
+    assert unconstrained[:3] == [0, 1, 2]  # nearest first, against the stop order
+    assert order[:3] == [0, 2, 1] and follows_stops(order, ranks)
+
+
+def test_heuristic_matches_the_rules_on_random_carpools():
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        n = 5
+        points = rng.uniform(0, 10, size=(2 * n + 2, 2))
+        dist = np.linalg.norm(points[:, None] - points[None, :], axis=2)
+        ranks = [0] + [None] * (2 * n) + [6]
+        for rider in range(n):
+            if rng.random() < 0.7:
+                pickup, dropoff = sorted(rng.integers(0, 7, size=2))
+                ranks[rider + 1], ranks[rider + 1 + n] = int(pickup), int(dropoff)
+
+        exact, heuristic = solve_exact(dist, n, ranks), solve_heuristic(dist, n, ranks)
+
+        for order in (exact, heuristic):
+            assert follows_stops(order, ranks)
+            assert all(order.index(r + 1) < order.index(r + 1 + n) for r in range(n))
+        cost = lambda order: sum(dist[a, b] for a, b in itertools.pairwise(order))
+        assert cost(exact) <= cost(heuristic) + 1e-9
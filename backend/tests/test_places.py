@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.config import settings
+from app.db.models import PreferredLocation
+from app.services import places
+from app.services.places import NODE_CAPACITY, PlaceIndex, normalize, place_service
+
+
+def _place(name, popularity, area=None):
+    return {"name": name, "area": area, "latitude": 24.9, "longitude": 67.0, "popularity": popularity}
+
+
+@pytest.fixture
+def bundled_index():
+    yield
+    place_service.rebuild()  # drop saved places the test folded in
+
+
+def test_prefixes_of_any_name_word_most_popular_first():
+    index = PlaceIndex([_place("Dolmen Mall", 50, "Clifton"), _place("Ocean Mall", 80, "Clifton"),
+                        _place("Millennium Mall", 60, "Gulistan-e-Johar")])
+
+    assert [p["name"] for p in index.search("mal", 5)] == ["Ocean Mall", "Millennium Mall", "Dolmen Mall"]
+    assert [p["name"] for p in index.search("dolmen", 5)] == ["Dolmen Mall"]
+    assert [p["name"] for p in index.search("Mall  CLIF", 5)] == ["Ocean Mall", "Dolmen Mall"]  # area word
+    assert index.search("clifton", 5) == []  # the first word has to start a name word
+    assert index.search("  ", 5) == [] and index.search("zzz", 5) == []
+
+
+def test_multi_word_query_finds_places_past_a_full_node():
+    crowd = [_place(f"Street {i}", 1000 - i) for i in range(NODE_CAPACITY + 10)]
+    index = PlaceIndex(crowd + [_place("Sea View Clifton", 1)])
+
+    assert len(index._candidates("s")) == NODE_CAPACITY
+    assert [p["name"] for p in index.search("s clifton", 5)] == ["Sea View Clifton"]
+    # A page the full node can fill is still served from it
+    assert [p["name"] for p in index.search("s", 3)] == ["Street 0", "Street 1", "Street 2"]
+
+
+def test_geocode_exact_name_then_best_prefix():
+    index = PlaceIndex([_place("Saddar", 90), _place("Saddar Town Hall", 40), _place("Sadaf Bakery", 95)])
+
+    assert index.geocode("  saddar ")["name"] == "Saddar"
+    assert index.geocode("sad")["name"] == "Sadaf Bakery"
+    assert index.geocode("Karsaz") is None
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("  Café-Clifton,  Block 5 ") == "cafe clifton block 5"
+
+
+def test_saved_addresses_need_several_users(db, make_user, bundled_index):
+    assert settings.PLACES_MIN_SHARED_SAVES == 2
+    alice, _ = make_user("Alice")
+    bob, _ = make_user("Bob")
+    for user, latitude in ((alice, 24.80), (bob, 24.82)):
+        db.add(PreferredLocation(user_id=user.id, name="Office", address="Dolmen Tower",
+                                 latitude=latitude, longitude=67.03))
+    db.add(PreferredLocation(user_id=alice.id, name="Home", address="House 12 Street 4",
+                             latitude=24.9, longitude=67.1))
+    db.commit()
+
+    place_service.rebuild(db)
+
+    shared = place_service.geocode("Dolmen Tower")
+    assert shared["name"] == "Dolmen Tower" and shared["latitude"] == pytest.approx(24.81)
+    assert shared["popularity"] == 2 * places.SAVED_PLACE_POPULARITY
+    assert place_service.autocomplete("house 12", 5) == []  # one user's home stays private
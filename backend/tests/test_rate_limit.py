@@ -0,0 +1,51 @@
+import pytest
+
+from app.middleware.rate_limit import Limit, MemoryBuckets, rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def fresh_buckets(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "store", MemoryBuckets())
+
+
+def test_otp_verify_is_limited_per_ip(client):
+    payload = {"email": "someone@example.com", "otp": "000000"}
+    statuses = [client.post("/api/auth/verify-otp", json=payload).status_code for _ in range(11)]
+
+    assert statuses[:10] == [400] * 10
+    assert statuses[10] == 429
+
+
+def test_rejection_carries_retry_after(client):
+    for _ in range(10):
+        client.post("/api/auth/verify-otp", json={"email": "someone@example.com", "otp": "000000"})
+
+    response = client.post("/api/auth/verify-otp", json={"email": "someone@example.com", "otp": "000000"})
+
+    assert response.status_code == 429
+    # One token refills in 600 / 10 seconds
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+
+
+def test_user_buckets_are_separate(client, make_user, monkeypatch):
+    monkeypatch.setitem(rate_limiter.overrides, "message_search:user", Limit(2, 60))
+    _, alice = make_user("Alice")
+    _, bob = make_user("Bob")
+
+    alice_statuses = [client.get("/api/messages/search", headers=alice, params={"q": "hi"}).status_code
+                      for _ in range(3)]
+
+    assert alice_statuses == [200, 200, 429]
+    assert client.get("/api/messages/search", headers=bob, params={"q": "hi"}).status_code == 200
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    buckets = MemoryBuckets()
+    now = [1000.0]
+    monkeypatch.setattr("app.middleware.rate_limit.time.monotonic", lambda: now[0])
+    bucket = [("k", Limit(2, 10))]
+
+    assert [buckets.take(bucket) for _ in range(3)] == [0, 0, 5.0]
+    now[0] += 5
+    assert buckets.take(bucket) == 0
+    assert buckets.take(bucket) == pytest.approx(5.0)
@@ -0,0 +1,43 @@
+import pytest
+
+from app.core.database import ReadRouter, SessionLocal, read_router
+from app.core.redis_client import redis_connection
+from app.db.models import User
+
+
+def _replica():
+    raise AssertionError("read a replica")
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(redis_connection, "_client", fakeredis.FakeRedis(decode_responses=True))
+    monkeypatch.setattr(redis_connection, "_down_until", 0.0)
+
+
+def test_write_on_one_worker_pins_reads_on_the_others(shared_redis):
+    worker_a = ReadRouter([_replica], policy="round_robin", sticky_seconds=5)
+    worker_b = ReadRouter([_replica], policy="round_robin", sticky_seconds=5)
+
+    worker_a.mark_write("client")
+
+    assert worker_b.session_factory("client") is SessionLocal
+    assert worker_b.session_factory("someone-else") is _replica
+
+
+def test_marker_stays_local_without_redis():
+    router = ReadRouter([_replica], policy="round_robin", sticky_seconds=5)
+    router.mark_write("client")
+    assert router.session_factory("client") is SessionLocal
+
+
+def test_anonymous_cacheable_reads_use_the_primary(client, db, monkeypatch):
+    user = User(name="Driver", email="driver@example.com")
+    db.add(user)
+    db.commit()
+    monkeypatch.setattr(read_router, "replicas", [_replica])
+
+    response = client.get(f"/api/users/profile/{user.id}")
+
+    assert response.status_code == 200, response.text
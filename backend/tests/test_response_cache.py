@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import ResponseCache
+from app.core.redis_client import redis_connection
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(redis_connection, "_client", fakeredis.FakeRedis(decode_responses=True))
+    monkeypatch.setattr(redis_connection, "_down_until", 0.0)
+
+
+def _fill(cache: ResponseCache, key, deps, body: bytes) -> str:
+    source, key_versions = cache.snapshot([key])
+    _, dep_versions = cache.snapshot(deps)
+    return cache.set(key, (source, key_versions + dep_versions), body)
+
+
+def test_write_on_one_worker_invalidates_the_others(shared_redis):
+    worker_a, worker_b = ResponseCache(16, 300), ResponseCache(16, 300)
+    etag_a = _fill(worker_a, ("ride", 1), [("user", 7)], b"{}")
+    etag_b = _fill(worker_b, ("ride", 1), [("user", 7)], b"{}")
+
+    assert etag_a == etag_b  # a client revalidating against either worker gets a 304
+    worker_b.invalidate("user", 7)
+
+    assert worker_a.get(("ride", 1)) is None
+    assert worker_b.get(("ride", 1)) is None
+
+
+def test_namespace_bump_reaches_every_worker(shared_redis):
+    worker_a, worker_b = ResponseCache(16, 300), ResponseCache(16, 300)
+    _fill(worker_a, ("ride", 1), [], b"{}")
+    assert worker_a.get(("ride", 1)) is not None
+
+    worker_b.invalidate("ride")
+
+    assert worker_a.get(("ride", 1)) is None
+
+
+def test_local_versions_without_redis():
+    cache = ResponseCache(16, 300)
+    _fill(cache, ("cars", 3), [], b"[]")
+    assert cache.get(("cars", 3)) is not None
+
+    cache.invalidate("cars", 3)
+
+    assert cache.get(("cars", 3)) is None
+
+
+def test_cached_endpoints_reach_redis_off_the_event_loop(client, make_user, shared_redis, monkeypatch):
+    _, headers = make_user("Driver")
+    fake = redis_connection._client
+    callers = []
+
+    def mget(keys):
+        try:
+            asyncio.get_running_loop()
+            callers.append("event loop")
+        except RuntimeError:
+            callers.append("threadpool")
+        return fake.__class__.mget(fake, keys)
+
+    monkeypatch.setattr(fake, "mget", mget)
+    assert client.get("/api/cars/", headers=headers).status_code == 200
+    assert callers and set(callers) == {"threadpool"}
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.db.crud.ride_lifecycle import auto_end_started_rides
+from app.db.models import (Car, Message, Ride, RideArchive, RideChatMember, RideHistory, RideRequest,
+                           RideTrack, RideTrackArchive)
+from app.services.ride_lifecycle import run_ride_lifecycle_job
+
+
+def _ride(db, make_user, status: str, days_ago: float):
+    driver, driver_headers = make_user("Driver")
+    rider, rider_headers = make_user("Rider")
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", color="White", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    start_time = datetime.now(pytz.timezone("Asia/Karachi")).replace(tzinfo=None) - timedelta(days=days_ago)
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=start_time, seats_available=3, status=status)
+    db.add(ride)
+    db.commit()
+    db.add(RideRequest(ride_id=ride.id, rider_id=rider.id, status="accepted",
+                       joining_stop="Gulshan", ending_stop="Saddar"))
+    db.add(RideHistory(user_id=rider.id, ride_id=ride.id, role="rider", rating_given=4))
+    db.commit()
+    return ride, driver_headers, rider_headers
+
+
+def test_auto_end_completes_ride_history(db, make_user):
+    ride, _, _ = _ride(db, make_user, "start", days_ago=1)
+
+    assert auto_end_started_rides(db, timeout_hours=6, batch_size=10) == 1
+
+    db.expire_all()
+    assert ride.status == "end"
+    assert db.query(RideHistory).filter(RideHistory.ride_id == ride.id).one().completed_at is not None
+
+
+def test_archive_moves_rides_with_history_messages_and_tracks(client, db, make_user):
+    ride, _, rider_headers = _ride(db, make_user, "end", days_ago=60)
+    ride_id, driver_id = ride.id, ride.driver_id
+    db.add(Message(sender_id=driver_id, receiver_id=None, ride_id=ride_id, content="On my way"))
+    db.add(RideChatMember(ride_id=ride_id, user_id=driver_id, role="driver", unread_count=0))
+    db.add(RideTrack(ride_id=ride_id, driver_id=driver_id, latitude=24.9, longitude=67.0,
+                     recorded_at=ride.start_time))
+    db.commit()
+
+    assert run_ride_lifecycle_job()["archived"] == 1  # RIDE_ARCHIVE_AFTER_DAYS is 30
+
+    assert db.query(Ride).count() == 0 and db.query(RideTrack).count() == 0
+    assert db.query(RideArchive).count() == 1 and db.query(RideTrackArchive).count() == 1
+    assert db.query(Message).count() == 1 and db.query(RideChatMember).count() == 1
+
+    history = client.get("/api/rides/history", headers=rider_headers).json()
+    assert history[0]["ride"]["id"] == ride_id and history[0]["ride"]["driver"]["name"] == "Driver"
+    cards = client.get("/api/rides/history?view=card", headers=rider_headers).json()
+    assert cards[0]["ride"]["status"] == "end"
+
+    profile = client.get(f"/api/users/profile/{driver_id}", headers=rider_headers).json()
+    assert (profile["rides_offered"], profile["driver_rating"]) == (1, 4.0)
+
+    thread = client.get(f"/api/messages/rides/{ride_id}/history", headers=rider_headers)
+    assert thread.status_code == 200 and thread.json()["messages"][0]["content"] == "On my way"
@@ -0,0 +1,77 @@
+from datetime import time
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.db.crud.ride_template import generate_ride_instances
+from app.db.models import Car, Ride, RideTemplate, Schedule
+
+
+def _template(db, driver, **fields):
+    car = Car(user_id=driver.id, make="Suzuki", model="Cultus", color="Grey", license_plate=f"KHI-{driver.id}", seats=4)
+    db.add(car)
+    db.commit()
+    schedules = [Schedule(user_id=driver.id, day_of_week=day, start_time=time(8, 0)) for day in range(7)]
+    db.add_all(schedules)
+    db.commit()
+    template = RideTemplate(driver_id=driver.id, car_id=car.id, schedule_id=schedules[0].id,
+                            start_location="Gulshan", end_location="Saddar", seats_available=3,
+                            main_stops=["Gulshan", "Saddar"], **fields)
+    db.add(template)
+    db.commit()
+    return template
+
+
+def test_template_update_rejects_another_drivers_car(client, db, make_user):
+    driver, headers = make_user("Driver", is_driver=True)
+    other, _ = make_user("Other", is_driver=True)
+    template = _template(db, driver)
+    foreign_car = Car(user_id=other.id, make="Honda", model="City", color="Black", license_plate="KHI-X", seats=4)
+    db.add(foreign_car)
+    db.commit()
+
+    single = client.put(f"/api/ride-templates/{template.id}", json={"car_id": foreign_car.id}, headers=headers)
+    bulk = client.put("/api/ride-templates/bulk", json={"template_ids": [template.id], "car_id": foreign_car.id},
+                      headers=headers)
+
+    assert single.status_code == 404 and bulk.status_code == 404
+    db.refresh(template)
+    assert template.car_id != foreign_car.id
+
+
+def test_generation_skips_occurrences_that_already_exist(db, make_user):
+    driver, _ = make_user("Driver", is_driver=True)
+    _template(db, driver)
+
+    created = generate_ride_instances(db, 7)
+    # A second run that missed the first run's rows (e.g. on another worker) inserts nothing
+    existing = db.query(Ride).count()
+    again = generate_ride_instances(db, 7)
+
+    assert created == existing > 0
+    assert again == 0 and db.query(Ride).count() == existing
+
+    ride = db.query(Ride).first()
+    db.add(Ride(driver_id=ride.driver_id, car_id=ride.car_id, template_id=ride.template_id,
+                start_time=ride.start_time, start_location="Gulshan", end_location="Saddar", seats_available=3))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+
+def test_changing_stops_recomputes_distance(client, db, make_user):
+    driver, headers = make_user("Driver", is_driver=True)
+    template = _template(db, driver, start_latitude=24.9204, start_longitude=67.0932,
+                         end_latitude=24.8556, end_longitude=67.0227, distance_km=10.0, estimated_duration=20)
+    generate_ride_instances(db, 7)
+
+    response = client.put(f"/api/ride-templates/{template.id}", headers=headers,
+                          json={"main_stops": ["Gulshan", "Clifton", "Saddar"],
+                                "end_latitude": 24.8138, "end_longitude": 67.0300})
+
+    assert response.status_code == 200, response.text
+    db.refresh(template)
+    assert template.main_stops == ["Gulshan", "Clifton", "Saddar"]
+    assert template.distance_km != 10.0 and template.estimated_duration != 20
+    rides = db.query(Ride).filter(Ride.template_id == template.id).all()
+    assert rides and all(ride.distance_km == template.distance_km and ride.end_latitude == 24.8138 for ride in rides)
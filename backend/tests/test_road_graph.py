@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.road_graph import RoadGraph, _speed_kmh
+
+OSM = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="24.9000" lon="67.0000"><tag k="name" v="Shahrah-e-Faisal Chowk"/></node>
+  <node id="2" lat="24.9100" lon="67.0000"/>
+  <node id="3" lat="24.9200" lon="67.0000"><tag k="name" v="Nipa Chowrangi"/></node>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="primary"/><tag k="name" v="University Road"/><tag k="maxspeed" v="30 mph"/>
+  </way>
+</osm>
+"""
+
+
+def test_maxspeed_units():
+    assert _speed_kmh({"highway": "primary", "maxspeed": "60"}) == 60
+    assert _speed_kmh({"highway": "primary", "maxspeed": "30 mph"}) == pytest.approx(48.28, abs=0.01)
+    assert _speed_kmh({"highway": "primary", "maxspeed": "50;70"}) == 50
+    assert _speed_kmh({"highway": "primary", "maxspeed": "signals"}) == 50
+
+
+def test_graph_round_trips_without_pickle(tmp_path):
+    source = tmp_path / "area.osm"
+    source.write_text(OSM, encoding="utf-8")
+    path = str(tmp_path / "area.npz")
+    RoadGraph.from_osm(str(source)).save(path)
+
+    graph = RoadGraph.load(path)  # np.load(..., allow_pickle=False)
+    route = graph.route(24.9000, 67.0000, 24.9200, 67.0000)
+
+    assert sorted(graph.names) == ["Nipa Chowrangi", "Shahrah-e-Faisal Chowk", "University Road"]
+    assert route["distance_km"] == pytest.approx(2.22, abs=0.01)
+    # 2.22 km at 30 mph
+    assert route["duration_minutes"] == 3
+
+
+def test_load_refuses_raw_extracts(tmp_path):
+    source = tmp_path / "area.osm"
+    source.write_text(OSM, encoding="utf-8")
+    with pytest.raises(ValueError):
+        RoadGraph.load(str(source))
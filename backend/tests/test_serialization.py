@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from app.core.config import settings
+from app.db.models import Car, Ride, RideHistory, RideRequest
+
+
+@pytest.fixture
+def seeded(db, make_user):
+    driver, driver_headers = make_user("Driver", is_driver=True)
+    rider, rider_headers = make_user("Rider")
+    # No color or photo: None has to come out as null on both paths
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    start_time = datetime.now(pytz.timezone("Asia/Karachi")).replace(tzinfo=None, microsecond=0) \
+        + timedelta(minutes=30)
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=start_time, seats_available=3, total_fare=300,
+                status="active", main_stops=["Gulshan", "Karsaz", "Saddar"])
+    db.add(ride)
+    db.commit()
+    db.add(RideRequest(ride_id=ride.id, rider_id=rider.id, status="pending",
+                       joining_stop="Gulshan", ending_stop="Saddar"))
+    db.add(RideHistory(user_id=rider.id, ride_id=ride.id, role="rider", rating_given=4,
+                       completed_at=start_time + timedelta(hours=1)))
+    db.commit()
+    return ride, driver_headers, rider_headers
+
+
+def _both(client, monkeypatch, path, headers):
+    bodies = []
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_SERIALIZATION", fast)
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, (fast, response.text)
+        bodies.append(response.json())
+    return bodies
+
+
+def test_orjson_lists_match_the_response_model(client, monkeypatch, seeded):
+    ride, driver_headers, rider_headers = seeded
+
+    for path, headers in (
+        ("/api/rides/", rider_headers),
+        ("/api/rides/?view=card", rider_headers),
+        (f"/api/rides/{ride.id}/requests", driver_headers),
+        (f"/api/rides/history-ride/{ride.id}", rider_headers),
+    ):
+        validated, fast = _both(client, monkeypatch, path, headers)
+        assert validated and fast == validated, path
+
+
+def test_nested_objects_datetimes_and_nulls(client, monkeypatch, seeded):
+    ride, _, rider_headers = seeded
+
+    validated, fast = _both(client, monkeypatch, "/api/rides/", rider_headers)
+
+    item = fast[0]
+    assert item["driver"]["name"] == "Driver" and item["car"]["color"] is None
+    assert item["start_time"] == ride.start_time.isoformat()
+    assert fast[0]["driver"] == validated[0]["driver"] and fast[0]["car"] == validated[0]["car"]
+
+    history = _both(client, monkeypatch, f"/api/rides/history-ride/{ride.id}", rider_headers)
+    assert history[0][0]["completed_at"] == history[1][0]["completed_at"] is not None
+    assert history[0][0]["review_given"] is None and history[1][0]["review_given"] is None
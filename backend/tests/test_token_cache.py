@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import TokenCache, create_access_token, store_otp, token_cache, verify_token
+
+
+def test_verified_tokens_are_reused_until_they_expire(monkeypatch):
+    token = create_access_token({"sub": "rider@example.com"})
+    token_cache.clear()
+    assert verify_token(token)["sub"] == "rider@example.com"
+
+    # A cached token is not decoded again
+    monkeypatch.setattr("app.core.security.jwt.decode", lambda *args, **kwargs: pytest.fail("decoded twice"))
+    assert verify_token(token)["sub"] == "rider@example.com"
+
+    monkeypatch.undo()
+    expired = create_access_token({"sub": "rider@example.com"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException):
+        verify_token(expired)
+    assert token_cache.get(expired) is None
+
+
+def test_cache_drops_expired_and_least_recently_used_entries(monkeypatch):
+    cache = TokenCache(max_entries=2)
+    now = time.time()
+    cache.put("a", {"sub": "a", "exp": now + 60})
+    cache.put("b", {"sub": "b", "exp": now + 60})
+    cache.get("a")
+    cache.put("c", {"sub": "c", "exp": now + 60})
+    cache.put("no-exp", {"sub": "d"})
+
+    assert [cache.get(token) is not None for token in ("a", "b", "c", "no-exp")] == [True, False, True, False]
+
+    monkeypatch.setattr("app.core.security.time.time", lambda: now + 61)
+    assert cache.get("a") is None
+
+
+def test_otp_login_token_from_the_crypto_pool_authenticates(client, make_user):
+    make_user("Rider")
+    store_otp("rider@example.com", "123456")
+    response = client.post("/api/auth/verify-otp", json={"email": "rider@example.com", "otp": "123456"})
+    assert response.status_code == 200
+
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+    assert me.json()["email"] == "rider@example.com"
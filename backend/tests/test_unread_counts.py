@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from app.db.crud.messages import create_message
+from app.db.models import Car, ConversationUnread, Ride, RideChatMember, RideRequest
+from app.schema.message import MessageCreate
+
+
+def test_unread_counter_is_upserted(db, make_user):
+    alice, _ = make_user("Alice")
+    bob, _ = make_user("Bob")
+
+    for _ in range(3):
+        create_message(db, MessageCreate(receiver_id=bob.id, content="hi"), alice.id)
+
+    rows = db.query(ConversationUnread).all()
+    assert [(row.user_id, row.other_user_id, row.unread_count) for row in rows] == [(bob.id, alice.id, 3)]
+
+
+def test_unread_count_is_fresh_on_every_poll(client, db, make_user):
+    alice, alice_headers = make_user("Alice")
+    bob, bob_headers = make_user("Bob")
+    client.post("/api/messages", headers=alice_headers, json={"receiver_id": bob.id, "content": "hi"})
+
+    first = client.get("/api/messages/unread-count", headers=bob_headers)
+    assert first.json()["total"] == 1
+    unchanged = client.get("/api/messages/unread-count",
+                           headers={**bob_headers, "If-None-Match": first.headers["etag"]})
+    assert unchanged.status_code == 304
+
+    # A counter change this process was never told about (e.g. written by another worker)
+    create_message(db, MessageCreate(receiver_id=bob.id, content="again"), alice.id)
+    changed = client.get("/api/messages/unread-count",
+                         headers={**bob_headers, "If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and changed.json()["total"] == 2
+
+
+def test_accepting_a_request_joins_the_ride_thread(client, db, make_user):
+    driver, driver_headers = make_user("Driver")
+    rider, rider_headers = make_user("Rider")
+    car = Car(user_id=driver.id, make="Toyota", model="Corolla", color="White", license_plate="ABC-1", seats=4)
+    db.add(car)
+    db.commit()
+    ride = Ride(driver_id=driver.id, car_id=car.id, start_location="Gulshan", end_location="Saddar",
+                start_time=datetime(2026, 10, 20, 8, 0), seats_available=3, total_fare=600.0,
+                status="active")
+    db.add(ride)
+    db.commit()
+    request = RideRequest(ride_id=ride.id, rider_id=rider.id, status="pending",
+                          joining_stop="Gulshan", ending_stop="Saddar")
+    db.add(request)
+    db.commit()
+
+    def members():
+        db.expire_all()
+        return {(row.user_id, row.role) for row in db.query(RideChatMember).filter(RideChatMember.ride_id == ride.id)}
+
+    client.put(f"/api/rides/requests/{request.id}", headers=driver_headers, json={"status": "accepted"})
+    assert members() == {(driver.id, "driver"), (rider.id, "rider")}
+
+    client.post(f"/api/messages/rides/{ride.id}", headers=rider_headers, json={"content": "At the gate"})
+    unread = db.query(RideChatMember).filter(RideChatMember.ride_id == ride.id, RideChatMember.user_id == driver.id)
+    assert unread.one().unread_count == 1
+
+    client.put(f"/api/rides/requests/{request.id}", headers=driver_headers, json={"status": "rejected"})
+    assert members() == {(driver.id, "driver")}
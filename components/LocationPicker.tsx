@@ -92,6 +92,12 @@ export default function LocationPicker({
 
     setSearchLoading(true);
     try {
+      const suggestions = await mapService.searchPlaces(query);
+      if (suggestions.length > 0) {
+        setSearchResults(suggestions);
+        return;
+      }
+
       const result = await mapService.geocodeAddress(query);
       if (result) {
         setSearchResults([result]);
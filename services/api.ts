@@ -30,6 +30,9 @@ const API_BASE_URL = getApiBaseUrl();
 // Debug log to see what URL is being used
 console.log('🌐 API Base URL:', API_BASE_URL);
 
+// Last response per GET endpoint, revalidated with If-None-Match (server replies 304 when unchanged)
+const etagCache = new Map<string, { etag: string; data: any }>();
+
 // Token management
 export const tokenManager = {
   async getToken(): Promise<string | null> {
@@ -44,6 +47,7 @@ export const tokenManager = {
   async setToken(token: string): Promise<void> {
     try {
       await AsyncStorage.setItem('access_token', token);
+      etagCache.clear();
     } catch (error) {
       console.error('Error setting token:', error);
     }
@@ -52,6 +56,7 @@ export const tokenManager = {
   async removeToken(): Promise<void> {
     try {
       await AsyncStorage.removeItem('access_token');
+      etagCache.clear();
     } catch (error) {
       console.error('Error removing token:', error);
     }
@@ -62,11 +67,14 @@ export const tokenManager = {
 async function apiRequest(endpoint: string, options: RequestInit = {}) {
   try {
     const token = await tokenManager.getToken();
+    const isGet = !options.method || options.method === 'GET';
+    const cached = isGet ? etagCache.get(endpoint) : undefined;
     const config: RequestInit = {
       ...options,
       headers: {
         'Content-Type': 'application/json',
         ...(token && { 'Authorization': `Bearer ${token}` }),
+        ...(cached && { 'If-None-Match': cached.etag }),
         ...options.headers,
       },
     };
@@ -74,6 +82,11 @@ async function apiRequest(endpoint: string, options: RequestInit = {}) {
     console.log(`📡 API Request: ${options.method || 'GET'} ${API_BASE_URL}${endpoint}`);
     
     const response = await fetch(`${API_BASE_URL}${endpoint}`, config);
+
+    if (response.status === 304 && cached) {
+      console.log('✅ API Not Modified:', endpoint);
+      return cached.data;
+    }
     
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({}));
@@ -83,6 +96,10 @@ async function apiRequest(endpoint: string, options: RequestInit = {}) {
     }
     
     const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (isGet && etag) {
+      etagCache.set(endpoint, { etag, data });
+    }
     console.log('✅ API Success:', endpoint);
     return data;
   } catch (error) {
@@ -95,6 +112,24 @@ async function apiRequest(endpoint: string, options: RequestInit = {}) {
   }
 }
 
+// POST that is safe to retry: every attempt carries the same Idempotency-Key, so the
+// server performs it once and replays the first response to the retries
+async function idempotentRequest(endpoint: string, options: RequestInit, attempts: number = 3) {
+  const key = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await apiRequest(endpoint, {
+        ...options,
+        headers: { ...options.headers, 'Idempotency-Key': key },
+      });
+    } catch (error) {
+      // Only network failures are retried; an HTTP error is the server's answer
+      if (attempt >= attempts || !(error instanceof TypeError)) throw error;
+      await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+    }
+  }
+}
+
 // Authentication API
 export const authAPI = {
   async register(userData: {
@@ -304,7 +339,7 @@ export const ridesAPI = {
   },
 
   async requestRide(rideId: number, joiningStop: string, endingStop: string, message?: string) {
-    const response = await apiRequest('/rides/request', {
+    const response = await idempotentRequest('/rides/request', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -327,6 +362,11 @@ export const ridesAPI = {
     return apiRequest(`/rides/${rideId}/acceptedrequests`);
   },
 
+  // Suggested pickup / drop-off order for the accepted riders (driver only)
+  async getPickupPlan(rideId: number) {
+    return apiRequest(`/rides/${rideId}/pickup-plan`);
+  },
+
   async updateRideRequest(requestId: number, status: 'accepted' | 'rejected') {
     return apiRequest(`/rides/requests/${requestId}`, {
       method: 'PUT',
@@ -334,8 +374,9 @@ export const ridesAPI = {
     });
   },
 
-  async getMyRideRequests() {
-    return apiRequest('/rides/my-requests');
+  // view 'card' returns only the request, rider and ride summary fields list screens show
+  async getMyRideRequests(view: 'full' | 'card' = 'full') {
+    return apiRequest(`/rides/my-requests?view=${view}`);
   },
 
   async getDriverRideRequests() {
@@ -442,6 +483,15 @@ export const carsAPI = {
 };
 
 // Messages API
+const historyQuery = (cursor: { before?: string; after?: string; limit?: number }) => {
+  const params = new URLSearchParams();
+  if (cursor.before) params.append('before', cursor.before);
+  if (cursor.after) params.append('after', cursor.after);
+  if (cursor.limit) params.append('limit', String(cursor.limit));
+  const query = params.toString();
+  return query ? `?${query}` : '';
+};
+
 export const messagesAPI = {
   async sendMessage(receiverId: number, content: string, rideId?: number) {
     const payload: any = {
@@ -454,7 +504,7 @@ export const messagesAPI = {
       payload.ride_id = rideId;
     }
     
-    return apiRequest('/messages/', {
+    return idempotentRequest('/messages/', {
       method: 'POST',
       body: JSON.stringify(payload),
     });
@@ -464,8 +514,40 @@ export const messagesAPI = {
     return apiRequest('/messages/conversations');
   },
 
-  async getConversationWithUser(userId: number) {
-    return apiRequest(`/messages/${userId}`);
+  // One page, newest first: { messages, users, has_more, before, after }.
+  // Pass `before` to load older messages, or `after` to fetch ones newer than the page.
+  async getConversationHistory(userId: number, cursor: { before?: string; after?: string; limit?: number } = {}) {
+    return apiRequest(`/messages/${userId}/history${historyQuery(cursor)}`);
+  },
+
+  // Inbox badge: { total, conversations: [{ user_id, unread_count }] }
+  async getUnreadCount() {
+    return apiRequest('/messages/unread-count');
+  },
+
+  async markConversationRead(userId: number) {
+    return apiRequest(`/messages/${userId}/read`, {
+      method: 'POST',
+    });
+  },
+
+  // Ride group thread (driver + accepted riders); new messages also arrive on the
+  // ride socket as { type: 'chat', message }
+  async sendRideMessage(rideId: number, content: string) {
+    return apiRequest(`/messages/rides/${rideId}`, {
+      method: 'POST',
+      body: JSON.stringify({ content }),
+    });
+  },
+
+  async getRideThread(rideId: number, cursor: { before?: string; after?: string; limit?: number } = {}) {
+    return apiRequest(`/messages/rides/${rideId}/history${historyQuery(cursor)}`);
+  },
+
+  async markRideThreadRead(rideId: number) {
+    return apiRequest(`/messages/rides/${rideId}/read`, {
+      method: 'POST',
+    });
   }
 };
 
@@ -488,6 +570,150 @@ export const locationsAPI = {
   }
 };
 
+// Images API
+export const imagesAPI = {
+  // Uploads a local image file (e.g. an ImagePicker asset uri) and returns
+  // { url, thumbnails } - use url as photo_url instead of a base64 string
+  async uploadImage(uri: string, mimeType: string = 'image/jpeg') {
+    const token = await tokenManager.getToken();
+    const formData = new FormData();
+    formData.append('file', { uri, name: uri.split('/').pop() || 'photo.jpg', type: mimeType } as any);
+
+    const response = await fetch(`${API_BASE_URL}/images/`, {
+      method: 'POST',
+      headers: {
+        ...(token && { 'Authorization': `Bearer ${token}` }),
+      },
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  }
+};
+
+// Ride templates API (recurring rides)
+export const rideTemplatesAPI = {
+  async getTemplates() {
+    return apiRequest('/ride-templates/');
+  },
+
+  async createTemplate(templateData: {
+    car_id: number;
+    schedule_id: number;
+    start_location: string;
+    end_location: string;
+    start_latitude?: number;
+    start_longitude?: number;
+    end_latitude?: number;
+    end_longitude?: number;
+    distance_km?: number;
+    estimated_duration?: number;
+    seats_available: number;
+    total_fare?: number;
+  }) {
+    return apiRequest('/ride-templates/', {
+      method: 'POST',
+      body: JSON.stringify(templateData),
+    });
+  },
+
+  async updateTemplates(templateIds: number[], updateData: {
+    car_id?: number;
+    seats_available?: number;
+    total_fare?: number;
+  }) {
+    return apiRequest('/ride-templates/bulk', {
+      method: 'PUT',
+      body: JSON.stringify({ template_ids: templateIds, ...updateData }),
+    });
+  },
+
+  async cancelTemplates(templateIds: number[]) {
+    return apiRequest('/ride-templates/cancel', {
+      method: 'POST',
+      body: JSON.stringify({ template_ids: templateIds }),
+    });
+  }
+};
+
+// Commute matches API
+export const commuteAPI = {
+  async getCommuteMatches(dayOfWeek?: number) {
+    const query = dayOfWeek !== undefined ? `?day_of_week=${dayOfWeek}` : '';
+    return apiRequest(`/commute-matches/${query}`);
+  }
+};
+
+// Places API (server-side autocomplete / geocoding for Karachi)
+export const placesAPI = {
+  async autocomplete(query: string, limit: number = 8) {
+    return apiRequest(`/places/autocomplete?q=${encodeURIComponent(query)}&limit=${limit}`);
+  },
+
+  async geocode(query: string) {
+    return apiRequest(`/places/geocode?q=${encodeURIComponent(query)}`);
+  }
+};
+
+// Live driver location for rides in progress
+export const trackingAPI = {
+  // Socket for driver and accepted riders. Messages: { type: 'snapshot', points, etas } then
+  // { type: 'location', latitude, longitude, ... }, { type: 'eta', stops } and { type: 'chat', message }.
+  // The driver sends pings with socket.send(JSON).
+  async openRideSocket(rideId: number): Promise<WebSocket> {
+    const token = await tokenManager.getToken();
+    const wsBase = API_BASE_URL.replace(/^http/, 'ws');
+    return new WebSocket(`${wsBase}/tracking/rides/${rideId}/ws?token=${encodeURIComponent(token || '')}`);
+  },
+
+  // Batched pings over HTTP (e.g. flushing a backlog after reconnecting)
+  async sendPings(rideId: number, pings: Array<{
+    latitude: number;
+    longitude: number;
+    speed?: number | null;
+    heading?: number | null;
+    accuracy?: number | null;
+    recorded_at?: string;
+  }>) {
+    return apiRequest(`/tracking/rides/${rideId}/pings`, {
+      method: 'POST',
+      body: JSON.stringify({ pings }),
+    });
+  },
+
+  async getLiveLocations(rideId: number) {
+    return apiRequest(`/tracking/rides/${rideId}/live`);
+  },
+
+  // Estimated arrival at each remaining stop
+  async getStopEtas(rideId: number) {
+    return apiRequest(`/tracking/rides/${rideId}/eta`);
+  }
+};
+
+// Several GETs in one round trip (POST /api/batch, at most 20 per call)
+const BATCH_MAX_REQUESTS = 20;
+
+export const batchAPI = {
+  // Resolves to one { status, body } per endpoint, in order; a failed endpoint does not fail the others
+  async get(endpoints: string[]): Promise<{ status: number; body: any }[]> {
+    const results: { status: number; body: any }[] = [];
+    for (let i = 0; i < endpoints.length; i += BATCH_MAX_REQUESTS) {
+      const chunk = endpoints.slice(i, i + BATCH_MAX_REQUESTS);
+      const data = await apiRequest('/batch', {
+        method: 'POST',
+        body: JSON.stringify({ requests: chunk.map(endpoint => ({ path: `/api${endpoint}` })) }),
+      });
+      results.push(...data.responses);
+    }
+    return results;
+  }
+};
+
 // Health check
 export const healthAPI = {
   async checkHealth() {
@@ -1,5 +1,6 @@
 import * as Location from 'expo-location';
 import { Platform } from 'react-native';
+import { placesAPI } from './api';
 
 export interface Coordinates {
   latitude: number;
@@ -91,8 +92,36 @@ class MapService {
     }
   }
 
-  // Forward geocoding - convert address to coordinates (FREE using Expo Location + Nominatim fallback)
+  // Place suggestions from the backend index (fast, no third-party calls)
+  async searchPlaces(query: string, limit: number = 8): Promise<LocationResult[]> {
+    try {
+      const places = await placesAPI.autocomplete(query, limit);
+      return places.map((place: any) => this.placeToResult(place));
+    } catch (error) {
+      console.error('Error fetching place suggestions:', error);
+      return [];
+    }
+  }
+
+  private placeToResult(place: any): LocationResult {
+    return {
+      coordinates: { latitude: place.latitude, longitude: place.longitude },
+      address: place.name,
+      description: place.area || undefined,
+    };
+  }
+
+  // Forward geocoding - convert address to coordinates (backend index, then Expo Location + Nominatim fallback)
   async geocodeAddress(address: string): Promise<LocationResult | null> {
+    try {
+      const place = await placesAPI.geocode(address);
+      if (place) {
+        return this.placeToResult(place);
+      }
+    } catch (error) {
+      // Not in the local index - fall through to device / Nominatim geocoding
+    }
+
     try {
       // Try Expo Location first (uses device's native geocoding)
       const results = await Location.geocodeAsync(address);